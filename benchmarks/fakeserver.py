@@ -0,0 +1,296 @@
+"""
+A stand-in for the Petfinder API, serving generated XML documents from a
+local HTTP server. Point a client's ``endpoint`` at it to benchmark the
+client without credentials, quotas, or the network getting in the way.
+
+Supports ``pet.find``, ``pet.get``, ``shelter.find``, ``shelter.get``,
+``shelter.getPets``, ``shelter.listByBreed``, and ``breed.list``. Paginated
+methods honor ``count`` and ``offset`` just like the real thing, and
+``format=json`` gets the same documents in the API's JSON form. Documents
+are generated deterministically, and each distinct response is only
+rendered once, so the server spends as little time as possible on its side
+of the benchmark. :py:func:`render_response` builds the same documents
+without a server.
+"""
+
+import multiprocessing
+import threading
+import time
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    # Python 2.
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlparse
+
+from petfinder.jsonformat import xml_to_json
+
+# How much is in each generated pet record. Real records run the gamut from
+# next to nothing to several photos, each in five sizes.
+RICHNESS_LEVELS = {
+    "minimal": {
+        "breeds": 1, "options": 0, "photos": 0, "description": 0,
+    },
+    "typical": {
+        "breeds": 1, "options": 2, "photos": 3, "description": 400,
+    },
+    "rich": {
+        "breeds": 3, "options": 5, "photos": 6, "description": 2000,
+    },
+}
+
+PHOTO_SIZES = ("x", "pn", "fpm", "pnt", "t")
+OPTIONS = ("hasShots", "altered", "housetrained", "noCats", "noKids")
+BREEDS = ("Beagle", "Labrador Retriever", "Pit Bull Terrier", "Boxer",
+          "Chihuahua")
+
+_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<petfinder xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+    '<header><version>0.1</version>'
+    '<timestamp>2013-04-21T21:54:03Z</timestamp>'
+    '<status><code>%s</code><message>%s</message></status></header>'
+)
+
+
+def render_document(body, code="100", message=""):
+    """
+    :param str body: Everything that goes after the <header>.
+    :keyword str code: The API status code.
+    :keyword str message: The API status message.
+    :rtype: bytes
+    :returns: A complete response document.
+    """
+
+    return ((_HEADER % (code, message)) + body + "</petfinder>").encode(
+        "utf-8")
+
+
+def render_pet(pet_id, richness="typical"):
+    """
+    :param int pet_id: The pet's ID. Everything else is derived from it.
+    :keyword str richness: One of the keys in :py:data:`RICHNESS_LEVELS`.
+    :rtype: str
+    :returns: The pet's fields, without the enclosing <pet> tags.
+    """
+
+    level = RICHNESS_LEVELS[richness]
+    breeds = "".join(
+        "<breed>%s</breed>" % BREEDS[(pet_id + i) % len(BREEDS)]
+        for i in range(level["breeds"]))
+    options = "".join(
+        "<option>%s</option>" % OPTIONS[i] for i in range(level["options"]))
+    photos = "".join(
+        '<photo id="%d" size="%s">http://photos.petfinder.com/photos/pets/'
+        '%d/%d/?bust=1366582276&amp;width=500&amp;-%s.jpg</photo>'
+        % (i + 1, size, pet_id, i + 1, size)
+        for i in range(level["photos"]) for size in PHOTO_SIZES)
+    description = ("A very good dog. " * (level["description"] // 17 + 1))[
+        :level["description"]]
+    return (
+        "<id>%(id)d</id><shelterId>SC%(shelter)03d</shelterId>"
+        "<shelterPetId>A%(id)d</shelterPetId><name>Pet %(id)d</name>"
+        "<animal>Dog</animal><breeds>%(breeds)s</breeds><mix>yes</mix>"
+        "<age>Adult</age><sex>%(sex)s</sex><size>M</size>"
+        "<options>%(options)s</options>"
+        "<description>%(description)s</description>"
+        "<lastUpdate>2013-04-%(day)02dT17:46:40Z</lastUpdate>"
+        "<status>A</status><media><photos>%(photos)s</photos></media>"
+        "<contact><address1>123 Main St</address1><address2/>"
+        "<city>Greenville</city><state>SC</state><zip>29607</zip>"
+        "<phone>(864) 555-1234</phone><fax/>"
+        "<email>adopt@example.com</email></contact>"
+    ) % {
+        "id": pet_id, "shelter": pet_id % 100, "breeds": breeds,
+        "sex": "MF"[pet_id % 2], "options": options,
+        "description": description, "day": pet_id % 28 + 1,
+        "photos": photos,
+    }
+
+
+def render_shelter(shelter_id):
+    """
+    :param int shelter_id: The shelter's number.
+    :rtype: str
+    :returns: The shelter's fields, without the enclosing <shelter> tags.
+    """
+
+    return (
+        "<id>SC%(id)03d</id><name>Shelter %(id)d</name>"
+        "<address1>1 Shelter Rd</address1><address2/>"
+        "<city>Greenville</city><state>SC</state><zip>29607</zip>"
+        "<country>US</country><latitude>34.8</latitude>"
+        "<longitude>-82.3</longitude><phone>(864) 555-0000</phone><fax/>"
+        "<email>shelter%(id)d@example.com</email>"
+    ) % {"id": shelter_id}
+
+
+def render_response(method, params, total_pets=1000, total_shelters=100,
+                    richness="typical"):
+    """
+    :param str method: The API method name.
+    :param dict params: The query string parameters.
+    :keyword int total_pets: The number of pets in each paginated pet
+        listing.
+    :keyword int total_shelters: The number of shelters in a shelter.find
+        listing.
+    :keyword str richness: How much is in each pet record. One of the keys
+        in :py:data:`RICHNESS_LEVELS`.
+    :rtype: bytes
+    :returns: The XML response document.
+    """
+
+    offset = int(params.get("offset") or 0)
+    count = int(params.get("count") or 25)
+    output = params.get("output")
+
+    if method in ("pet.find", "shelter.getPets", "shelter.find"):
+        total = total_shelters if method == "shelter.find" else total_pets
+        ids = range(offset, min(total, offset + count))
+        body = "<lastOffset>%d</lastOffset>" % (offset + len(ids))
+        if method == "shelter.find":
+            body += "<shelters>%s</shelters>" % "".join(
+                "<shelter>%s</shelter>" % render_shelter(i) for i in ids)
+        elif method == "shelter.getPets" and (output or "id") == "id":
+            body += "<petIds>%s</petIds>" % "".join(
+                "<id>%d</id>" % i for i in ids)
+        else:
+            body += "<pets>%s</pets>" % "".join(
+                "<pet>%s</pet>" % render_pet(i, richness) for i in ids)
+        return render_document(body)
+    if method == "pet.get":
+        pet_id = int(params.get("id") or 0)
+        if pet_id >= total_pets:
+            return render_document("", "201", "Record does not exist")
+        return render_document("<pet>%s</pet>" % render_pet(pet_id, richness))
+    if method == "shelter.get":
+        return render_document("<shelter>%s</shelter>" % render_shelter(
+            int(params.get("id", "SC0")[2:] or 0)))
+    if method == "breed.list":
+        return render_document(
+            '<breeds animal="%s">%s</breeds>' % (
+                params.get("animal", "dog"),
+                "".join("<breed>%s</breed>" % breed for breed in BREEDS)))
+    if method == "shelter.listByBreed":
+        breed = params.get("breed")
+        if breed not in BREEDS:
+            return render_document("", "201", "Record does not exist")
+        # Each breed is at every shelter but one in len(BREEDS).
+        position = BREEDS.index(breed)
+        return render_document("<shelterIds>%s</shelterIds>" % "".join(
+            "<id>SC%03d</id>" % i for i in range(total_shelters)
+            if i % len(BREEDS) != position))
+    return render_document("", "200", "Invalid request")
+
+
+class FakePetfinderServer(ThreadingMixIn, HTTPServer):
+    """
+    A threaded HTTP server that answers like the Petfinder API.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), total_pets=1000,
+                 total_shelters=100, richness="typical", latency=0):
+        """
+        :keyword tuple address: The ``(host, port)`` to listen on. Port
+            ``0`` picks a free one.
+        :keyword int total_pets: The number of pets in each paginated pet
+            listing.
+        :keyword int total_shelters: The number of shelters in a
+            shelter.find listing.
+        :keyword str richness: How much is in each pet record. One of the
+            keys in :py:data:`RICHNESS_LEVELS`.
+        :keyword float latency: Seconds to wait before answering each
+            request.
+        """
+
+        HTTPServer.__init__(self, address, FakePetfinderHandler)
+        self.total_pets = total_pets
+        self.total_shelters = total_shelters
+        self.richness = richness
+        self.latency = latency
+        self._responses = {}
+        self._responses_lock = threading.Lock()
+
+    @property
+    def url(self):
+        """
+        The endpoint to hand the client.
+        """
+
+        return "http://%s:%d/" % self.server_address[:2]
+
+    def get_response(self, method, params):
+        """
+        :param str method: The API method name.
+        :param dict params: The query string parameters.
+        :rtype: bytes
+        :returns: The response document, rendered once and then re-used.
+        """
+
+        key = (method, tuple(sorted(params.items())))
+        with self._responses_lock:
+            response = self._responses.get(key)
+        if response is None:
+            response = render_response(
+                method, params, total_pets=self.total_pets,
+                total_shelters=self.total_shelters, richness=self.richness)
+            if params.get("format") == "json":
+                response = xml_to_json(response)
+            with self._responses_lock:
+                self._responses[key] = response
+        return response
+
+
+class FakePetfinderHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the client's connection pooling behaves like it would
+    # against the real API.
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes. Without this, Nagle's
+    # algorithm and delayed ACKs add ~40ms to every response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = dict(
+            (key, values[0]) for key, values in parse_qs(url.query).items())
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = self.server.get_response(url.path.strip("/"), params)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json" if body[:1] == b"{"
+                         else "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(pipe, kwargs):
+    server = FakePetfinderServer(**kwargs)
+    pipe.send(server.url)
+    server.serve_forever()
+
+
+def start_server(**kwargs):
+    """
+    Starts a :py:class:`FakePetfinderServer` in a separate process, so it
+    doesn't compete with the client being benchmarked for the GIL. Takes
+    the same keyword arguments as the server.
+
+    :rtype: tuple
+    :returns: A tuple of the server's URL and the process it is running in.
+        Call ``terminate()`` on the process when done.
+    """
+
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, kwargs))
+    process.daemon = True
+    process.start()
+    return parent.recv(), process
@@ -0,0 +1,368 @@
+"""
+Benchmarks :py:class:`petfinder.PetFinderClient` against a local
+:py:mod:`benchmarks.fakeserver`. For each scenario, reports:
+
+* ``records_per_sec``: Records (or IDs, or breeds) out of the client per
+  second of wall clock time.
+* ``pages_per_sec``: Requests completed per second.
+* ``parse_us_per_record``: Microseconds spent parsing responses and
+  building records, per record, from the client's own
+  :py:class:`petfinder.metrics.Metrics`.
+* ``bytes_per_record``: Memory held by each record once built, measured
+  with tracemalloc (Python 3 only).
+
+Run from the top of the repo::
+
+    python -m benchmarks.run
+    python -m benchmarks.run --richness rich --page-size 500 --latency 0.05
+    python -m benchmarks.run --transport urllib3
+    python -m benchmarks.run --format json
+    python -m benchmarks.run --intern
+
+``--transport replay`` records each scenario's responses once, and then
+benchmarks against the recordings, leaving nothing but parsing and
+pagination to measure.
+
+Save the results as a baseline, and compare later runs against it. The
+comparison exits non-zero if any scenario got slower (or bigger) by more
+than the tolerance::
+
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+
+Baselines are only meaningful on the machine they were recorded on, so
+they aren't checked in.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import shutil
+import sys
+import tempfile
+import time
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2.
+    tracemalloc = None
+
+import petfinder
+from petfinder.breeds import BreedIndex
+from petfinder.interning import ValueTable
+from petfinder.metrics import Metrics
+from petfinder.transport import (
+    RecordingTransport, ReplayTransport, RequestsTransport, Urllib3Transport)
+
+from benchmarks.fakeserver import RICHNESS_LEVELS, start_server
+
+# Higher is better for these, lower is better for everything else.
+HIGHER_IS_BETTER = frozenset(["records_per_sec", "pages_per_sec"])
+
+
+def _pet_find(client, options):
+    return client.pet_find(
+        animal="dog", location="29607", output="full",
+        count=options.page_size)
+
+
+def _pet_find_batches(client, options):
+    # Each batch once for every row in it, so that rows are counted (and
+    # memory is measured per row) just like the other scenarios.
+    for batch in client.pet_find_batches(
+            animal="dog", location="29607", output="full",
+            count=options.page_size):
+        for row in itertools.repeat(batch, len(batch["id"])):
+            yield row
+
+
+def _shelter_getpets(client, options):
+    return client.shelter_getpets(
+        id="SC001", output="full", count=options.page_size)
+
+
+def _shelter_getpets_ids(client, options):
+    return client.shelter_getpets(
+        id="SC001", output="id", count=options.page_size)
+
+
+def _shelter_find(client, options):
+    return client.shelter_find(location="29607", count=options.page_size)
+
+
+def _pet_get(client, options):
+    return [client.pet_get(id=pet_id) for pet_id in range(options.lookups)]
+
+
+def _breed_list(client, options):
+    records = []
+    for _ in range(options.lookups):
+        records.extend(client.breed_list(animal="dog"))
+    return records
+
+
+def _shelter_listbybreed(client, options):
+    shelter_ids = []
+    for breed in client.breed_list(animal="dog"):
+        shelter_ids.extend(
+            client.shelter_listbybreed(animal="dog", breed=breed))
+    return shelter_ids
+
+
+def _shelter_listbybreed_index(client, options):
+    index = BreedIndex(client)
+    index.build("dog")
+    shelter_ids = []
+    for breed in index.get_breeds("dog"):
+        shelter_ids.extend(index.get_shelters("dog", breed))
+    return shelter_ids
+
+
+#: Scenario name -> (API method, function returning an iterable of records).
+SCENARIOS = {
+    "pet.find": ("pet.find", _pet_find),
+    "pet.find[batches]": ("pet.find", _pet_find_batches),
+    "shelter.getPets": ("shelter.getPets", _shelter_getpets),
+    "shelter.getPets[id]": ("shelter.getPets", _shelter_getpets_ids),
+    "shelter.find": ("shelter.find", _shelter_find),
+    "pet.get": ("pet.get", _pet_get),
+    "breed.list": ("breed.list", _breed_list),
+    "shelter.listByBreed": ("shelter.listByBreed", _shelter_listbybreed),
+    "shelter.listByBreed[index]": (
+        "shelter.listByBreed", _shelter_listbybreed_index),
+}
+
+
+def _make_transport(options):
+    if options.transport == "urllib3":
+        return Urllib3Transport()
+    if options.transport == "replay":
+        return ReplayTransport(options.recordings)
+    return None
+
+
+def _make_client(url, options, transport=None):
+    return petfinder.PetFinderClient(
+        "benchmark", "benchmark", endpoint=url, metrics=Metrics(),
+        record_mode=options.record_mode, streaming=options.streaming,
+        prefetch=options.prefetch, response_format=options.format,
+        transport=transport or _make_transport(options),
+        value_table=ValueTable() if options.intern else None,
+    )
+
+
+def _record_scenario(url, func, options):
+    """
+    Runs a scenario once, recording its responses for the replay transport.
+    """
+
+    client = _make_client(url, options, transport=RecordingTransport(
+        options.recordings, RequestsTransport()))
+    client.breed_list(animal="dog")
+    for _ in func(client, options):
+        pass
+    client.close()
+
+
+def _measure_memory(client, func, options):
+    """
+    :rtype: float or None
+    :returns: The bytes held per record, or ``None`` without tracemalloc.
+    """
+
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        records = list(func(client, options))
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return float(after - before) / max(len(records), 1)
+
+
+def run_scenario(url, name, options):
+    """
+    Runs a single scenario ``options.repeat`` times, keeping the best run.
+
+    :param str url: The fake server's URL.
+    :param str name: One of the keys in :py:data:`SCENARIOS`.
+    :param argparse.Namespace options: The command line options.
+    :rtype: dict
+    :returns: The scenario's results.
+    """
+
+    method, func = SCENARIOS[name]
+    if options.transport == "replay":
+        _record_scenario(url, func, options)
+    best = None
+    for _ in range(options.repeat):
+        client = _make_client(url, options)
+        # One throwaway call to open the connection.
+        client.breed_list(animal="dog")
+        client.metrics.reset()
+
+        start = time.time()
+        count = 0
+        for _ in func(client, options):
+            count += 1
+        elapsed = time.time() - start
+        client.close()
+
+        latency = client.metrics.snapshot()["latency"]
+        pages = latency[(method, "network")]["count"]
+        parse_time = sum(
+            latency[(method, phase)]["sum"] for phase in ("parse", "record")
+            if (method, phase) in latency)
+        result = {
+            "records": count,
+            "pages": pages,
+            "seconds": elapsed,
+            "records_per_sec": count / elapsed,
+            "pages_per_sec": pages / elapsed,
+            "parse_us_per_record": parse_time * 1e6 / max(count, 1),
+        }
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+
+    client = _make_client(url, options)
+    best["bytes_per_record"] = _measure_memory(client, func, options)
+    client.close()
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """
+    :param dict results: Results from this run, keyed by scenario.
+    :param dict baseline: Results from a saved baseline.
+    :param float tolerance: How much worse (as a fraction) a figure can get
+        before it counts as a regression.
+    :rtype: list
+    :returns: A list of regression descriptions. Empty if all is well.
+    """
+
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        for key in sorted(HIGHER_IS_BETTER | set(
+                ["parse_us_per_record", "bytes_per_record"])):
+            new, old = result.get(key), baseline[name].get(key)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            if key in HIGHER_IS_BETTER:
+                change = -change
+            if change > tolerance:
+                regressions.append("%s %s: %.4g -> %.4g (%+.1f%%)" % (
+                    name, key, old, new, change * 100))
+    return regressions
+
+
+def _format_results(results):
+    lines = ["%-22s %10s %10s %12s %12s %12s" % (
+        "scenario", "records", "pages", "records/s", "pages/s", "us/record",
+    ) + " %12s" % "bytes/record"]
+    for name in sorted(results):
+        result = results[name]
+        bytes_per_record = result["bytes_per_record"]
+        lines.append("%-22s %10d %10d %12.0f %12.1f %12.1f %12s" % (
+            name, result["records"], result["pages"],
+            result["records_per_sec"], result["pages_per_sec"],
+            result["parse_us_per_record"],
+            "-" if bytes_per_record is None else "%.0f" % bytes_per_record,
+        ))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Petfinder client against a fake server.")
+    parser.add_argument(
+        "scenarios", nargs="*", metavar="scenario",
+        help="Scenarios to run (default: all). One of: %s." % ", ".join(
+            sorted(SCENARIOS)))
+    parser.add_argument(
+        "--page-size", type=int, default=100,
+        help="Records per page (the count parameter).")
+    parser.add_argument(
+        "--total", type=int, default=2000,
+        help="Records in each paginated listing.")
+    parser.add_argument(
+        "--lookups", type=int, default=200,
+        help="Calls to make in the single-record scenarios.")
+    parser.add_argument(
+        "--richness", choices=sorted(RICHNESS_LEVELS), default="typical",
+        help="How much is in each pet record.")
+    parser.add_argument(
+        "--latency", type=float, default=0,
+        help="Seconds the server waits before answering each request.")
+    parser.add_argument(
+        "--record-mode", choices=petfinder.PetFinderClient.RECORD_MODES,
+        default="dict")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--prefetch", type=int, default=0)
+    parser.add_argument(
+        "--format", choices=petfinder.PetFinderClient.RESPONSE_FORMATS,
+        default="xml", help="The response format to ask the API for.")
+    parser.add_argument(
+        "--intern", action="store_true",
+        help="Intern records through a petfinder.interning.ValueTable.")
+    parser.add_argument(
+        "--transport", choices=["requests", "urllib3", "replay"],
+        default="requests")
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="Runs per scenario. The fastest is kept.")
+    parser.add_argument(
+        "--save-baseline", metavar="PATH",
+        help="Write the results out as a baseline.")
+    parser.add_argument(
+        "--compare", metavar="PATH",
+        help="Compare the results against a saved baseline.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1,
+        help="Allowed slowdown before --compare fails (default: 0.1).")
+    options = parser.parse_args(argv)
+
+    names = options.scenarios or sorted(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error("Unknown scenario: %s" % name)
+
+    url, server = start_server(
+        total_pets=options.total, total_shelters=options.total,
+        richness=options.richness, latency=options.latency)
+    options.recordings = tempfile.mkdtemp()
+    try:
+        results = dict(
+            (name, run_scenario(url, name, options)) for name in names)
+    finally:
+        server.terminate()
+        shutil.rmtree(options.recordings)
+
+    print(_format_results(results))
+
+    if options.save_baseline:
+        with open(options.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare(
+                results, json.load(baseline_file), options.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print("  " + regression)
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+"""
+An asyncio flavor of the Petfinder API client. Single-record calls are
+awaitables, and the auto-paginating calls are async generators.
+
+This module requires Python 3 and aiohttp_, and is not imported by the
+top-level ``petfinder`` package. Import it explicitly::
+
+    from petfinder.aio import AsyncPetFinderClient
+
+.. _aiohttp: http://aiohttp.readthedocs.org/
+
+Requests are sent through an :py:class:`AiohttpTransport` by default. Any of
+the blocking transports in :py:mod:`petfinder.transport` can be used instead
+by wrapping them in a :py:class:`BlockingTransportAdapter`::
+
+    from petfinder.transport import ReplayTransport
+
+    transport = BlockingTransportAdapter(
+        ReplayTransport("recordings/"), in_executor=False)
+    api = AsyncPetFinderClient(key, secret, transport=transport)
+"""
+
+import asyncio
+import logging
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from petfinder.client import BasePetFinderClient
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.transport import TransportResponse
+
+logger = logging.getLogger(__name__)
+
+
+class AiohttpTransport(object):
+    """
+    Sends requests through an :py:class:`aiohttp.ClientSession`. This is
+    the default for :py:class:`AsyncPetFinderClient`.
+
+    An async transport is any object with ``get(url, params)`` and
+    ``close()`` coroutine methods, where ``get`` returns a response with the
+    whole body read into its ``content`` attribute.
+    """
+
+    def __init__(self, session=None, limit=100, limit_per_host=0,
+                 keep_alive=True):
+        """
+        :keyword aiohttp.ClientSession session: Optionally, a pre-configured
+            session to send all requests through. If omitted, the transport
+            lazily creates and owns its own.
+        :keyword int limit: The total number of simultaneous connections to
+            open. ``0`` means unlimited.
+        :keyword int limit_per_host: The number of simultaneous connections
+            to any single host. ``0`` means unlimited.
+        :keyword bool keep_alive: If ``False``, close the connection after
+            every request instead of re-using it.
+        """
+
+        if session is None and aiohttp is None:
+            raise ImportError(
+                "AsyncPetFinderClient requires aiohttp to be installed.")
+
+        self.session = session
+        # We only close sessions that we created ourselves.
+        self._owns_session = session is None
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+
+    def _get_session(self):
+        """
+        aiohttp sessions must be created from within a running event loop,
+        so we hold off on doing so until the first request.
+
+        :rtype: aiohttp.ClientSession
+        :returns: The session to send requests through.
+        """
+
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                force_close=not self.keep_alive,
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def get(self, url, params):
+        """
+        :param str url: The URL to request.
+        :param dict params: The query string parameters.
+        :rtype: petfinder.transport.TransportResponse
+        """
+
+        # aiohttp is pickier than requests about param values.
+        params = dict((key, str(val)) for key, val in params.items())
+        async with self._get_session().get(url, params=params) as response:
+            content = await response.read()
+            return TransportResponse(content, dict(response.headers))
+
+    async def close(self):
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class BlockingTransportAdapter(object):
+    """
+    Lets :py:class:`AsyncPetFinderClient` use one of the blocking transports
+    in :py:mod:`petfinder.transport`.
+    """
+
+    def __init__(self, transport, in_executor=True):
+        """
+        :param transport: The blocking transport to wrap.
+        :keyword bool in_executor: If ``True``, requests are sent from the
+            event loop's default executor, so they don't hold up the loop.
+            Transports that never block, like
+            :py:class:`petfinder.transport.ReplayTransport`, are faster
+            called directly, with this set to ``False``.
+        """
+
+        self.transport = transport
+        self.in_executor = in_executor
+
+    async def get(self, url, params):
+        if not self.in_executor:
+            return self.transport.get(url, params)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.transport.get, url, params)
+
+    async def close(self):
+        self.transport.close()
+
+
+class AsyncPetFinderClient(BasePetFinderClient):
+    """
+    Asyncio client for the Petfinder API. Has the same methods as
+    :py:class:`petfinder.PetFinderClient`, but they must be awaited (or
+    iterated over with ``async for``, in the case of the paginating calls).
+
+    Use the client as an async context manager, or make sure to await
+    :py:meth:`close` when you are done with it::
+
+        async with AsyncPetFinderClient(api_key, api_secret) as api:
+            record = await api.pet_get(id=23220812)
+            async for pet in api.pet_find(location="29678"):
+                print(pet["name"])
+    """
+
+    def __init__(self, api_key, api_secret, endpoint="http://api.petfinder.com/",
+                 session=None, limit=100, limit_per_host=0, keep_alive=True,
+                 record_mode="dict", transport=None, response_format="xml",
+                 value_table=None):
+        """
+        :param str api_key: Your Petfinder API Key.
+        :param str api_secret: Your Petfinder API Secret.
+        :keyword str endpoint: Optionally, override the endpoint to send
+            requests to.
+        :keyword aiohttp.ClientSession session: Optionally, a pre-configured
+            session to send all requests through. If omitted, the client
+            lazily creates and owns its own.
+        :keyword int limit: The total number of simultaneous connections the
+            client will open. ``0`` means unlimited.
+        :keyword int limit_per_host: The number of simultaneous connections
+            to any single host. ``0`` means unlimited.
+        :keyword bool keep_alive: If ``False``, close the connection after
+            every request instead of re-using it.
+        :keyword str record_mode: ``"dict"`` (the default), ``"compact"``,
+            or ``"lazy"``. See :py:class:`petfinder.client.BasePetFinderClient`.
+        :keyword transport: Optionally, an async transport to send requests
+            through instead of aiohttp. If given, ``session``, ``limit``,
+            ``limit_per_host``, and ``keep_alive`` are ignored.
+        :keyword str response_format: ``"xml"`` (the default) or
+            ``"json"``. See :py:class:`petfinder.client.BasePetFinderClient`.
+        :keyword petfinder.interning.ValueTable value_table: Optionally, a
+            table to intern records through. See
+            :py:class:`petfinder.client.BasePetFinderClient`.
+        """
+
+        super(AsyncPetFinderClient, self).__init__(
+            api_key, api_secret, endpoint, record_mode=record_mode,
+            response_format=response_format, value_table=value_table)
+
+        if transport is None:
+            transport = AiohttpTransport(
+                session=session, limit=limit, limit_per_host=limit_per_host,
+                keep_alive=keep_alive,
+            )
+        self.transport = transport
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the underlying transport, releasing any pooled connections.
+        """
+
+        await self.transport.close()
+
+    async def _do_api_call(self, method, data):
+        """
+        Convenience method to carry out a standard API call against the
+        Petfinder API.
+
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+            This varies based on the method.
+        :raises: A number of :py:exc:`petfinder.exceptions.PetfinderAPIError``
+            sub-classes, depending on what went wrong.
+        :rtype: lxml.etree._Element
+        :returns: The parsed document.
+        """
+
+        url = self._build_url(method)
+        response = await self.transport.get(url, self._build_params(data))
+        return self._parse_response(response.content)
+
+    async def _do_autopaginating_api_call(self, method, kwargs, parser_func):
+        """
+        Async counterpart to
+        :py:meth:`petfinder.PetFinderClient._do_autopaginating_api_call`.
+        Loops through the record sets in the API call until all records have
+        been yielded.
+
+        :param basestring method: The API method on the endpoint.
+        :param dict kwargs: The kwargs from the top-level API method.
+        :param callable parser_func: A callable that is handed the root
+            Element of each page, and returns an iterable of records.
+        :rtype: async generator
+        :returns: Returns an async generator that may be returned by the
+            top-level API method.
+        """
+
+        # Used to determine whether to fail noisily if no results are returned.
+        has_records = False
+
+        while True:
+            try:
+                root = await self._do_api_call(method, kwargs)
+            except RecordDoesNotExistError:
+                if not has_records:
+                    # No records seen yet, this really is empty.
+                    raise
+                # We've seen some records come through. We must have hit the
+                # end of the result set. Finish up silently.
+                return
+
+            records_returned_by_this_loop = False
+            for record in parser_func(root):
+                yield record
+                records_returned_by_this_loop = True
+                has_records = True
+            # Guard against the shelter.getpets empty page bug, same as
+            # the synchronous client.
+            if not records_returned_by_this_loop:
+                return
+
+            last_offset = self._get_next_offset(root)
+            if last_offset == kwargs.get("offset"):
+                # We'd just be requesting the same page again.
+                return
+            # A new dict for each page. The caller's is never touched.
+            kwargs = dict(kwargs, offset=last_offset)
+
+    async def breed_list(self, **kwargs):
+        """
+        breed.list wrapper. Returns a list of breed name strings.
+
+        :rtype: list
+        :returns: A list of breed names.
+        """
+
+        root = await self._do_api_call("breed.list", kwargs)
+
+        return self._parse_breed_list(root)
+
+    async def pet_get(self, **kwargs):
+        """
+        pet.get wrapper. Returns a record dict for the requested pet.
+
+        :rtype: dict
+        :returns: The pet's record dict.
+        """
+
+        root = await self._do_api_call("pet.get", kwargs)
+
+        return self._parse_pet_record(root.find("pet"))
+
+    async def pet_getrandom(self, **kwargs):
+        """
+        pet.getRandom wrapper. Returns a record dict or Petfinder ID
+        for a random pet.
+
+        :rtype: dict or str
+        :returns: A dict of pet data if ``output`` is ``'basic'`` or ``'full'``,
+            and a string if ``output`` is ``'id'``.
+        """
+
+        root = await self._do_api_call("pet.getRandom", kwargs)
+
+        return self._parse_pet_getrandom(root, kwargs)
+
+    def pet_find(self, **kwargs):
+        """
+        pet.find wrapper. Returns an async generator of pet record dicts
+        matching your search criteria.
+
+        :rtype: async generator
+        :returns: An async generator of pet record dicts.
+        :raises: :py:exc:`petfinder.exceptions.LimitExceeded` once
+            you have reached the maximum number of records your credentials
+            allow you to receive.
+        """
+
+        return self._do_autopaginating_api_call(
+            "pet.find", kwargs, self._iter_pet_records
+        )
+
+    def pet_find_batches(self, **kwargs):
+        """
+        Like :py:meth:`pet_find`, but yields a columnar batch for each page
+        of results. See :py:mod:`petfinder.columnar`.
+
+        :rtype: async generator
+        :returns: An async generator of batch dicts, one per page.
+        """
+
+        return self._do_autopaginating_api_call(
+            "pet.find", kwargs, self._iter_pet_batches
+        )
+
+    def shelter_find(self, **kwargs):
+        """
+        shelter.find wrapper. Returns an async generator of shelter record
+        dicts matching your search criteria.
+
+        :rtype: async generator
+        :returns: An async generator of shelter record dicts.
+        :raises: :py:exc:`petfinder.exceptions.LimitExceeded` once you have
+            reached the maximum number of records your credentials allow you
+            to receive.
+        """
+
+        return self._do_autopaginating_api_call(
+            "shelter.find", kwargs, self._iter_shelter_records
+        )
+
+    async def shelter_get(self, **kwargs):
+        """
+        shelter.get wrapper. Given a shelter ID, retrieve its details in
+        dict form.
+
+        :rtype: dict
+        :returns: The shelter's details.
+        """
+
+        root = await self._do_api_call("shelter.get", kwargs)
+
+        return self._parse_shelter_record(root.find("shelter"))
+
+    def shelter_getpets(self, **kwargs):
+        """
+        shelter.getPets wrapper. Given a shelter ID, retrieve either pet IDs
+        (if ``output`` is ``'id'``), or pet record dicts (if ``output`` is
+        ``'full'`` or ``'basic'``).
+
+        :rtype: async generator
+        :returns: Either an async generator of pet ID strings or pet record
+            dicts, depending on the value of the ``output`` keyword.
+        :raises: :py:exc:`petfinder.exceptions.LimitExceeded` once you have
+            reached the maximum number of records your credentials allow you
+            to receive.
+        """
+
+        return self._do_autopaginating_api_call(
+            "shelter.getPets", kwargs, self._get_shelter_getpets_parser(kwargs)
+        )
+
+    def shelter_getpets_batches(self, **kwargs):
+        """
+        Like :py:meth:`shelter_getpets`, but yields a columnar batch for
+        each page of results. See :py:mod:`petfinder.columnar`.
+
+        :rtype: async generator
+        :returns: An async generator of batch dicts, one per page.
+        """
+
+        return self._do_autopaginating_api_call(
+            "shelter.getPets", kwargs,
+            self._get_shelter_getpets_batch_parser(kwargs)
+        )
+
+    async def shelter_listbybreed(self, **kwargs):
+        """
+        shelter.listByBreed wrapper. Given a breed and an animal type, list
+        the shelter IDs with pets of said breed.
+
+        :rtype: async generator
+        :returns: An async generator of shelter IDs that have breed matches.
+        """
+
+        root = await self._do_api_call("shelter.listByBreed", kwargs)
+
+        for shelter_id in self._iter_shelter_ids(root):
+            yield shelter_id
@@ -0,0 +1,235 @@
+"""
+An in-memory index of which shelters have which breeds. Answering "which
+shelters have a Beagle?" normally takes a ``shelter_listbybreed`` call for
+every breed you care about, one after another. :py:class:`BreedIndex` makes
+those calls from a pool of worker threads, once, and answers from memory
+from then on.
+
+Example::
+
+    from petfinder.breeds import BreedIndex
+
+    index = BreedIndex(api)
+    index.build("dog")
+    index.get_shelters("dog", "beagle")
+    index.find_shelters("dog", ["Beagle", "  basset HOUND"])
+
+    # Later on, re-fetch anything more than an hour old.
+    for breed, (added, removed) in index.refresh("dog", max_age=3600).items():
+        print(breed, added, removed)
+
+Breed names are matched case-insensitively, ignoring extra whitespace.
+"""
+
+import logging
+import threading
+import time
+
+from petfinder.concurrency import map_concurrently
+from petfinder.exceptions import RecordDoesNotExistError
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_breed(name):
+    """
+    :param str name: A breed name, as typed by somebody.
+    :rtype: str
+    :returns: The name in lower case, with runs of whitespace collapsed.
+    """
+
+    return " ".join(name.split()).lower()
+
+
+class BreedIndex(object):
+    """
+    Caches each animal's breed list, and maps each breed to the shelters
+    that have one. Thread-safe.
+    """
+
+    def __init__(self, client, breeds_ttl=60 * 60 * 24, max_workers=8):
+        """
+        :param petfinder.PetFinderClient client: The client to make calls
+            with.
+        :keyword int breeds_ttl: The number of seconds to hang on to each
+            animal's breed list for.
+        :keyword int max_workers: The number of ``shelter_listbybreed`` calls
+            to make at once.
+        """
+
+        self.client = client
+        self.breeds_ttl = breeds_ttl
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        # animal -> (expiry time, {normalized name: breed name}).
+        self._breeds = {}
+        # (animal, breed name) -> (time fetched, frozenset of shelter IDs).
+        self._shelters = {}
+
+    def _get_breed_names(self, animal):
+        """
+        :rtype: dict
+        :returns: The animal's normalized breed names, mapped to the names
+            the API uses. Fetched if we don't have them, or they've expired.
+        """
+
+        with self._lock:
+            cached = self._breeds.get(animal)
+        if cached is not None and cached[0] > time.time():
+            return cached[1]
+
+        names = dict(
+            (normalize_breed(breed), breed)
+            for breed in self.client.breed_list(animal=animal))
+        with self._lock:
+            self._breeds[animal] = (time.time() + self.breeds_ttl, names)
+        return names
+
+    def get_breeds(self, animal):
+        """
+        :param str animal: The type of animal (``"dog"``, ``"cat"``, etc.).
+        :rtype: list
+        :returns: The animal's breed names, sorted.
+        """
+
+        return sorted(self._get_breed_names(animal).values())
+
+    def lookup_breed(self, animal, name):
+        """
+        :param str animal: The type of animal.
+        :param str name: A breed name, in any case.
+        :rtype: str or None
+        :returns: The breed's name as the API spells it, or ``None`` if the
+            animal has no such breed.
+        """
+
+        return self._get_breed_names(animal).get(normalize_breed(name))
+
+    def _resolve_breeds(self, animal, breeds):
+        """
+        :param iterable breeds: Breed names in any case, or ``None`` for all
+            of the animal's breeds.
+        :rtype: list
+        :returns: The breed names as the API spells them. Unknown breeds are
+            dropped.
+        """
+
+        names = self._get_breed_names(animal)
+        if breeds is None:
+            return sorted(names.values())
+        resolved = []
+        for breed in breeds:
+            name = names.get(normalize_breed(breed))
+            if name is None:
+                logger.debug("No %s breed named %r", animal, breed)
+            else:
+                resolved.append(name)
+        return resolved
+
+    def _fetch_shelters(self, animal, breeds):
+        """
+        Fans ``shelter_listbybreed`` calls for each of the given breeds out
+        over the worker threads, and stores the results.
+
+        :param list breeds: Breed names, as the API spells them.
+        :rtype: dict
+        :returns: The breeds whose shelters changed, mapped to
+            ``(added, removed)`` tuples of shelter ID sets.
+        """
+
+        def fetch(breed):
+            try:
+                return frozenset(self.client.shelter_listbybreed(
+                    animal=animal, breed=breed))
+            except RecordDoesNotExistError:
+                return frozenset()
+
+        changes = {}
+        for breed, future in map_concurrently(
+            fetch, breeds, max_workers=self.max_workers, ordered=False,
+        ):
+            shelter_ids = future.result()
+            key = (animal, breed)
+            with self._lock:
+                previous = self._shelters.get(key, (None, frozenset()))[1]
+                self._shelters[key] = (time.time(), shelter_ids)
+            if shelter_ids != previous:
+                changes[breed] = (shelter_ids - previous, previous - shelter_ids)
+        return changes
+
+    def build(self, animal, breeds=None):
+        """
+        Indexes the shelters for each of the animal's breeds, replacing
+        anything already there.
+
+        :param str animal: The type of animal.
+        :keyword iterable breeds: Optionally, just the breeds to index.
+            Names are matched case-insensitively. Defaults to every breed.
+        :rtype: dict
+        :returns: The breeds whose shelters changed, mapped to
+            ``(added, removed)`` tuples of shelter ID sets.
+        """
+
+        return self._fetch_shelters(animal, self._resolve_breeds(animal, breeds))
+
+    def refresh(self, animal, max_age=None, breeds=None):
+        """
+        Brings the index up to date, without re-fetching anything that is
+        still fresh. The breed list is re-fetched if it has expired. Breeds
+        that have been dropped from it are dropped from the index.
+
+        :param str animal: The type of animal.
+        :keyword int max_age: Re-fetch the shelters for breeds indexed more
+            than this many seconds ago. By default, only breeds that haven't
+            been indexed yet are fetched.
+        :keyword iterable breeds: Optionally, just the breeds to refresh.
+            Defaults to every breed.
+        :rtype: dict
+        :returns: The breeds whose shelters changed, mapped to
+            ``(added, removed)`` tuples of shelter ID sets.
+        """
+
+        names = self._resolve_breeds(animal, breeds)
+        current = set(self._get_breed_names(animal).values())
+        now = time.time()
+        changes = {}
+        stale = []
+        with self._lock:
+            for key in list(self._shelters):
+                if key[0] == animal and key[1] not in current:
+                    _, shelter_ids = self._shelters.pop(key)
+                    changes[key[1]] = (frozenset(), shelter_ids)
+            for breed in names:
+                entry = self._shelters.get((animal, breed))
+                if entry is None or (
+                        max_age is not None and now - entry[0] > max_age):
+                    stale.append(breed)
+        changes.update(self._fetch_shelters(animal, stale))
+        return changes
+
+    def get_shelters(self, animal, breed):
+        """
+        :param str animal: The type of animal.
+        :param str breed: A breed name, in any case.
+        :rtype: frozenset
+        :returns: The IDs of the shelters with the breed. Empty if the breed
+            is unknown, or hasn't been indexed.
+        """
+
+        name = self.lookup_breed(animal, breed)
+        with self._lock:
+            entry = self._shelters.get((animal, name))
+        return entry[1] if entry is not None else frozenset()
+
+    def find_shelters(self, animal, breeds):
+        """
+        :param str animal: The type of animal.
+        :param iterable breeds: Breed names, in any case.
+        :rtype: frozenset
+        :returns: The IDs of the shelters with any of the breeds.
+        """
+
+        shelter_ids = frozenset()
+        for breed in breeds:
+            shelter_ids |= self.get_shelters(animal, breed)
+        return shelter_ids
@@ -0,0 +1,284 @@
+"""
+Response caches for :py:class:`petfinder.PetFinderClient`. Pass an instance
+of one of these to the client's ``cache`` keyword to avoid hitting the
+network for records you've recently looked up.
+
+Caches store raw response bodies, keyed on the API method plus its
+normalized parameters, so any cache can be used regardless of how the
+client is configured to build records.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# How long (in seconds) to hang on to responses for each of the cacheable
+# API methods, if the client isn't told otherwise. Only methods listed
+# here are cached.
+DEFAULT_CACHE_TTLS = {
+    # Breed lists almost never change.
+    "breed.list": 60 * 60 * 24,
+    "pet.get": 60 * 60,
+    "shelter.get": 60 * 60,
+    # Only cached with output=id. Kept short, since it's supposed to
+    # be random.
+    "pet.getRandom": 60,
+}
+
+
+def make_cache_key(method, params):
+    """
+    Builds a cache key from an API method and its parameters. Parameters
+    are normalized, so ``id=5`` and ``id="5"`` share a key. Credentials and
+    ``None`` values are left out.
+
+    :param str method: The API method name.
+    :param dict params: The parameters for the API call.
+    :rtype: str
+    :returns: The cache key.
+    """
+
+    parts = []
+    for key in sorted(params):
+        val = params[key]
+        if val is None or key in ("key", "token"):
+            continue
+        parts.append("%s=%s" % (key, val))
+    return "%s?%s" % (method, "&".join(parts))
+
+
+class BaseCache(object):
+    """
+    Base class for all response caches. Sub-classes need to implement
+    :py:meth:`_get`, :py:meth:`_set`, :py:meth:`clear`, and ``__len__``.
+    Hit/miss tracking is handled here.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param str key: The cache key to look up.
+        :rtype: bytes or None
+        :returns: The cached response body, or ``None`` if it isn't cached
+            (or has expired).
+        """
+
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        """
+        :param str key: The cache key to store the value under.
+        :param bytes value: The response body to cache.
+        :param float ttl: How long (in seconds) the value is good for.
+        """
+
+        self._set(key, value, time.time() + ttl)
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value, expires):
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Removes everything from the cache. Stats are left alone.
+        """
+
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        :rtype: dict
+        :returns: A dict with ``hits``, ``misses``, ``evictions``, and
+            ``size`` keys.
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+
+class MemoryCache(BaseCache):
+    """
+    In-process LRU cache. Once ``max_entries`` is reached, the least
+    recently used response is evicted to make room. Thread-safe.
+    """
+
+    def __init__(self, max_entries=1024):
+        """
+        :keyword int max_entries: The maximum number of responses to hold.
+        """
+
+        super(MemoryCache, self).__init__()
+        self.max_entries = max_entries
+        # key -> (expires, value), in least to most recently used order.
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                return None
+            # Move it to the most recently used end.
+            self._entries[key] = entry
+            return value
+
+    def _set(self, key, value, expires):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """
+    On-disk cache, backed by a SQLite database. Survives restarts, and may
+    be shared by multiple processes on the same host. Once ``max_entries``
+    is reached, the least recently used responses are evicted.
+
+    Rather than counting the table's rows on every write, each instance
+    keeps a running count, and only re-counts every
+    :py:attr:`RECOUNT_INTERVAL` new entries. So when several processes
+    share a database, it can run over ``max_entries`` by whatever the
+    others have added since then.
+    """
+
+    #: The number of new entries between re-counts of the table.
+    RECOUNT_INTERVAL = 1000
+
+    def __init__(self, path, max_entries=100000):
+        """
+        :param str path: Path to the SQLite database file. It is created if
+            it doesn't exist.
+        :keyword int max_entries: The maximum number of responses to hold.
+        """
+
+        super(SQLiteCache, self).__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS petfinder_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS petfinder_cache_accessed "
+                "ON petfinder_cache (accessed)"
+            )
+        # Our idea of the number of entries, and the number of new entries
+        # since we last checked.
+        self._size = self._count()
+        self._added = 0
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM petfinder_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            with self._conn:
+                if expires < now:
+                    cursor = self._conn.execute(
+                        "DELETE FROM petfinder_cache WHERE key = ?", (key,))
+                    self._size -= cursor.rowcount
+                    return None
+                self._conn.execute(
+                    "UPDATE petfinder_cache SET accessed = ? WHERE key = ?",
+                    (now, key)
+                )
+            return bytes(value)
+
+    def _set(self, key, value, expires):
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO petfinder_cache "
+                    "(key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                    (key, sqlite3.Binary(value), expires, now)
+                )
+                if not cursor.rowcount:
+                    # Already there. Replacing it can't overflow anything.
+                    self._conn.execute(
+                        "UPDATE petfinder_cache SET value = ?, expires = ?, "
+                        "accessed = ? WHERE key = ?",
+                        (sqlite3.Binary(value), expires, now, key)
+                    )
+                    return
+                self._size += 1
+                self._added += 1
+                if self._added >= self.RECOUNT_INTERVAL:
+                    # Catch up with anybody else sharing the database.
+                    self._size = self._count()
+                    self._added = 0
+                overflow = self._size - self.max_entries
+                if overflow > 0:
+                    cursor = self._conn.execute(
+                        "DELETE FROM petfinder_cache WHERE key IN ("
+                        "SELECT key FROM petfinder_cache "
+                        "ORDER BY accessed LIMIT ?)", (overflow,)
+                    )
+                    self._size -= cursor.rowcount
+                    self.evictions += cursor.rowcount
+
+    def _count(self):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM petfinder_cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM petfinder_cache")
+            self._size = 0
+            self._added = 0
+
+    def __len__(self):
+        with self._lock:
+            self._size = self._count()
+            return self._size
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+
+        self._conn.close()
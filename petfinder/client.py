@@ -8,32 +8,147 @@ http://www.petfinder.com/developers
 
 import logging
 import datetime
+import threading
+import time
+try:
+    import queue
+except ImportError:
+    # Python 2.
+    import Queue as queue
 import requests
+from requests.adapters import HTTPAdapter
 import pytz
 from lxml import etree
+from petfinder import jsonformat
+from petfinder.columnar import PetBatchBuilder, build_id_batch
+from petfinder.cache import DEFAULT_CACHE_TTLS, make_cache_key
+from concurrent import futures
+from petfinder.concurrency import (
+    map_concurrently, merge_iterables, put_until_stopped)
+from petfinder.records import LazyPet, Pet, Shelter
+from petfinder.singleflight import SingleFlight
+from petfinder.transport import RequestsTransport
 from petfinder.exceptions import _get_exception_class_from_status_code, RecordDoesNotExistError
 
 logger = logging.getLogger(__name__)
 
-class PetFinderClient(object):
-    """
-    Simple client for the Petfinder API. You'll want to pull your API details
-    from http://www.petfinder.com/developers/api-key and instantiate this
-    class with said credentials.
+#: The format of every timestamp the API sends (always UTC).
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
-    Refer to http://www.petfinder.com/developers/api-docs for the required
-    kwargs for each method. It is safe to ignore the ``key`` argument, as this
-    client handles setting that for you.
+# Single-record API methods, which may have hedged requests sent.
+HEDGEABLE_METHODS = frozenset([
+    "pet.get", "shelter.get", "breed.list", "shelter.listByBreed",
+])
+
+# These <pet> fields can just have their keys and text values copied
+# straight over to the record.
+STRAIGHT_COPY_PET_FIELDS = frozenset([
+    "id", "shelterId", "shelterPetId", "name", "animal", "mix",
+    "age", "sex", "size", "description", "status", "lastUpdate",
+])
+
+
+def _get_element_text(node):
+    return node.text
+
+
+def _copy_pet_text(record, node):
+    record[node.tag] = node.text
+
+
+def _copy_pet_breeds(record, node):
+    # Pets can be of multiple breeds. Stuff the text of each <breed> tag
+    # (breed names) into the record.
+    record["breeds"] = [breed.text for breed in node.iterchildren("breed")]
+
+
+def _copy_pet_photos(record, node):
+    # We'll deviate slightly from the XML format here, and simply append
+    # each <media><photos><photo> entry to the record's "photo" key.
+    photos = record["photos"]
+    for photos_node in node.iterchildren("photos"):
+        for photo in photos_node.iterchildren("photo"):
+            photos.append({
+                "id": photo.get("id"),
+                "size": photo.get("size"),
+                "url": photo.text,
+            })
+
+
+def _copy_pet_options(record, node):
+    # Has shots, no cats, altered, etc.
+    record["options"] = [option.text for option in node.iterchildren("option")]
+
+
+def _copy_pet_contact(record, node):
+    # <contact> tag has some sub-tags that can be straight copied over.
+    record["contact"] = dict((field.tag, field.text) for field in node)
+
+
+# Maps <pet> sub-tags to the function that copies them into the record.
+# Anything not in here is skipped.
+PET_TAG_HANDLERS = {
+    "breeds": _copy_pet_breeds,
+    "media": _copy_pet_photos,
+    "options": _copy_pet_options,
+    "contact": _copy_pet_contact,
+}
+for _field in STRAIGHT_COPY_PET_FIELDS:
+    PET_TAG_HANDLERS[_field] = _copy_pet_text
+del _field
+
+# The number of keys in a pet record with none of its fields missing.
+PET_RECORD_FULL_LENGTH = len(STRAIGHT_COPY_PET_FIELDS) + 4
+
+class BasePetFinderClient(object):
+    """
+    Bits and pieces shared between :py:class:`PetFinderClient` and
+    :py:class:`petfinder.aio.AsyncPetFinderClient`: credentials, request
+    building, response parsing, and record parsing. The sub-classes are
+    responsible for actually sending requests.
     """
 
-    def __init__(self, api_key, api_secret, endpoint="http://api.petfinder.com/"):
+    # The forms records can be built in. See the ``record_mode`` keyword.
+    RECORD_MODES = ("dict", "compact", "lazy")
+    # See the ``response_format`` keyword.
+    RESPONSE_FORMATS = ("xml", "json")
+
+    def __init__(self, api_key, api_secret, endpoint="http://api.petfinder.com/",
+                 record_mode="dict", response_format="xml", value_table=None):
         """
         :param str api_key: Your Petfinder API Key.
         :param str api_secret: Your Petfinder API Secret.
         :keyword str endpoint: Optionally, override the endpoint to send
             requests to.
+        :keyword str record_mode: ``"dict"`` (the default) to return pet and
+            shelter records as dicts, ``"compact"`` to return them as the
+            more memory efficient :py:class:`petfinder.records.Pet` and
+            :py:class:`petfinder.records.Shelter` objects, or ``"lazy"`` to
+            return pets as :py:class:`petfinder.records.LazyPet` objects,
+            which only decode fields as they are read. Shelters are dicts
+            in lazy mode.
+        :keyword str response_format: ``"xml"`` (the default) or ``"json"``
+            to have the API send JSON instead, which is often quicker to
+            decode. Records come out the same either way. ``"lazy"`` records
+            need XML. See :py:mod:`petfinder.jsonformat`.
+        :keyword petfinder.interning.ValueTable value_table: Optionally, a
+            table to intern the keys and categorical values (animal, breeds,
+            options, states, and so on) of every record through, so that
+            records share one copy of each instead of holding their own.
+            Doesn't apply to ``"lazy"`` records. See
+            :py:mod:`petfinder.interning`.
         """
 
+        if record_mode not in self.RECORD_MODES:
+            raise ValueError("Invalid record_mode: %s" % record_mode)
+        if response_format not in self.RESPONSE_FORMATS:
+            raise ValueError("Invalid response_format: %s" % response_format)
+        if record_mode == "lazy" and response_format == "json":
+            raise ValueError("Lazy records can't be built from JSON.")
+        self.record_mode = record_mode
+        self.response_format = response_format
+        self.value_table = value_table
+
         self.api_key = api_key
         self.api_secret = api_secret
         # This is currently not required, but it's here for when/if they ever
@@ -45,98 +160,104 @@ class PetFinderClient(object):
         if not self.endpoint.endswith("/"):
             self.endpoint += "/"
 
-    def _do_api_call(self, method, data):
+    def _build_url(self, method):
         """
-        Convenience method to carry out a standard API call against the
-        Petfinder API.
-
         :param basestring method: The API method name to call.
+        :rtype: str
+        :returns: The full URL+path for the given API method.
+        """
+
+        return "%s%s" % (self.endpoint, method)
+
+    def _build_params(self, data):
+        """
+        Assembles the query parameters for an API call, without modifying
+        the caller's dict.
+
         :param dict data: Key/value parameters to send to the API method.
-            This varies based on the method.
-        :raises: A number of :py:exc:`petfinder.exceptions.PetfinderAPIError``
-            sub-classes, depending on what went wrong.
-        :rtype: lxml.etree._Element
-        :returns: The parsed document.
+        :rtype: dict
+        :returns: A new dict with the standard, required args added, and
+            any ``None`` values dropped.
         """
 
+        params = dict(data)
         # Developer API keys, auth tokens, and other standard, required args.
-        data.update({
+        params.update({
             "key": self.api_key,
             # No API methods currently use this, but we're ready for it,
             # should that change.
             "token": self.api_auth_token,
         })
+        if self.response_format == "json":
+            params["format"] = "json"
+        return dict(
+            (key, val) for key, val in params.items() if val is not None
+        )
 
-        # Ends up being a full URL+path.
-        url = "%s%s" % (self.endpoint, method)
-        # Bombs away!
-        response = requests.get(url, params=data)
+    def _parse_response(self, content):
+        """
+        Parses a raw response body, and raises the appropriate exception if
+        the API reported an error.
+
+        :param bytes content: The response body.
+        :raises: A number of :py:exc:`petfinder.exceptions.PetfinderAPIError``
+            sub-classes, depending on what went wrong.
+        :rtype: lxml.etree._Element
+        :returns: The parsed document. For JSON responses, a
+            :py:class:`petfinder.jsonformat.JSONDocument`.
+        """
+
+        if self.response_format == "json":
+            root = jsonformat.parse_document(content)
+        else:
+            # Parse and return an ElementTree instance containing the
+            # document.
+            root = etree.fromstring(content)
+        self._check_status(root)
 
-        # Parse and return an ElementTree instance containing the document.
-        root = etree.fromstring(response.content)
+        return root
+
+    def _check_status(self, root):
+        """
+        Looks at the status in the response header, and raises the
+        appropriate exception if the API reported an error.
+
+        :param lxml.etree._Element root: The root Element in the response.
+            Only the <header> needs to have been parsed.
+        :raises: A number of :py:exc:`petfinder.exceptions.PetfinderAPIError``
+            sub-classes, depending on what went wrong.
+        """
+
+        if self.response_format == "json":
+            get_text = jsonformat.get_text
+        else:
+            get_text = _get_element_text
 
         # If this is anything but '100', it's an error.
-        status_code = root.find("header/status/code").text
+        status_code = get_text(root.find("header/status/code"))
         # If this comes back as non-None, we know we've got problems.
         exc_class = _get_exception_class_from_status_code(status_code)
         if exc_class:
             # Sheet, sheet, errar! Raise the appropriate error, and pass
             # the accompanying error message as the exception message.
-            error_message = root.find("header/status/message").text
+            error_message = get_text(root.find("header/status/message"))
             #noinspection PyCallingNonCallable
             raise exc_class(error_message)
 
-        return root
-
-    def _do_autopaginating_api_call(self, method, kwargs, parser_func):
+    def _get_next_offset(self, root):
         """
-        Given an API method, the arguments passed to it, and a function to
-        hand parsing off to, loop through the record sets in the API call
-        until all records have been yielded.
-
-        This is mostly done this way to reduce duplication through the various
-        API methods.
-
-        :param basestring method: The API method on the endpoint.
-        :param dict kwargs: The kwargs from the top-level API method.
-        :param callable parser_func: A callable that is used for parsing the
-            output from the API call.
-        :rtype: generator
-        :returns: Returns a generator that may be returned by the top-level
-            API method.
+        :param lxml.etree._Element root: The root Element in a paginated
+            response.
+        :rtype: str
+        :returns: The offset to start the next page of results at.
         """
-        # Used to determine whether to fail noisily if no results are returned.
-        has_records = {"has_records": False}
-
-        while True:
-            try:
-                root = self._do_api_call(method, kwargs)
-            except RecordDoesNotExistError:
-                if not has_records["has_records"]:
-                    # No records seen yet, this really is empty.
-                    raise
-                    # We've seen some records come through. We must have hit the
-                # end of the result set. Finish up silently.
-                return
-
-            # This is used to track whether this go around the call->parse
-            # loop yielded any records.
-            records_returned_by_this_loop = False
-            for record in parser_func(root, has_records):
-                yield record
-                # We saw a record, mark our tracker accordingly.
-                records_returned_by_this_loop = True
-                # There is a really fun bug in the Petfinder API with
-            # shelter.getpets where an offset is returned with no pets,
-            # causing an infinite loop.
-            if not records_returned_by_this_loop:
-                return
 
-            # This will determine at what offset we start the next query.
-            last_offset = root.find("lastOffset").text
-            kwargs["offset"] = last_offset
+        if self.response_format == "json":
+            return jsonformat.get_text(root.find("lastOffset"))
+        return root.find("lastOffset").text
 
-    def _parse_datetime_str(self, dtime_str):
+    @staticmethod
+    def _parse_datetime_str(dtime_str):
         """
         Given a standard datetime string (as seen throughout the Petfinder API),
         spit out the corresponding UTC datetime instance.
@@ -146,9 +267,24 @@ class PetFinderClient(object):
         :returns: The parsed datetime.
         """
 
+        # The API always sends these in the same fixed-width format, so
+        # slicing out the parts is much quicker than strptime.
+        if (len(dtime_str) == 20 and dtime_str[4] == "-" and
+                dtime_str[10] == "T" and dtime_str[19] == "Z"):
+            try:
+                return datetime.datetime(
+                    int(dtime_str[0:4]), int(dtime_str[5:7]),
+                    int(dtime_str[8:10]), int(dtime_str[11:13]),
+                    int(dtime_str[14:16]), int(dtime_str[17:19]),
+                    tzinfo=pytz.utc,
+                )
+            except ValueError:
+                # Let strptime sort it out (and raise a proper error).
+                pass
+
         return datetime.datetime.strptime(
             dtime_str,
-            "%Y-%m-%dT%H:%M:%SZ"
+            TIMESTAMP_FORMAT
         ).replace(tzinfo=pytz.utc)
 
     def _parse_pet_record(self, root):
@@ -156,78 +292,1039 @@ class PetFinderClient(object):
         Given a <pet> Element from a pet.get or pet.getRandom response, pluck
         out the pet record.
 
+        This is done in a single pass over the <pet> Element's children,
+        handing each one off to its handler in ``PET_TAG_HANDLERS``.
+
         :param lxml.etree._Element root: A <pet> tag Element.
         :rtype: dict
         :returns: An assembled pet record.
         """
-        record = {
-            "breeds": [],
-            "photos": [],
-            "options": [],
-            "contact": {},
-        }
-
-        # These fields can just have their keys and text values copied
-        # straight over to the dict record.
-        straight_copy_fields = [
-            "id", "shelterId", "shelterPetId", "name", "animal", "mix",
-            "age", "sex", "size", "description", "status", "lastUpdate",
-        ]
-
-        for field in straight_copy_fields:
-            # For each field, just take the tag name and the text value to
-            # copy to the record as key/val.
-            node = root.find(field)
-            if node is None:
-                print("SKIPPING %s" % field)
-                continue
-            record[field] = node.text
 
-        # Pets can be of multiple breeds. Find all of the <breed> tags and
-        # stuff their text (breed names) into the record.
-        for breed in root.findall("breeds/breed"):
-            record["breeds"].append(breed.text)
+        if self.record_mode == "lazy":
+            return LazyPet(root, self)
 
-        # We'll deviate slightly from the XML format here, and simply append
-        # each photo entry to the record's "photo" key.
-        for photo in root.findall("media/photos/photo"):
-            photo = {
-                "id": photo.get("id"),
-                "size": photo.get("size"),
-                "url": photo.text,
+        if self.response_format == "json":
+            record = jsonformat.build_pet_record(root, STRAIGHT_COPY_PET_FIELDS)
+        else:
+            record = {
+                "breeds": [],
+                "photos": [],
+                "options": [],
+                "contact": {},
             }
-            record["photos"].append(photo)
 
-        # Has shots, no cats, altered, etc.
-        for option in root.findall("options/option"):
-            record["options"].append(option.text)
+            handlers = PET_TAG_HANDLERS
+            for node in root:
+                handler = handlers.get(node.tag)
+                if handler is not None:
+                    handler(record, node)
 
-        # <contact> tag has some sub-tags that can be straight copied over.
-        contact = root.find("contact")
-        if contact is not None:
-            for field in contact:
-                record["contact"][field.tag] = field.text
+        if len(record) < PET_RECORD_FULL_LENGTH:
+            logger.debug(
+                "Pet %s is missing fields: %s", record.get("id"),
+                ", ".join(sorted(STRAIGHT_COPY_PET_FIELDS.difference(record))),
+            )
 
         # Parse lastUpdate so we have a useable datetime.datime object.
-        record["lastUpdate"] = self._parse_datetime_str(record["lastUpdate"])
+        if "lastUpdate" in record:
+            record["lastUpdate"] = self._parse_datetime_str(record["lastUpdate"])
+
+        if self.value_table is not None:
+            record = self.value_table.intern_pet_record(record)
 
+        if self.record_mode == "compact":
+            return Pet.from_dict(record)
         return record
 
-    def breed_list(self, **kwargs):
+    def _parse_shelter_record(self, root):
+        """
+        Given a <shelter> Element, pluck out the shelter record.
+
+        :param lxml.etree._Element root: A <shelter> tag Element.
+        :rtype: dict
+        :returns: An assembled shelter record.
         """
-        breed.list wrapper. Returns a list of breed name strings.
 
+        if self.response_format == "json":
+            record = jsonformat.build_shelter_record(root)
+        else:
+            record = {}
+            for field in root:
+                record[field.tag] = field.text
+
+        if self.value_table is not None:
+            record = self.value_table.intern_shelter_record(record)
+
+        if self.record_mode == "compact":
+            return Shelter.from_dict(record)
+        return record
+
+    def _parse_breed_list(self, root):
+        """
+        :param lxml.etree._Element root: The root Element in a breed.list
+            response.
         :rtype: list
         :returns: A list of breed names.
         """
 
-        root = self._do_api_call("breed.list", kwargs)
+        if self.response_format == "json":
+            return [
+                jsonformat.get_text(breed)
+                for breed in root.findall("breeds/breed")
+            ]
 
         breeds = []
         for breed in root.find("breeds"):
             breeds.append(breed.text)
         return breeds
 
+    def _parse_pet_getrandom(self, root, kwargs):
+        """
+        :param lxml.etree._Element root: The root Element in a pet.getRandom
+            response.
+        :param dict kwargs: The kwargs from the top-level API method.
+        :rtype: dict or str
+        :returns: A pet record or a pet ID, depending on ``output``.
+        """
+
+        output_brevity = kwargs.get("output", "id")
+
+        if output_brevity == "id":
+            if self.response_format == "json":
+                return jsonformat.get_text(root.find("petIds/id"))
+            return root.find("petIds/id").text
+        else:
+            return self._parse_pet_record(root.find("pet"))
+
+    def _iter_pet_records(self, root):
+        """
+        Page parser for responses with a list of <pet> records.
+
+        :param lxml.etree._Element root: The root Element in the response.
+        :rtype: generator
+        :returns: A generator of pet record dicts.
+        """
+
+        for pet in root.findall("pets/pet"):
+            yield self._parse_pet_record(pet)
+
+    def _iter_pet_ids(self, root):
+        """
+        Page parser for responses with a list of pet IDs (output=id).
+
+        :param lxml.etree._Element root: The root Element in the response.
+        :rtype: generator
+        :returns: A generator of pet ID strings.
+        """
+
+        if self.response_format == "json":
+            get_text = jsonformat.get_text
+        else:
+            get_text = _get_element_text
+
+        for pet_id in root.findall("petIds/id"):
+            yield get_text(pet_id)
+
+    def _iter_shelter_records(self, root):
+        """
+        Page parser for responses with a list of <shelter> records.
+
+        :param lxml.etree._Element root: The root Element in the response.
+        :rtype: generator
+        :returns: A generator of shelter record dicts.
+        """
+
+        for shelter in root.findall("shelters/shelter"):
+            yield self._parse_shelter_record(shelter)
+
+    def _iter_shelter_ids(self, root):
+        """
+        Parser for responses with a list of shelter IDs.
+
+        :param lxml.etree._Element root: The root Element in the response.
+        :rtype: generator
+        :returns: A generator of shelter ID strings.
+        """
+
+        if self.response_format == "json":
+            get_text = jsonformat.get_text
+        else:
+            get_text = _get_element_text
+
+        for shelter_id in root.findall("shelterIds/id"):
+            yield get_text(shelter_id)
+
+    def _get_shelter_getpets_parser(self, kwargs):
+        """
+        Depending on the output value, select the correct page parser for
+        shelter.getPets.
+
+        :param dict kwargs: The kwargs from the top-level API method.
+        :rtype: callable
+        """
+
+        if kwargs.get("output", "id") == "id":
+            return self._iter_pet_ids
+        return self._iter_pet_records
+
+    def _iter_pet_batches(self, root):
+        """
+        Page parser for responses with a list of <pet> records, building a
+        single columnar batch from the whole page.
+
+        :param lxml.etree._Element root: The root Element in the response.
+        :rtype: generator
+        :returns: A generator of one batch dict, or none if the page is
+            empty. See :py:mod:`petfinder.columnar`.
+        """
+
+        builder = PetBatchBuilder(self.value_table)
+        if self.response_format == "json":
+            add = builder.add_object
+        else:
+            add = builder.add_element
+        for pet in root.findall("pets/pet"):
+            add(pet)
+        if len(builder):
+            yield builder.build()
+
+    def _iter_pet_id_batches(self, root):
+        """
+        Page parser for responses with a list of pet IDs (output=id),
+        building a single batch from the whole page.
+
+        :param lxml.etree._Element root: The root Element in the response.
+        :rtype: generator
+        :returns: A generator of one batch dict with just an ``id`` column,
+            or none if the page is empty.
+        """
+
+        ids = list(self._iter_pet_ids(root))
+        if ids:
+            yield build_id_batch(ids)
+
+    def _get_shelter_getpets_batch_parser(self, kwargs):
+        """
+        The batched counterpart to :py:meth:`_get_shelter_getpets_parser`.
+
+        :param dict kwargs: The kwargs from the top-level API method.
+        :rtype: callable
+        """
+
+        if kwargs.get("output", "id") == "id":
+            return self._iter_pet_id_batches
+        return self._iter_pet_batches
+
+
+class _StreamedPage(object):
+    """
+    Stand-in for a page's root Element that parses the response body
+    incrementally, as it comes off the wire. Page parsers call
+    :py:meth:`findall` on it just like they would a fully parsed document,
+    but the matching Elements are yielded as soon as they are closed, and
+    cleared once the parser moves on to the next one.
+
+    Only supports the ``findall``/``find`` lookups that the page parsers
+    and the paginator need, and each page can only be walked once.
+    """
+
+    def __init__(self, client, response):
+        """
+        Parses up through the response's <header>, raising the appropriate
+        exception if the API reported an error.
+
+        :param BasePetFinderClient client: The client that sent the request.
+        :param requests.Response response: A response that was sent with
+            ``stream=True``.
+        """
+
+        self.client = client
+        self.response = response
+        # Have urllib3 take care of any gzip/deflate for us.
+        response.raw.decode_content = True
+        self._events = etree.iterparse(response.raw, events=("end",))
+        self._last_offset = None
+
+        try:
+            for _, elem in self._events:
+                if elem.tag == "header":
+                    client._check_status(elem.getparent())
+                    return
+        except Exception:
+            self.close()
+            raise
+        # We made it to the end of the document without seeing a header.
+        self.close()
+        raise etree.XMLSyntaxError(
+            "No <header> found in response.", None, 0, 0)
+
+    def _track(self, elem):
+        """
+        Hangs on to any Elements we'll need after they've been streamed past.
+        """
+
+        if elem.tag == "lastOffset":
+            self._last_offset = elem
+
+    def findall(self, path):
+        """
+        :param str path: A ``parent/child`` path, as seen in the page parsers.
+        :rtype: generator
+        :returns: A generator of matching Elements, in document order. Each
+            one is cleared once the next one is requested.
+        """
+
+        parent_tag, tag = path.split("/")[-2:]
+        for _, elem in self._events:
+            self._track(elem)
+            if elem.tag != tag or elem.getparent().tag != parent_tag:
+                continue
+            yield elem
+            # Done with this record, free it and anything before it. Lazy
+            # records hang on to their Element, so leave those intact. They
+            # still get detached from the document below.
+            if self.client.record_mode != "lazy":
+                elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    def find(self, path):
+        """
+        Looks up an Element that isn't part of the record set. We only
+        support ``lastOffset``, which is all the paginator needs. Any
+        remaining records are skipped over.
+
+        :param str path: The path to find.
+        :rtype: lxml.etree._Element or None
+        """
+
+        if path != "lastOffset":
+            raise ValueError("Streamed pages can't find %s" % path)
+        for _, elem in self._events:
+            self._track(elem)
+            if elem is not self._last_offset:
+                elem.clear()
+        return self._last_offset
+
+    def close(self):
+        """
+        Releases the underlying connection back to the pool.
+        """
+
+        self.response.close()
+
+
+class PetFinderClient(BasePetFinderClient):
+    """
+    Simple client for the Petfinder API. You'll want to pull your API details
+    from http://www.petfinder.com/developers/api-key and instantiate this
+    class with said credentials.
+
+    Refer to http://www.petfinder.com/developers/api-docs for the required
+    kwargs for each method. It is safe to ignore the ``key`` argument, as this
+    client handles setting that for you.
+    """
+
+    def __init__(self, api_key, api_secret, endpoint="http://api.petfinder.com/",
+                 session=None, adapter=None, pool_connections=10,
+                 pool_maxsize=10, keep_alive=True, prefetch=0,
+                 streaming=False, cache=None, cache_ttls=None,
+                 record_mode="dict", rate_limiter=None, retry_policy=None,
+                 hedge_after=None, coalesce=False, thread_safe=True,
+                 metrics=None, transport=None, response_format="xml",
+                 value_table=None):
+        """
+        :param str api_key: Your Petfinder API Key.
+        :param str api_secret: Your Petfinder API Secret.
+        :keyword str endpoint: Optionally, override the endpoint to send
+            requests to.
+        :keyword requests.Session session: Optionally, a pre-configured
+            session to send all requests through. If omitted, the client
+            creates and owns its own.
+        :keyword requests.adapters.HTTPAdapter adapter: Optionally, a
+            transport adapter to mount on the session. If omitted, one is
+            built from ``pool_connections`` and ``pool_maxsize``.
+        :keyword int pool_connections: The number of per-host connection
+            pools to keep around.
+        :keyword int pool_maxsize: The maximum number of connections to keep
+            open to any single host.
+        :keyword bool keep_alive: If ``False``, ask the API to close the
+            connection after every request instead of re-using it.
+        :keyword int prefetch: For auto-paginating calls, the number of pages
+            to fetch in the background ahead of the page currently being
+            iterated over. ``0`` (the default) disables read-ahead.
+        :keyword bool streaming: If ``True``, auto-paginating calls parse
+            each page incrementally as it is downloaded, yielding and then
+            discarding each record as soon as it is complete. This lowers
+            peak memory usage and time-to-first-record on large pages. Can't
+            be combined with ``prefetch``.
+        :keyword petfinder.cache.BaseCache cache: Optionally, a cache to
+            store responses from single-record calls (``pet_get``,
+            ``shelter_get``, ``breed_list``, and ``pet_getrandom`` with
+            ``output="id"``) in.
+        :keyword dict cache_ttls: Optionally, a dict of API method names to
+            the number of seconds to cache their responses for. Merged over
+            :py:data:`petfinder.cache.DEFAULT_CACHE_TTLS`. Set a method's TTL
+            to ``0`` to stop caching it.
+        :keyword str record_mode: ``"dict"`` (the default), ``"compact"``,
+            or ``"lazy"``. See :py:class:`BasePetFinderClient`.
+        :keyword petfinder.ratelimit.RateLimiter rate_limiter: Optionally, a
+            rate limiter that every request must get past before it is sent.
+        :keyword petfinder.retry.RetryPolicy retry_policy: Optionally, a
+            policy for retrying requests that fail with transient errors.
+        :keyword float hedge_after: Optionally, the number of seconds to wait
+            on a single-record call (``pet_get``, ``shelter_get``,
+            ``breed_list``, ``shelter_listbybreed``) before sending a second,
+            identical request. Whichever comes back first wins. This trims
+            tail latency at the cost of extra requests.
+        :keyword bool coalesce: If ``True``, identical calls made at the same
+            time from different threads share a single request to the API.
+        :keyword bool thread_safe: If ``True`` (the default), each thread
+            sends its requests through its own copy of the session, so that
+            a single client can be shared by a pool of threads, including
+            the client's own worker threads. The copies all share the same
+            adapters (and connection pools). If ``False``, every thread
+            shares the one session. See :ref:`thread-safety`.
+        :keyword petfinder.metrics.Metrics metrics: Optionally, somewhere to
+            record latencies, response sizes, pagination, and errors for
+            every API call.
+        :keyword transport: Optionally, one of the transports in
+            :py:mod:`petfinder.transport` to send requests through instead
+            of requests. If given, ``session``, ``adapter``,
+            ``pool_connections``, ``pool_maxsize``, ``keep_alive``, and
+            ``thread_safe`` are ignored; configure the transport instead.
+        :keyword str response_format: ``"xml"`` (the default) or
+            ``"json"``. See :py:class:`BasePetFinderClient`. JSON responses
+            can't be streamed.
+        :keyword petfinder.interning.ValueTable value_table: Optionally, a
+            table to intern records through. See
+            :py:class:`BasePetFinderClient`.
+        """
+
+        super(PetFinderClient, self).__init__(
+            api_key, api_secret, endpoint, record_mode=record_mode,
+            response_format=response_format, value_table=value_table)
+        if prefetch and streaming:
+            raise ValueError("prefetch and streaming can't be combined.")
+        if streaming and response_format == "json":
+            raise ValueError("JSON responses can't be streamed.")
+        self.prefetch = prefetch
+        self.streaming = streaming
+        self.cache = cache
+        self.cache_ttls = dict(DEFAULT_CACHE_TTLS)
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hedge_after = hedge_after
+        # Created the first time a request is hedged.
+        self._hedge_executor = None
+        self._hedge_executor_lock = threading.Lock()
+        self._single_flight = SingleFlight() if coalesce else None
+
+        if transport is None:
+            # All of the wrapper methods share this session, which means
+            # they also share its connection pool. Paginated calls end up
+            # re-using the same keep-alive connection for every page.
+            transport = RequestsTransport(
+                self._create_session(
+                    session, adapter, pool_connections, pool_maxsize),
+                thread_safe=thread_safe, keep_alive=keep_alive,
+            )
+        self.transport = transport
+        # Only there for the default transport.
+        self.session = getattr(transport, "session", None)
+        self.thread_safe = thread_safe
+        self.metrics = metrics
+        self.pre_call_hooks = []
+        self.post_call_hooks = []
+
+    def add_pre_call_hook(self, hook):
+        """
+        Registers a function to be called before every API call, as
+        ``hook(method, data)``. ``data`` is the call's kwargs, and shouldn't
+        be modified.
+
+        :param callable hook: The function to call.
+        """
+
+        self.pre_call_hooks.append(hook)
+
+    def add_post_call_hook(self, hook):
+        """
+        Registers a function to be called after every API call, successful
+        or not, as ``hook(method, data, elapsed, error)``. ``elapsed`` is
+        the number of seconds the call took, retries and all, and ``error``
+        is the exception it failed with (or ``None``).
+
+        :param callable hook: The function to call.
+        """
+
+        self.post_call_hooks.append(hook)
+
+    def _create_session(self, session, adapter, pool_connections,
+                        pool_maxsize):
+        """
+        Sets up the HTTP session (and its connection pool) that all API calls
+        are sent through.
+
+        :param session: A user-provided session, or ``None`` to create one.
+        :type session: requests.Session or None
+        :param adapter: A user-provided adapter, or ``None`` to create one.
+        :type adapter: requests.adapters.HTTPAdapter or None
+        :param int pool_connections: Number of per-host pools to cache.
+        :param int pool_maxsize: Max number of connections per host.
+        :rtype: requests.Session
+        :returns: The session to send requests through.
+        """
+
+        if session is None:
+            session = requests.Session()
+            # If the user handed us their own session, leave its adapters
+            # alone unless they explicitly gave us one to mount.
+            if adapter is None:
+                adapter = HTTPAdapter(
+                    pool_connections=pool_connections,
+                    pool_maxsize=pool_maxsize,
+                )
+
+        if adapter is not None:
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+        return session
+
+    def close(self):
+        """
+        Closes the underlying transport, releasing any pooled connections.
+        """
+
+        self.transport.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+
+    def _do_api_call(self, method, data, continues_chain=False):
+        """
+        Convenience method to carry out a standard API call against the
+        Petfinder API.
+
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+            This varies based on the method.
+        :keyword bool continues_chain: See :py:meth:`_call_instrumented`.
+        :raises: A number of :py:exc:`petfinder.exceptions.PetfinderAPIError``
+            sub-classes, depending on what went wrong.
+        :rtype: lxml.etree._Element
+        :returns: The parsed document.
+        """
+
+        return self._call_instrumented(
+            self._get_document, method, data, continues_chain)
+
+    def _call_instrumented(self, func, method, data, continues_chain=False):
+        """
+        Calls ``func(method, data)``, running the pre- and post-call hooks
+        around it and recording its latency (and failure) in the metrics.
+
+        :param callable func: The function that carries out the API call.
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+        :keyword bool continues_chain: ``True`` if this call is for a page
+            after the first in a paginated call. The API ends those with a
+            :py:exc:`petfinder.exceptions.RecordDoesNotExistError`, which is
+            still raised, but counted as a success.
+        :returns: Whatever ``func`` returns.
+        """
+
+        if (self.metrics is None and not self.pre_call_hooks and
+                not self.post_call_hooks):
+            return func(method, data)
+
+        for hook in self.pre_call_hooks:
+            hook(method, data)
+        start = time.time()
+        error = None
+        try:
+            return func(method, data)
+        except Exception as exc:
+            if not (continues_chain and
+                    isinstance(exc, RecordDoesNotExistError)):
+                error = exc
+            raise
+        finally:
+            elapsed = time.time() - start
+            if self.metrics is not None:
+                self.metrics.observe_latency(method, "total", elapsed)
+                if error is not None:
+                    self.metrics.add_error(method, error)
+            for hook in self.post_call_hooks:
+                hook(method, data, elapsed, error)
+
+    def _get_document(self, method, data):
+        """
+        Fetches and parses the response to an API call, from the cache if
+        possible.
+
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+        :rtype: lxml.etree._Element
+        :returns: The parsed document.
+        """
+
+        cache_key = self._get_cache_key(method, data)
+        if cache_key is not None:
+            content = self.cache.get(cache_key)
+            if content is not None:
+                return self._parse_timed(method, content)
+
+        if self.hedge_after is not None and method in HEDGEABLE_METHODS:
+            fetch = self._fetch_hedged
+        else:
+            fetch = self._fetch
+        if self._single_flight is not None:
+            (root, content), shared = self._single_flight.do(
+                make_cache_key(method, data),
+                self._call_with_retries, fetch, method, data,
+            )
+            if shared:
+                # Don't share documents between threads, everyone gets
+                # their own copy.
+                root = self._parse_timed(method, content)
+        else:
+            root, content = self._call_with_retries(fetch, method, data)
+
+        # Errors are raised above, so only good responses end up cached.
+        if cache_key is not None:
+            self.cache.set(cache_key, content, self.cache_ttls[method])
+        return root
+
+    def _fetch(self, method, data):
+        """
+        Sends a request and parses the response.
+
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+        :raises: A number of :py:exc:`petfinder.exceptions.PetfinderAPIError``
+            sub-classes, depending on what went wrong.
+        :rtype: tuple
+        :returns: A tuple of the parsed document and the raw response body.
+        """
+
+        response = self._send_request(method, data)
+        return self._parse_timed(method, response.content), response.content
+
+    def _parse_timed(self, method, content):
+        """
+        Same as :py:meth:`_parse_response`, but the time taken is recorded
+        in the metrics.
+
+        :param basestring method: The API method the response is for.
+        :param bytes content: The raw response body.
+        :rtype: lxml.etree._Element
+        """
+
+        if self.metrics is None:
+            return self._parse_response(content)
+        start = time.time()
+        try:
+            return self._parse_response(content)
+        finally:
+            self.metrics.observe_latency(method, "parse", time.time() - start)
+
+    def _build_records(self, method, func, *args):
+        """
+        Calls ``func(*args)`` to build records from a document, recording
+        the time taken in the metrics.
+
+        :param basestring method: The API method the document is for.
+        :param callable func: The parser method to call.
+        :returns: Whatever ``func`` returns.
+        """
+
+        if self.metrics is None:
+            return func(*args)
+        start = time.time()
+        try:
+            return func(*args)
+        finally:
+            self.metrics.observe_latency(method, "record", time.time() - start)
+
+    def _fetch_hedged(self, method, data):
+        """
+        Same as :py:meth:`_fetch`, but if the response takes longer than
+        ``hedge_after`` seconds, a second request is sent. The first good
+        response wins.
+        """
+
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = futures.ThreadPoolExecutor(max_workers=8)
+        executor = self._hedge_executor
+
+        pending = set([executor.submit(self._fetch, method, dict(data))])
+        done, pending = futures.wait(pending, timeout=self.hedge_after)
+        if not done:
+            logger.debug("Sending hedged request for %s", method)
+            pending.add(executor.submit(self._fetch, method, dict(data)))
+
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                # Both attempts failed, let the retry policy sort it out.
+                raise error
+            done, pending = futures.wait(
+                pending, return_when=futures.FIRST_COMPLETED)
+
+    def _call_with_retries(self, func, method, data):
+        """
+        Calls ``func(method, data)``, retrying according to the client's
+        retry policy.
+
+        :param callable func: The function that carries out the request.
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+        :returns: Whatever ``func`` returns.
+        """
+
+        attempt = 1
+        while True:
+            try:
+                return func(method, data)
+            except Exception as exc:
+                policy = self.retry_policy
+                if (policy is None or attempt >= policy.max_attempts or
+                        not policy.is_retryable(exc)):
+                    raise
+                delay = policy.get_delay(attempt)
+                logger.warning(
+                    "%s failed (attempt %d of %d) with %r, retrying in %.2fs",
+                    method, attempt, policy.max_attempts, exc, delay,
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    def _get_cache_key(self, method, data):
+        """
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+        :rtype: str or None
+        :returns: The key to cache this call's response under, or ``None``
+            if it shouldn't be cached.
+        """
+
+        if self.cache is None or not self.cache_ttls.get(method):
+            return None
+        # A random pet record is only worth caching as an ID.
+        if method == "pet.getRandom" and data.get("output", "id") != "id":
+            return None
+        if self.response_format == "json":
+            # Keep JSON responses apart from XML ones, in case the cache is
+            # shared with an XML client.
+            return make_cache_key(method, dict(data, format="json"))
+        return make_cache_key(method, data)
+
+    def _do_streaming_api_call(self, method, data, continues_chain=False):
+        """
+        Same as :py:meth:`_do_api_call`, but only the response header is
+        read before returning. The rest of the body is parsed as the
+        returned page is iterated over.
+
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+        :keyword bool continues_chain: See :py:meth:`_call_instrumented`.
+        :raises: A number of :py:exc:`petfinder.exceptions.PetfinderAPIError``
+            sub-classes, depending on what went wrong.
+        :rtype: _StreamedPage
+        :returns: The partially parsed page. Make sure to close it.
+        """
+
+        def fetch(method, data):
+            response = self._send_request(method, data, stream=True)
+            return _StreamedPage(self, response)
+
+        def call(method, data):
+            # Only errors up through the header can be retried here. Once we
+            # start handing out records, it's too late.
+            return self._call_with_retries(fetch, method, data)
+
+        return self._call_instrumented(call, method, data, continues_chain)
+
+    def _send_request(self, method, data, stream=False):
+        """
+        Sends the HTTP request for an API call, waiting on the rate limiter
+        first, if there is one.
+
+        :param basestring method: The API method name to call.
+        :param dict data: Key/value parameters to send to the API method.
+            This is left untouched.
+        :keyword bool stream: If ``True``, don't read the response body.
+        :raises: :py:exc:`petfinder.exceptions.ClientRateLimitExceeded` if
+            the rate limiter won't allow the request.
+        :rtype: requests.Response
+        :returns: The response, or whatever the transport returns in its
+            place.
+        """
+
+        params = self._build_params(data)
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        # Ends up being a full URL+path.
+        url = self._build_url(method)
+        if self.metrics is None:
+            # Bombs away!
+            return self.transport.get(url, params, stream=stream)
+
+        start = time.time()
+        response = self.transport.get(url, params, stream=stream)
+        self.metrics.observe_latency(method, "network", time.time() - start)
+        if stream:
+            # The body hasn't been read yet, go by what the server says.
+            size = int(response.headers.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+        self.metrics.add_bytes(method, size)
+        return response
+
+    def _iter_pages(self, method, kwargs):
+        """
+        Walks through the pages of a paginated API call, one request per
+        page, following the ``lastOffset`` cursor. The next page isn't
+        requested until the caller asks for it.
+
+        :param basestring method: The API method on the endpoint.
+        :param dict kwargs: The kwargs from the top-level API method.
+        :rtype: generator
+        :returns: A generator of root Elements, one per page. Ends when the
+            API stops advancing the offset, otherwise it is up to the caller
+            to stop iterating.
+        """
+
+        # Once past the first page, running out of records isn't an error.
+        continues_chain = False
+
+        while True:
+            if self.streaming:
+                root = self._do_streaming_api_call(
+                    method, kwargs, continues_chain)
+                try:
+                    yield root
+                    last_offset = self._get_next_offset(root)
+                finally:
+                    root.close()
+            else:
+                root = self._do_api_call(method, kwargs, continues_chain)
+                yield root
+                # This will determine at what offset we start the next query.
+                last_offset = self._get_next_offset(root)
+
+            if last_offset == kwargs.get("offset"):
+                # We'd just be requesting the same page again.
+                return
+            # A new dict for each page, rather than updating the last one,
+            # which hooks, caches, or another thread may still hang on to.
+            # The caller's is never touched.
+            kwargs = dict(kwargs, offset=last_offset)
+            continues_chain = True
+
+    def _iter_prefetched_pages(self, method, kwargs, depth):
+        """
+        Same as :py:meth:`_iter_pages`, but pages are fetched ahead of time
+        by a background thread, so that network time overlaps with the time
+        the consumer spends on the current page.
+
+        :param basestring method: The API method on the endpoint.
+        :param dict kwargs: The kwargs from the top-level API method.
+        :param int depth: The maximum number of pages to buffer ahead of the
+            consumer. This caps memory usage.
+        :rtype: generator
+        :returns: A generator of root Elements, one per page.
+        """
+
+        page_queue = queue.Queue(maxsize=depth)
+        # Set when the consumer walks away, so the fetcher can quit.
+        stop = threading.Event()
+
+        def fetcher():
+            try:
+                for root in self._iter_pages(method, kwargs):
+                    if not put_until_stopped(page_queue, (root, None), stop):
+                        return
+            except Exception as exc:
+                put_until_stopped(page_queue, (None, exc), stop)
+                return
+            # All done, let the consumer know.
+            put_until_stopped(page_queue, (None, None), stop)
+
+        thread = threading.Thread(target=fetcher)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            while True:
+                root, exc = page_queue.get()
+                if exc is not None:
+                    raise exc
+                if root is None:
+                    return
+                yield root
+        finally:
+            stop.set()
+
+    def _do_autopaginating_api_call(self, method, kwargs, parser_func,
+                                    batched=False):
+        """
+        Given an API method, the arguments passed to it, and a function to
+        hand parsing off to, loop through the record sets in the API call
+        until all records have been yielded.
+
+        This is mostly done this way to reduce duplication through the various
+        API methods.
+
+        :param basestring method: The API method on the endpoint.
+        :param dict kwargs: The kwargs from the top-level API method.
+        :param callable parser_func: A callable that is handed the root
+            Element of each page, and returns an iterable of records.
+        :keyword bool batched: ``True`` if ``parser_func`` returns columnar
+            batches rather than records, so the metrics count their rows.
+        :rtype: generator
+        :returns: Returns a generator that may be returned by the top-level
+            API method.
+        """
+
+        if self.prefetch:
+            pages = self._iter_prefetched_pages(method, kwargs, self.prefetch)
+        else:
+            pages = self._iter_pages(method, kwargs)
+
+        # Used to determine whether to fail noisily if no results are returned.
+        has_records = False
+        page_count = 0
+
+        try:
+            while True:
+                try:
+                    root = next(pages)
+                except StopIteration:
+                    return
+                except RecordDoesNotExistError:
+                    if not has_records:
+                        # No records seen yet, this really is empty.
+                        raise
+                    # We've seen some records come through. We must have hit
+                    # the end of the result set. Finish up silently.
+                    return
+                page_count += 1
+
+                if self.metrics is None:
+                    records = parser_func(root)
+                else:
+                    records = self._iter_timed_records(
+                        method, parser_func(root), batched)
+                # This is used to track whether this go around the
+                # call->parse loop yielded any records.
+                records_returned_by_this_loop = False
+                for record in records:
+                    yield record
+                    # We saw a record, mark our trackers accordingly.
+                    records_returned_by_this_loop = True
+                    has_records = True
+                # There is a really fun bug in the Petfinder API with
+                # shelter.getpets where an offset is returned with no pets,
+                # causing an infinite loop. Closing the page generator also
+                # stops any prefetching.
+                if not records_returned_by_this_loop:
+                    pages.close()
+                    return
+        finally:
+            # If the consumer walked away early, stop any prefetching (or
+            # close the streamed response) now, rather than whenever the
+            # page generator gets garbage collected.
+            pages.close()
+            if self.metrics is not None and page_count:
+                self.metrics.observe_pages_per_chain(method, page_count)
+
+    def _iter_timed_records(self, method, records, batched=False):
+        """
+        Passes through the records built from a page, recording the time
+        spent building them (but not the time the consumer spends on each
+        one), and how many there were.
+
+        :param basestring method: The API method the page is for.
+        :param iterable records: The records, as they come out of a parser.
+        :keyword bool batched: ``True`` if ``records`` are columnar batches,
+            whose rows should be counted instead.
+        :rtype: generator
+        """
+
+        records = iter(records)
+        count = 0
+        elapsed = 0
+        try:
+            while True:
+                start = time.time()
+                try:
+                    record = next(records)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.time() - start
+                count += len(record["id"]) if batched else 1
+                yield record
+        finally:
+            self.metrics.observe_latency(method, "record", elapsed)
+            self.metrics.observe_records_per_page(method, count)
+
+    def _do_concurrent_lookups(self, lookup_func, ids, max_workers, ordered,
+                               kwargs):
+        """
+        Runs a single-record lookup for each of the given IDs on a pool of
+        worker threads.
+
+        :param callable lookup_func: The wrapper method to call for each ID,
+            (``pet_get``, for example).
+        :param iterable ids: The IDs to look up.
+        :param int max_workers: The number of lookups to run at once.
+        :param bool ordered: If ``True``, results come back in the same
+            order as ``ids``. Otherwise, they come back as they complete.
+        :param dict kwargs: Any other kwargs to pass to ``lookup_func``.
+        :rtype: generator
+        :returns: A generator of ``(id, result)`` tuples. If a record doesn't
+            exist, its result is the
+            :py:exc:`petfinder.exceptions.RecordDoesNotExistError` instance
+            instead of a record. Any other error is raised.
+        """
+
+        def lookup(record_id):
+            call_kwargs = dict(kwargs)
+            call_kwargs["id"] = record_id
+            return lookup_func(**call_kwargs)
+
+        for record_id, future in map_concurrently(
+            lookup, ids, max_workers=max_workers, ordered=ordered
+        ):
+            try:
+                yield record_id, future.result()
+            except RecordDoesNotExistError as exc:
+                yield record_id, exc
+
+    def breed_list(self, **kwargs):
+        """
+        breed.list wrapper. Returns a list of breed name strings.
+
+        :rtype: list
+        :returns: A list of breed names.
+        """
+
+        root = self._do_api_call("breed.list", kwargs)
+
+        return self._build_records("breed.list", self._parse_breed_list, root)
+
     def pet_get(self, **kwargs):
         """
         pet.get wrapper. Returns a record dict for the requested pet.
@@ -237,7 +1334,27 @@ class PetFinderClient(object):
         """
         root = self._do_api_call("pet.get", kwargs)
 
-        return self._parse_pet_record(root.find("pet"))
+        return self._build_records(
+            "pet.get", self._parse_pet_record, root.find("pet"))
+
+    def pet_get_many(self, ids, max_workers=8, ordered=True, **kwargs):
+        """
+        Concurrent pet.get wrapper. Looks up many pets at once, on a pool of
+        worker threads.
+
+        :param iterable ids: The Petfinder IDs of the pets to look up.
+        :keyword int max_workers: The number of lookups to run at once.
+        :keyword bool ordered: If ``True``, results come back in the same
+            order as ``ids``. Otherwise, they come back as they complete.
+        :rtype: generator
+        :returns: A generator of ``(pet_id, record)`` tuples. If a pet
+            doesn't exist, ``record`` is the
+            :py:exc:`petfinder.exceptions.RecordDoesNotExistError` instance
+            instead of a record dict.
+        """
+
+        return self._do_concurrent_lookups(
+            self.pet_get, ids, max_workers, ordered, kwargs)
 
     def pet_getrandom(self, **kwargs):
         """
@@ -250,12 +1367,8 @@ class PetFinderClient(object):
         """
         root = self._do_api_call("pet.getRandom", kwargs)
 
-        output_brevity = kwargs.get("output", "id")
-
-        if output_brevity == "id":
-            return root.find("petIds/id").text
-        else:
-            return self._parse_pet_record(root.find("pet"))
+        return self._build_records(
+            "pet.getRandom", self._parse_pet_getrandom, root, kwargs)
 
     def pet_find(self, **kwargs):
         """
@@ -269,25 +1382,77 @@ class PetFinderClient(object):
             allow you to receive.
         """
 
-        def pet_find_parser(root, has_records):
-            """
-            The parser that is used with the ``_do_autopaginating_api_call``
-            method for auto-pagination.
+        return self._do_autopaginating_api_call(
+            "pet.find", kwargs, self._iter_pet_records
+        )
+
+    def pet_find_batches(self, **kwargs):
+        """
+        Like :py:meth:`pet_find`, but yields a columnar batch for each page
+        of results instead of a record for each pet. Much quicker to turn
+        into a dataframe. See :py:mod:`petfinder.columnar` for the columns.
 
-            :param lxml.etree._Element root: The root Element in the response.
-            :param dict has_records: A dict that we track the loop state in.
-                dicts are passed by references, which is how this works.
-            """
-            for pet in root.findall("pets/pet"):
-                # This is changed in the original record, since it's passed
-                # by reference.
-                has_records["has_records"] = True
-                yield self._parse_pet_record(pet)
+        :rtype: generator
+        :returns: A generator of batch dicts, one per page.
+        :raises: :py:exc:`petfinder.exceptions.LimitExceeded` once
+            you have reached the maximum number of records your credentials
+            allow you to receive.
+        """
 
         return self._do_autopaginating_api_call(
-            "pet.find", kwargs, pet_find_parser
+            "pet.find", kwargs, self._iter_pet_batches, batched=True
         )
 
+    def pet_find_sharded(self, locations, max_workers=4, queue_size=1000,
+                         **kwargs):
+        """
+        Runs a separate pet.find for each of the given locations (ZIP codes
+        or cities) at the same time, and merges the results into a single
+        stream. Pets that turn up in more than one location (overlapping
+        search areas) are only yielded once.
+
+        :param iterable locations: The ``location`` to search in each shard.
+        :keyword int max_workers: The number of shards to search at once.
+        :keyword int queue_size: The maximum number of records buffered
+            between the shards and the consumer.
+        :rtype: generator
+        :returns: A generator of pet record dicts. Records from different
+            shards are interleaved, in no particular order.
+        :raises: :py:exc:`petfinder.exceptions.LimitExceeded` once
+            you have reached the maximum number of records your credentials
+            allow you to receive. A shard with no results is skipped.
+        """
+
+        def make_shard(location):
+            def shard():
+                shard_kwargs = dict(kwargs)
+                shard_kwargs["location"] = location
+                try:
+                    for record in self.pet_find(**shard_kwargs):
+                        yield record
+                except RecordDoesNotExistError:
+                    # Nothing in this shard.
+                    return
+            return shard
+
+        # Pet IDs are numeric, and ints take up a good deal less room than
+        # the equivalent strings.
+        seen = set()
+        for _, record in merge_iterables(
+            [make_shard(location) for location in locations],
+            max_workers=max_workers, queue_size=queue_size,
+        ):
+            pet_id = record.get("id")
+            if pet_id is None:
+                # No telling whether we've seen it or not.
+                yield record
+                continue
+            pet_id = int(pet_id) if pet_id.isdigit() else pet_id
+            if pet_id in seen:
+                continue
+            seen.add(pet_id)
+            yield record
+
     def shelter_find(self, **kwargs):
         """
         shelter.find wrapper. Returns a generator of shelter record dicts
@@ -300,24 +1465,8 @@ class PetFinderClient(object):
             to receive.
         """
 
-        def shelter_find_parser(root, has_records):
-            """
-            The parser that is used with the ``_do_autopaginating_api_call``
-            method for auto-pagination.
-
-            :param lxml.etree._Element root: The root Element in the response.
-            :param dict has_records: A dict that we track the loop state in.
-                dicts are passed by references, which is how this works.
-            """
-            for shelter in root.find("shelters"):
-                has_records["has_records"] = True
-                record = {}
-                for field in shelter:
-                    record[field.tag] = field.text
-                yield record
-
         return self._do_autopaginating_api_call(
-            "shelter.find", kwargs, shelter_find_parser
+            "shelter.find", kwargs, self._iter_shelter_records
         )
 
     def shelter_get(self, **kwargs):
@@ -331,12 +1480,27 @@ class PetFinderClient(object):
 
         root = self._do_api_call("shelter.get", kwargs)
 
-        shelter = root.find("shelter")
-        for field in shelter:
-            record = {}
-            for field in shelter:
-                record[field.tag] = field.text
-            return record
+        return self._build_records(
+            "shelter.get", self._parse_shelter_record, root.find("shelter"))
+
+    def shelter_get_many(self, ids, max_workers=8, ordered=True, **kwargs):
+        """
+        Concurrent shelter.get wrapper. Looks up many shelters at once, on a
+        pool of worker threads.
+
+        :param iterable ids: The IDs of the shelters to look up.
+        :keyword int max_workers: The number of lookups to run at once.
+        :keyword bool ordered: If ``True``, results come back in the same
+            order as ``ids``. Otherwise, they come back as they complete.
+        :rtype: generator
+        :returns: A generator of ``(shelter_id, record)`` tuples. If a
+            shelter doesn't exist, ``record`` is the
+            :py:exc:`petfinder.exceptions.RecordDoesNotExistError` instance
+            instead of a record dict.
+        """
+
+        return self._do_concurrent_lookups(
+            self.shelter_get, ids, max_workers, ordered, kwargs)
 
     def shelter_getpets(self, **kwargs):
         """
@@ -352,30 +1516,30 @@ class PetFinderClient(object):
             to receive.
         """
 
-        def shelter_getpets_parser_ids(root, has_records):
-            """
-            Parser for output=id.
-            """
-            pet_ids = root.findall("petIds/id")
-            for pet_id in pet_ids:
-                yield pet_id.text
+        # Depending on the output value, select the correct parser.
+        shelter_getpets_parser = self._get_shelter_getpets_parser(kwargs)
 
-        def shelter_getpets_parser_records(root, has_records):
-            """
-            Parser for output=full or output=basic.
-            """
-            for pet in root.findall("pets/pet"):
-                yield self._parse_pet_record(pet)
+        return self._do_autopaginating_api_call(
+            "shelter.getPets", kwargs, shelter_getpets_parser
+        )
 
+    def shelter_getpets_batches(self, **kwargs):
+        """
+        Like :py:meth:`shelter_getpets`, but yields a columnar batch for
+        each page of results instead of a record (or ID) for each pet. See
+        :py:mod:`petfinder.columnar` for the columns. With ``output="id"``,
+        batches only have the ``id`` column.
 
-        # Depending on the output value, select the correct parser.
-        if kwargs.get("output", "id") == "id":
-            shelter_getpets_parser = shelter_getpets_parser_ids
-        else:
-            shelter_getpets_parser = shelter_getpets_parser_records
+        :rtype: generator
+        :returns: A generator of batch dicts, one per page.
+        :raises: :py:exc:`petfinder.exceptions.LimitExceeded` once you have
+            reached the maximum number of records your credentials allow you
+            to receive.
+        """
 
         return self._do_autopaginating_api_call(
-            "shelter.getPets", kwargs, shelter_getpets_parser
+            "shelter.getPets", kwargs,
+            self._get_shelter_getpets_batch_parser(kwargs), batched=True
         )
 
     def shelter_listbybreed(self, **kwargs):
@@ -389,6 +1553,5 @@ class PetFinderClient(object):
 
         root = self._do_api_call("shelter.listByBreed", kwargs)
 
-        shelter_ids = root.findall("shelterIds/id")
-        for shelter_id in shelter_ids:
-            yield shelter_id.text
+        for shelter_id in self._iter_shelter_ids(root):
+            yield shelter_id
@@ -0,0 +1,287 @@
+"""
+Columnar batches of pet records, for analytics. Rather than one dict per
+pet, :py:meth:`petfinder.PetFinderClient.pet_find_batches` and
+:py:meth:`petfinder.PetFinderClient.shelter_getpets_batches` yield one
+batch per page: a dict of column name to column, filled straight from the
+response without building any per-record dicts along the way.
+
+Example::
+
+    import pandas
+    from petfinder.columnar import ROW_COLUMNS
+
+    for batch in api.pet_find_batches(location="29678", output="full"):
+        frame = pandas.DataFrame(
+            dict((name, batch[name]) for name in ROW_COLUMNS))
+
+Columns, each with one entry per pet unless noted otherwise:
+
+* ``id``: Pet IDs, as integers. ``-1`` if missing.
+* ``lastUpdate``: When each pet was last updated, as ``datetime64[s]``
+  (UTC, ``NaT`` if missing) with NumPy, or otherwise as float seconds since
+  the epoch (``nan`` if missing).
+* Everything in :py:data:`STRING_COLUMNS`: Lists of strings (or ``None``).
+* ``breeds``, ``options``: Every pet's breeds (or options), one after
+  another. Pet ``i``'s are
+  ``breeds[breeds_offsets[i]:breeds_offsets[i + 1]]``.
+* ``breeds_offsets``, ``options_offsets``, ``photos_offsets``: Integer
+  offsets into the list columns, with one more entry than there are pets.
+* ``photo_id``, ``photo_size``, ``photo_url``: Every pet's photos, one
+  after another, located with ``photos_offsets``.
+
+Integer and timestamp columns are NumPy arrays when NumPy is installed, and
+:py:class:`array.array` objects otherwise. Batches of pet IDs (``output="id"``)
+only have the ``id`` column.
+"""
+
+import array
+import calendar
+
+from petfinder.interning import (
+    CATEGORICAL_LOCATION_FIELDS, CATEGORICAL_PET_FIELDS)
+from petfinder.jsonformat import as_list, get_text
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Text fields copied straight from <pet> to their columns.
+PET_STRING_FIELDS = (
+    "shelterId", "shelterPetId", "name", "animal", "mix", "age", "sex",
+    "size", "description", "status",
+)
+# <contact> fields, each copied to a contact_* column.
+CONTACT_FIELDS = (
+    "name", "address1", "address2", "city", "state", "zip", "phone", "fax",
+    "email",
+)
+#: Columns holding lists of strings, one per pet.
+STRING_COLUMNS = PET_STRING_FIELDS + tuple(
+    "contact_%s" % field for field in CONTACT_FIELDS)
+#: Every column with exactly one entry per pet.
+ROW_COLUMNS = ("id", "lastUpdate") + STRING_COLUMNS
+
+_CATEGORICAL_COLUMNS = frozenset(
+    [field for field in CATEGORICAL_PET_FIELDS if field in PET_STRING_FIELDS] +
+    ["contact_%s" % field for field in CATEGORICAL_LOCATION_FIELDS])
+# array.array typecodes for the pure Python fallbacks.
+_INT_TYPECODE = "l"
+_FLOAT_TYPECODE = "d"
+
+
+def _int_array(values):
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.int64)
+    return array.array(_INT_TYPECODE, values)
+
+
+def _timestamp_array(values):
+    """
+    :param list values: Timestamp strings, as the API sends them
+        (``2012-09-12T15:45:17Z``), or ``None``.
+    """
+
+    if numpy is not None:
+        # NumPy won't take the Z without complaining. It's always UTC.
+        return numpy.array(
+            [value[:-1] if value else "NaT" for value in values],
+            dtype="datetime64[s]")
+    return array.array(_FLOAT_TYPECODE, [
+        calendar.timegm((
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]),
+        )) if value else float("nan")
+        for value in values
+    ])
+
+
+def build_id_batch(ids):
+    """
+    :param list ids: Pet ID strings.
+    :rtype: dict
+    :returns: A batch with just an ``id`` column.
+    """
+
+    return {"id": _int_array([int(pet_id) for pet_id in ids])}
+
+
+class PetBatchBuilder(object):
+    """
+    Accumulates pets into columns, one pet at a time, then hands them back
+    as a batch with :py:meth:`build`.
+    """
+
+    def __init__(self, value_table=None):
+        """
+        :keyword petfinder.interning.ValueTable value_table: Optionally, a
+            table to intern categorical values through.
+        """
+
+        intern = value_table.intern if value_table is not None else None
+        self._intern = intern
+        self._rows = 0
+        self.ids = []
+        self.last_updates = []
+        self.strings = dict((name, []) for name in STRING_COLUMNS)
+        self.breeds = []
+        self.breeds_offsets = [0]
+        self.options = []
+        self.options_offsets = [0]
+        self.photo_ids = []
+        self.photo_sizes = []
+        self.photo_urls = []
+        self.photos_offsets = [0]
+        # Each pet gets a placeholder in these, which is overwritten with
+        # whatever turns up.
+        self._row_columns = [self.last_updates] + [
+            self.strings[name] for name in STRING_COLUMNS]
+
+        def entry(name, column):
+            return column, intern if name in _CATEGORICAL_COLUMNS else None
+
+        # <pet> tag -> (column, interning function or None), for the
+        # straight copies. Same for <contact> tags.
+        self._pet_columns = dict(
+            (field, entry(field, self.strings[field]))
+            for field in PET_STRING_FIELDS)
+        self._pet_columns["lastUpdate"] = (self.last_updates, None)
+        self._contact_columns = dict(
+            (field, entry("contact_%s" % field,
+                          self.strings["contact_%s" % field]))
+            for field in CONTACT_FIELDS)
+
+    def __len__(self):
+        return self._rows
+
+    def _start_row(self):
+        row = self._rows
+        self._rows += 1
+        self.ids.append(-1)
+        for column in self._row_columns:
+            column.append(None)
+        return row
+
+    def _end_row(self):
+        self.breeds_offsets.append(len(self.breeds))
+        self.options_offsets.append(len(self.options))
+        self.photos_offsets.append(len(self.photo_urls))
+
+    def add_element(self, pet):
+        """
+        :param lxml.etree._Element pet: A <pet> Element.
+        """
+
+        row = self._start_row()
+        intern = self._intern
+        pet_columns = self._pet_columns
+        for node in pet:
+            tag = node.tag
+            entry = pet_columns.get(tag)
+            if entry is not None:
+                column, column_intern = entry
+                column[row] = (
+                    node.text if column_intern is None
+                    else column_intern(node.text))
+            elif tag == "id":
+                if node.text:
+                    self.ids[row] = int(node.text)
+            elif tag == "breeds":
+                breeds = [breed.text for breed in node.iterchildren("breed")]
+                if intern is not None:
+                    breeds = map(intern, breeds)
+                self.breeds.extend(breeds)
+            elif tag == "options":
+                options = [
+                    option.text for option in node.iterchildren("option")]
+                if intern is not None:
+                    options = map(intern, options)
+                self.options.extend(options)
+            elif tag == "media":
+                for photos in node.iterchildren("photos"):
+                    for photo in photos.iterchildren("photo"):
+                        photo_id = photo.get("id")
+                        size = photo.get("size")
+                        if intern is not None:
+                            photo_id = intern(photo_id)
+                            size = intern(size)
+                        self.photo_ids.append(photo_id)
+                        self.photo_sizes.append(size)
+                        self.photo_urls.append(photo.text)
+            elif tag == "contact":
+                contact_columns = self._contact_columns
+                for field in node:
+                    entry = contact_columns.get(field.tag)
+                    if entry is not None:
+                        column, column_intern = entry
+                        column[row] = (
+                            field.text if column_intern is None
+                            else column_intern(field.text))
+        self._end_row()
+
+    def add_object(self, pet):
+        """
+        :param dict pet: A pet object, from a JSON response.
+        """
+
+        row = self._start_row()
+        intern = self._intern
+        for tag, (column, column_intern) in self._pet_columns.items():
+            value = pet.get(tag)
+            if value is not None:
+                value = value.get("$t")
+                column[row] = (
+                    value if column_intern is None else column_intern(value))
+        pet_id = get_text(pet.get("id"))
+        if pet_id:
+            self.ids[row] = int(pet_id)
+        breeds = [get_text(breed) for breed in as_list(
+            (pet.get("breeds") or {}).get("breed"))]
+        options = [get_text(option) for option in as_list(
+            (pet.get("options") or {}).get("option"))]
+        if intern is not None:
+            breeds = map(intern, breeds)
+            options = map(intern, options)
+        self.breeds.extend(breeds)
+        self.options.extend(options)
+        for photo in as_list(
+                ((pet.get("media") or {}).get("photos") or {}).get("photo")):
+            photo_id = photo.get("@id")
+            size = photo.get("@size")
+            if intern is not None:
+                photo_id = intern(photo_id)
+                size = intern(size)
+            self.photo_ids.append(photo_id)
+            self.photo_sizes.append(size)
+            self.photo_urls.append(photo.get("$t"))
+        contact_columns = self._contact_columns
+        for tag, value in (pet.get("contact") or {}).items():
+            entry = contact_columns.get(tag)
+            if entry is not None:
+                column, column_intern = entry
+                value = get_text(value)
+                column[row] = (
+                    value if column_intern is None else column_intern(value))
+        self._end_row()
+
+    def build(self):
+        """
+        :rtype: dict
+        :returns: A batch of everything added so far. See
+            :py:mod:`petfinder.columnar` for the columns.
+        """
+
+        batch = dict(self.strings)
+        batch.update({
+            "id": _int_array(self.ids),
+            "lastUpdate": _timestamp_array(self.last_updates),
+            "breeds": self.breeds,
+            "breeds_offsets": _int_array(self.breeds_offsets),
+            "options": self.options,
+            "options_offsets": _int_array(self.options_offsets),
+            "photo_id": self.photo_ids,
+            "photo_size": self.photo_sizes,
+            "photo_url": self.photo_urls,
+            "photos_offsets": _int_array(self.photos_offsets),
+        })
+        return batch
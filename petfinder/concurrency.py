@@ -0,0 +1,169 @@
+"""
+Helpers for fanning API calls out over a pool of worker threads, without
+queueing up more work than we can keep track of.
+"""
+
+import collections
+import threading
+from concurrent import futures
+try:
+    import queue
+except ImportError:
+    # Python 2.
+    import Queue as queue
+
+
+def put_until_stopped(item_queue, item, stop, poll_interval=0.1):
+    """
+    Puts an item on a bounded queue, waiting for room for as long as it
+    takes, unless ``stop`` is set first. For producers whose consumer may
+    walk away while they are waiting.
+
+    :param item_queue: A bounded :py:class:`queue.Queue`, or a
+        :py:class:`multiprocessing.Queue`.
+    :param item: The item to put on the queue.
+    :param threading.Event stop: Set once nobody is listening anymore.
+    :keyword float poll_interval: How often to check on ``stop``, in
+        seconds.
+    :rtype: bool
+    :returns: ``True`` if the item was put on the queue, ``False`` if
+        ``stop`` was set first.
+    """
+
+    while not stop.is_set():
+        try:
+            item_queue.put(item, timeout=poll_interval)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def map_concurrently(func, items, max_workers=8, ordered=True, window=None):
+    """
+    Calls ``func`` on each of ``items`` from a pool of worker threads.
+    ``items`` is consumed lazily, and at most ``window`` calls are pending
+    at any one time, so memory usage stays flat no matter how many items
+    there are.
+
+    :param callable func: Called with a single item.
+    :param iterable items: The items to hand to ``func``.
+    :keyword int max_workers: The number of worker threads.
+    :keyword bool ordered: If ``True``, results come back in the same order
+        as ``items``. If ``False``, results come back as they complete.
+    :keyword int window: The maximum number of calls in flight (running or
+        waiting for a worker). Defaults to twice ``max_workers``.
+    :rtype: generator
+    :returns: A generator of ``(item, future)`` tuples. Each future is done,
+        so calling its ``result()`` returns immediately (or raises whatever
+        ``func`` raised).
+    """
+
+    if window is None:
+        window = max_workers * 2
+    items = iter(items)
+    executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    # In ordered mode, this is a FIFO of (item, future) tuples. In unordered
+    # mode, we use a dict of future -> item.
+    pending = collections.deque() if ordered else {}
+
+    def submit_next():
+        for item in items:
+            future = executor.submit(func, item)
+            if ordered:
+                pending.append((item, future))
+            else:
+                pending[future] = item
+            return True
+        return False
+
+    try:
+        # Fill up the window.
+        while len(pending) < window and submit_next():
+            pass
+
+        while pending:
+            if ordered:
+                item, future = pending.popleft()
+                futures.wait([future])
+                yield item, future
+                submit_next()
+            else:
+                done, _ = futures.wait(
+                    list(pending), return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    yield item, future
+                    submit_next()
+    finally:
+        # The consumer may have walked away early. Don't bother with
+        # anything that hasn't started yet.
+        for future in (
+            [f for _, f in pending] if ordered else list(pending)
+        ):
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def merge_iterables(factories, max_workers=4, queue_size=1000):
+    """
+    Runs several iterables at once, each on its own worker thread, and
+    merges whatever they yield into a single stream. Items are handed over
+    through a bounded queue, so workers wait on the consumer once it fills
+    up, rather than buffering without limit.
+
+    :param iterable factories: Callables that each return an iterable.
+        Consumed lazily, as workers free up.
+    :keyword int max_workers: The number of iterables to run at once. Any
+        beyond this wait their turn.
+    :keyword int queue_size: The maximum number of items buffered between
+        the workers and the consumer.
+    :raises: The first error raised by any of the iterables (or by
+        ``factories`` itself). Everything else is stopped.
+    :rtype: generator
+    :returns: A generator of ``(index, item)`` tuples, where ``index`` is
+        the position of the factory that produced ``item``.
+    """
+
+    factories = enumerate(factories)
+    # Generators can't be advanced from two threads at once.
+    factories_lock = threading.Lock()
+    item_queue = queue.Queue(maxsize=queue_size)
+    # Set when the consumer walks away (or something breaks), so the
+    # workers can quit.
+    stop = threading.Event()
+    # Marks a worker running out of iterables (or an error) in the queue.
+    done = object()
+
+    def run():
+        try:
+            while not stop.is_set():
+                with factories_lock:
+                    try:
+                        index, factory = next(factories)
+                    except StopIteration:
+                        break
+                for item in factory():
+                    if not put_until_stopped(item_queue, (index, item), stop):
+                        return
+        except Exception as exc:
+            put_until_stopped(item_queue, (done, exc), stop)
+            return
+        put_until_stopped(item_queue, (done, None), stop)
+
+    executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    for _ in range(max_workers):
+        executor.submit(run)
+    try:
+        remaining = max_workers
+        while remaining:
+            index, item = item_queue.get()
+            if index is done:
+                if item is not None:
+                    raise item
+                remaining -= 1
+                continue
+            yield index, item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
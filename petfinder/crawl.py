@@ -0,0 +1,276 @@
+"""
+Multi-process crawls of shelter inventories. Building records is CPU-bound
+and holds the GIL, so past a point, more threads don't help. The crawlers
+here split the work up by shelter across a pool of worker processes instead,
+each with its own client, and stream the records back to the parent.
+
+Example::
+
+    from petfinder.crawl import crawl_region
+
+    for shelter_id, pet in crawl_region(api, processes=8, location="SC"):
+        print(shelter_id, pet["name"])
+
+Records are sent back in chunks, through a bounded queue. Once it fills up,
+the workers wait for the parent to catch up, so memory usage stays flat even
+if the consumer is slow.
+
+If the client has a :py:class:`petfinder.ratelimit.RateLimiter`, every
+worker gets one with the same limits, sharing a single budget with it through
+a :py:class:`petfinder.ratelimit.FileBackend` (so this requires a POSIX
+platform). A limiter with any other backend is moved onto a temporary
+``FileBackend`` for the duration of the crawl, state and all, and moved back
+afterwards.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+try:
+    import queue
+except ImportError:
+    # Python 2.
+    import Queue as queue
+
+from petfinder.client import PetFinderClient
+from petfinder.concurrency import put_until_stopped
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.interning import ValueTable
+from petfinder.ratelimit import FileBackend, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Messages from the workers to the parent. Each is a tuple of one of these,
+# a shelter ID (or worker number), and a payload.
+_RECORDS = "records"
+_ERROR = "error"
+_EXIT = "exit"
+
+
+def _crawl_worker(worker_num, task_queue, result_queue, client_kwargs,
+                  rate_limit, output, chunk_size):
+    """
+    Runs in each worker process. Takes shelter IDs off ``task_queue`` until
+    it gets a ``None``, and puts chunks of their pets on ``result_queue``.
+    """
+
+    client_kwargs = dict(client_kwargs)
+    # Value tables can't be pickled. Each worker gets its own.
+    if client_kwargs.pop("intern_values", False):
+        client_kwargs["value_table"] = ValueTable()
+    if rate_limit is not None:
+        path = rate_limit.pop("path")
+        client_kwargs["rate_limiter"] = RateLimiter(
+            backend=FileBackend(path), **rate_limit)
+    client = PetFinderClient(**client_kwargs)
+
+    try:
+        while True:
+            shelter_id = task_queue.get()
+            if shelter_id is None:
+                break
+            try:
+                chunk = []
+                for record in client.shelter_getpets(
+                    id=shelter_id, output=output,
+                ):
+                    chunk.append(record)
+                    if len(chunk) >= chunk_size:
+                        result_queue.put((_RECORDS, shelter_id, chunk))
+                        chunk = []
+                if chunk:
+                    result_queue.put((_RECORDS, shelter_id, chunk))
+            except RecordDoesNotExistError:
+                # No pets.
+                continue
+            except Exception as exc:
+                try:
+                    pickle.dumps(exc)
+                except Exception:
+                    # It has to make it back to the parent somehow.
+                    exc = RuntimeError(repr(exc))
+                result_queue.put((_ERROR, shelter_id, exc))
+                return
+    finally:
+        client.close()
+        result_queue.put((_EXIT, worker_num, None))
+
+
+def _get_client_kwargs(client, client_kwargs):
+    """
+    :param petfinder.PetFinderClient client: The client to copy.
+    :param dict client_kwargs: Any other kwargs for the workers' clients.
+    :rtype: dict
+    :returns: The kwargs to build each worker's client with.
+    """
+
+    kwargs = {
+        "api_key": client.api_key,
+        "api_secret": client.api_secret,
+        "endpoint": client.endpoint,
+        "record_mode": client.record_mode,
+        "response_format": client.response_format,
+        "retry_policy": client.retry_policy,
+        "intern_values": client.value_table is not None,
+    }
+    kwargs.update(client_kwargs or {})
+    return kwargs
+
+
+def _swap_backend(limiter, backend):
+    """
+    Moves a rate limiter onto a new backend, bringing its state along.
+
+    :param petfinder.ratelimit.RateLimiter limiter: The limiter to move.
+    :param backend: The backend to move it to.
+    """
+
+    with limiter.backend.locked_state() as old_state:
+        with backend.locked_state() as new_state:
+            new_state.clear()
+            new_state.update(old_state)
+        limiter.backend = backend
+
+
+def crawl_shelters(client, shelter_ids, processes=None, output="full",
+                   queue_size=100, chunk_size=100, client_kwargs=None):
+    """
+    Fetches the pets at each of the given shelters from a pool of worker
+    processes.
+
+    :param petfinder.PetFinderClient client: The client whose credentials,
+        endpoint, record mode, response format, retry policy, and rate
+        limits the workers should use. If it has a value table, each worker
+        interns its records through a table of its own.
+    :param iterable shelter_ids: The shelters to crawl. Consumed lazily.
+    :keyword int processes: The number of worker processes. Defaults to the
+        number of CPUs.
+    :keyword str output: The ``output`` to pass to ``shelter_getpets``.
+    :keyword int queue_size: The maximum number of chunks of records
+        buffered between the workers and the consumer.
+    :keyword int chunk_size: The maximum number of records sent back at a
+        time.
+    :keyword dict client_kwargs: Optionally, any other kwargs for the
+        workers' clients. These have to be picklable.
+    :raises: The first error any worker runs into (other than a shelter
+        having no pets), or that ``shelter_ids`` raises. Everything else is
+        stopped.
+    :rtype: generator
+    :returns: A generator of ``(shelter_id, record)`` tuples. Shelters are
+        interleaved, in no particular order.
+    """
+
+    processes = processes or multiprocessing.cpu_count()
+    client_kwargs = _get_client_kwargs(client, client_kwargs)
+
+    rate_limit = None
+    tmp_path = None
+    limiter = client.rate_limiter
+    original_backend = None
+    if limiter is not None:
+        if not isinstance(limiter.backend, FileBackend):
+            original_backend = limiter.backend
+            fd, tmp_path = tempfile.mkstemp(prefix="petfinder-crawl-")
+            os.close(fd)
+            _swap_backend(limiter, FileBackend(tmp_path))
+        rate_limit = {
+            "per_second": limiter.per_second, "per_day": limiter.per_day,
+            "burst": limiter.burst, "block": limiter.block,
+            "path": limiter.backend.path,
+        }
+
+    task_queue = multiprocessing.Queue(maxsize=processes * 2)
+    result_queue = multiprocessing.Queue(maxsize=queue_size)
+    workers = [
+        multiprocessing.Process(
+            target=_crawl_worker,
+            args=(num, task_queue, result_queue, client_kwargs,
+                  dict(rate_limit) if rate_limit else None, output,
+                  chunk_size),
+        )
+        for num in range(processes)
+    ]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    # Set when the consumer walks away (or something breaks), so the
+    # feeder can quit.
+    stop = threading.Event()
+
+    # Anything shelter_ids raises, to be re-raised by the parent.
+    feed_errors = []
+
+    def feed():
+        try:
+            for shelter_id in shelter_ids:
+                if not put_until_stopped(task_queue, shelter_id, stop):
+                    return
+        except Exception as exc:
+            feed_errors.append(exc)
+        finally:
+            # One for each worker, so they all know to quit.
+            for _ in workers:
+                if not put_until_stopped(task_queue, None, stop):
+                    return
+
+    feeder = threading.Thread(target=feed)
+    feeder.daemon = True
+    feeder.start()
+
+    try:
+        running = set(range(processes))
+        while running:
+            if feed_errors:
+                raise feed_errors[0]
+            try:
+                kind, key, payload = result_queue.get(timeout=1)
+            except queue.Empty:
+                for num in list(running):
+                    if not workers[num].is_alive():
+                        raise RuntimeError(
+                            "Crawl worker %d died (exit code %s)." % (
+                                num, workers[num].exitcode))
+                continue
+            if kind == _RECORDS:
+                for record in payload:
+                    yield key, record
+            elif kind == _ERROR:
+                raise payload
+            else:
+                running.discard(key)
+        # The workers may all have quit before we noticed.
+        if feed_errors:
+            raise feed_errors[0]
+    finally:
+        stop.set()
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        if tmp_path is not None:
+            _swap_backend(limiter, original_backend)
+            os.remove(tmp_path)
+
+
+def crawl_region(client, processes=None, output="full", queue_size=100,
+                 chunk_size=100, client_kwargs=None, **kwargs):
+    """
+    Crawls the pets at every shelter ``shelter_find`` turns up. Takes the
+    same arguments as :py:func:`crawl_shelters`, plus the kwargs for
+    :py:meth:`petfinder.PetFinderClient.shelter_find` (``location`` and so
+    on). The shelters are found by the parent process, with ``client``.
+
+    :rtype: generator
+    :returns: A generator of ``(shelter_id, record)`` tuples.
+    """
+
+    shelter_ids = (shelter["id"] for shelter in client.shelter_find(**kwargs))
+    return crawl_shelters(
+        client, shelter_ids, processes=processes, output=output,
+        queue_size=queue_size, chunk_size=chunk_size,
+        client_kwargs=client_kwargs,
+    )
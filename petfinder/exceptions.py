@@ -35,6 +35,15 @@ class LimitExceeded(PetfinderAPIError):
     pass
 
 
+class ClientRateLimitExceeded(LimitExceeded):
+    """
+    Raised by :py:class:`petfinder.ratelimit.RateLimiter` when a request would
+    go over the client-side rate limit. No request is sent to the API.
+    """
+
+    pass
+
+
 class InvalidGeographicalLocationError(PetfinderAPIError):
     """
     Raised when an invalid geographical location is specified.
@@ -77,6 +86,16 @@ class UnrecognizedError(PetfinderAPIError):
     pass
 
 
+class RecordingNotFoundError(Exception):
+    """
+    Raised by :py:class:`petfinder.transport.ReplayTransport` when asked for
+    a response that was never recorded. This isn't an API error, since the
+    API was never asked.
+    """
+
+    pass
+
+
 # Maps status codes to exceptions.
 STATUS_CODE_MAPPING = {
     '200': InvalidRequestError,
@@ -0,0 +1,274 @@
+"""
+Bulk export of shelter inventories to disk. Pets are fetched a shelter at
+a time, from a pool of worker threads, and handed to the writer through a
+bounded queue as they arrive, so memory usage stays flat no matter how
+large the region (or any one shelter) is.
+
+Example::
+
+    from petfinder.export import JSONLWriter, export_region
+
+    with open("pets.jsonl", "w") as out:
+        export_region(api, JSONLWriter(out), location="29678", max_workers=8)
+
+Records can be written as JSON lines (:py:class:`JSONLWriter`), CSV
+(:py:class:`CSVWriter`), or Parquet (:py:class:`ParquetWriter`, requires
+pyarrow_).
+
+.. _pyarrow: http://arrow.apache.org/docs/python/
+"""
+
+import csv
+import datetime
+import json
+import logging
+import threading
+
+from petfinder.client import TIMESTAMP_FORMAT
+from petfinder.concurrency import merge_iterables
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.records import as_dict
+
+logger = logging.getLogger(__name__)
+
+# Columns for the flattened (CSV/Parquet) pet records. List fields are
+# joined with LIST_SEPARATOR in CSV files.
+FLAT_PET_FIELDS = [
+    "id", "shelterId", "shelterPetId", "name", "animal", "breeds", "mix",
+    "age", "sex", "size", "options", "description", "lastUpdate", "status",
+    "photos", "contact_name", "contact_address1", "contact_address2",
+    "contact_city", "contact_state", "contact_zip", "contact_phone",
+    "contact_fax", "contact_email",
+]
+_FLAT_LIST_FIELDS = frozenset(["breeds", "options", "photos"])
+
+LIST_SEPARATOR = "|"
+
+# The output modes that give whole records. output="id" only gives IDs,
+# which there's nothing to export from.
+RECORD_OUTPUT_MODES = frozenset(["basic", "full"])
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    raise TypeError("%r is not JSON serializable" % value)
+
+
+def flatten_pet_record(record):
+    """
+    Flattens a pet record into a single level dict, for tabular formats.
+    Contact details become ``contact_*`` fields, photos become a list of
+    URLs, and ``lastUpdate`` becomes a timestamp string.
+
+    :param record: A pet record, in any of the forms the client builds.
+    :rtype: dict
+    :returns: A dict with the keys in :py:data:`FLAT_PET_FIELDS`.
+    :raises: :py:exc:`TypeError` if handed a bare ID, rather than a record.
+    """
+
+    if not hasattr(record, "get"):
+        raise TypeError(
+            "Expected a pet record, got %r. Records are only fetched with "
+            "output='basic' or output='full'." % (record,))
+    record = as_dict(record)
+    flat = dict((field, record.get(field)) for field in FLAT_PET_FIELDS)
+    flat["breeds"] = list(record.get("breeds") or [])
+    flat["options"] = list(record.get("options") or [])
+    flat["photos"] = [photo["url"] for photo in record.get("photos") or []]
+    for key, value in (record.get("contact") or {}).items():
+        flat["contact_%s" % key] = value
+    if isinstance(flat["lastUpdate"], datetime.datetime):
+        flat["lastUpdate"] = flat["lastUpdate"].strftime(TIMESTAMP_FORMAT)
+    return flat
+
+
+class JSONLWriter(object):
+    """
+    Writes records out as JSON, one per line.
+    """
+
+    def __init__(self, fileobj):
+        """
+        :param file fileobj: A file opened for writing (in text mode).
+        """
+
+        self.fileobj = fileobj
+
+    def write_batch(self, records):
+        """
+        :param list records: The records to write.
+        """
+
+        self.fileobj.write("".join(
+            json.dumps(as_dict(record), default=_json_default) + "\n"
+            for record in records
+        ))
+
+    def close(self):
+        self.fileobj.flush()
+
+
+class CSVWriter(object):
+    """
+    Writes pet records out as CSV, flattened with
+    :py:func:`flatten_pet_record`. List fields are joined with
+    :py:data:`LIST_SEPARATOR`.
+    """
+
+    def __init__(self, fileobj, fields=None):
+        """
+        :param file fileobj: A file opened for writing (in text mode, with
+            ``newline=""`` on Python 3).
+        :keyword list fields: The columns to write. Defaults to
+            :py:data:`FLAT_PET_FIELDS`.
+        """
+
+        self.fileobj = fileobj
+        self.fields = fields or FLAT_PET_FIELDS
+        self._writer = csv.DictWriter(
+            fileobj, self.fields, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write_batch(self, records):
+        """
+        :param list records: The records to write.
+        """
+
+        rows = []
+        for record in records:
+            row = flatten_pet_record(record)
+            for field in _FLAT_LIST_FIELDS:
+                row[field] = LIST_SEPARATOR.join(
+                    value for value in row[field] if value)
+            rows.append(row)
+        self._writer.writerows(rows)
+
+    def close(self):
+        self.fileobj.flush()
+
+
+class ParquetWriter(object):
+    """
+    Writes pet records out to a Parquet file, flattened with
+    :py:func:`flatten_pet_record`. Each batch becomes a row group. Requires
+    pyarrow.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: The file to write to.
+        """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetWriter requires pyarrow to be installed.")
+        self._pa = pyarrow
+        list_type = pyarrow.list_(pyarrow.string())
+        self.schema = pyarrow.schema([
+            (field, list_type if field in _FLAT_LIST_FIELDS else pyarrow.string())
+            for field in FLAT_PET_FIELDS
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_batch(self, records):
+        """
+        :param list records: The records to write.
+        """
+
+        rows = [flatten_pet_record(record) for record in records]
+        columns = [
+            self._pa.array([row[field] for row in rows], type=col_type)
+            for field, col_type in zip(FLAT_PET_FIELDS, self.schema.types)
+        ]
+        self._writer.write_table(
+            self._pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def export_shelters(client, shelter_ids, writer, batch_size=500,
+                    max_workers=4, queue_size=1000, output="full"):
+    """
+    Fetches the pets at each of the given shelters, and hands them to the
+    writer in batches.
+
+    :param petfinder.PetFinderClient client: The client to fetch with.
+    :param iterable shelter_ids: The shelters to export. Consumed lazily.
+    :param writer: One of the writers in this module (or anything with a
+        ``write_batch(records)`` method).
+    :keyword int batch_size: The number of records to hand the writer at a
+        time.
+    :keyword int max_workers: The number of shelters to fetch at once.
+    :keyword int queue_size: The maximum number of records fetched but not
+        yet handed to the writer. Once there are this many, fetching waits
+        on the writer.
+    :keyword str output: The ``output`` to pass to ``shelter_getpets``.
+        Either ``"basic"`` or ``"full"``.
+    :rtype: dict
+    :returns: A dict with ``shelters`` and ``records`` counts.
+    :raises: :py:exc:`ValueError` if ``output`` doesn't give whole
+        records.
+    """
+
+    if output not in RECORD_OUTPUT_MODES:
+        raise ValueError(
+            "Can't export with output=%r, use 'basic' or 'full'." % (output,))
+
+    stats = {"shelters": 0, "records": 0}
+    stats_lock = threading.Lock()
+
+    def make_fetch(shelter_id):
+        def fetch():
+            count = 0
+            try:
+                for record in client.shelter_getpets(
+                    id=shelter_id, output=output,
+                ):
+                    yield record
+                    count += 1
+            except RecordDoesNotExistError:
+                # No pets.
+                pass
+            logger.debug("Fetched %d pets from %s", count, shelter_id)
+            with stats_lock:
+                stats["shelters"] += 1
+        return fetch
+
+    batch = []
+    for _, record in merge_iterables(
+        (make_fetch(shelter_id) for shelter_id in shelter_ids),
+        max_workers=max_workers, queue_size=queue_size,
+    ):
+        stats["records"] += 1
+        batch.append(record)
+        if len(batch) >= batch_size:
+            writer.write_batch(batch)
+            batch = []
+    if batch:
+        writer.write_batch(batch)
+    return stats
+
+
+def export_region(client, writer, batch_size=500, max_workers=4,
+                  queue_size=1000, output="full", **kwargs):
+    """
+    Exports the pets at every shelter ``shelter_find`` turns up. Takes the
+    same arguments as :py:func:`export_shelters`, plus the kwargs for
+    :py:meth:`petfinder.PetFinderClient.shelter_find` (``location`` and so
+    on).
+
+    :rtype: dict
+    :returns: A dict with ``shelters`` and ``records`` counts.
+    :raises: :py:exc:`ValueError` if ``output`` doesn't give whole
+        records.
+    """
+
+    shelter_ids = (shelter["id"] for shelter in client.shelter_find(**kwargs))
+    return export_shelters(
+        client, shelter_ids, writer, batch_size=batch_size,
+        max_workers=max_workers, queue_size=queue_size, output=output,
+    )
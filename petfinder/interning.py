@@ -0,0 +1,128 @@
+"""
+Value interning for records. Across a large inventory, the same handful of
+values (``"Dog"``, ``"M"``, ``"Adult"``, breed names, options, states) turn
+up over and over, and each record would otherwise hold its own copy of each
+one. So do the keys of every record dict, which come fresh out of the
+parser for each record.
+
+Pass a :py:class:`ValueTable` to the client's ``value_table`` keyword, and
+every record it builds is run through the table: keys and categorical values
+are swapped for a single shared copy. Records look exactly the same, they
+just take up less room. A table may be shared by any number of clients.
+
+The table can also hand out small integer codes for values, for
+dictionary-encoded columns.
+"""
+
+import threading
+
+# Pet fields whose values come from a small set.
+CATEGORICAL_PET_FIELDS = (
+    "animal", "mix", "age", "sex", "size", "status", "shelterId",
+)
+# Contact and shelter fields that repeat between records.
+CATEGORICAL_LOCATION_FIELDS = ("city", "state", "zip", "country")
+
+
+class ValueTable(object):
+    """
+    A table of shared values. Thread-safe.
+    """
+
+    def __init__(self):
+        # value -> the shared copy of it.
+        self._values = {}
+        # value -> code, and code -> value.
+        self._codes = {}
+        self._codes_lock = threading.Lock()
+        self.values = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def intern(self, value):
+        """
+        :param value: A (hashable) value.
+        :returns: The table's copy of ``value``.
+        """
+
+        # setdefault is atomic, so two threads interning the same new value
+        # still end up with the same copy.
+        return self._values.setdefault(value, value)
+
+    def encode(self, value):
+        """
+        :param value: A (hashable) value.
+        :rtype: int
+        :returns: The value's code. Codes start at 0, and are handed out in
+            the order values are first seen.
+        """
+
+        code = self._codes.get(value)
+        if code is None:
+            with self._codes_lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(self.intern(value))
+                    self._codes[value] = code
+        return code
+
+    def decode(self, code):
+        """
+        :param int code: A code from :py:meth:`encode`.
+        :returns: The value the code stands for.
+        """
+
+        return self.values[code]
+
+    def intern_pet_record(self, record):
+        """
+        Interns the keys and categorical values of a pet record dict.
+
+        :param dict record: A pet record, as built by the client.
+        :rtype: dict
+        :returns: A copy of the record, with its keys and categorical values
+            interned.
+        """
+
+        intern = self._values.setdefault
+        record = dict((intern(key, key), value) for key, value in record.items())
+        for field in CATEGORICAL_PET_FIELDS:
+            value = record.get(field)
+            if value is not None:
+                record[field] = intern(value, value)
+        record["breeds"] = [intern(breed, breed) for breed in record["breeds"]]
+        record["options"] = [
+            intern(option, option) for option in record["options"]]
+        photos = record["photos"] = [dict(photo) for photo in record["photos"]]
+        for photo in photos:
+            photo["id"] = intern(photo["id"], photo["id"])
+            photo["size"] = intern(photo["size"], photo["size"])
+        contact = record["contact"]
+        if contact:
+            contact = record["contact"] = dict(
+                (intern(key, key), value) for key, value in contact.items())
+            for field in CATEGORICAL_LOCATION_FIELDS:
+                value = contact.get(field)
+                if value is not None:
+                    contact[field] = intern(value, value)
+        return record
+
+    def intern_shelter_record(self, record):
+        """
+        Interns the keys and location values of a shelter record dict.
+
+        :param dict record: A shelter record, as built by the client.
+        :rtype: dict
+        :returns: A copy of the record, with its keys and location values
+            interned.
+        """
+
+        intern = self._values.setdefault
+        record = dict((intern(key, key), value) for key, value in record.items())
+        for field in CATEGORICAL_LOCATION_FIELDS:
+            value = record.get(field)
+            if value is not None:
+                record[field] = intern(value, value)
+        return record
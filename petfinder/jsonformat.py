@@ -0,0 +1,207 @@
+"""
+Support for the API's JSON responses (``format=json``). Pass
+``response_format="json"`` to the client to use them.
+
+The API's JSON is a straight translation of its XML: each element becomes
+an object keyed by tag, with its text under ``"$t"`` and its attributes
+under ``"@name"``. An element that appears more than once becomes a list,
+and an empty element becomes ``{}``. The record builders here walk that
+structure directly, and produce exactly the same records as the XML
+parsers in :py:class:`petfinder.client.BasePetFinderClient`.
+
+The fastest JSON decoder available is used: orjson_, then ujson_, then the
+standard library's :py:mod:`json`.
+
+.. _orjson: https://github.com/ijl/orjson
+.. _ujson: https://github.com/ultrajson/ultrajson
+"""
+
+import json
+
+from lxml import etree
+
+try:
+    import orjson
+    loads = orjson.loads
+    DECODER = "orjson"
+except ImportError:
+    try:
+        import ujson
+        loads = ujson.loads
+        DECODER = "ujson"
+    except ImportError:
+        loads = json.loads
+        DECODER = "json"
+
+
+def get_text(node):
+    """
+    :param dict node: An element's object.
+    :rtype: str or None
+    :returns: The element's text, or ``None`` if it was empty.
+    """
+
+    if node is None:
+        return None
+    return node.get("$t")
+
+
+def as_list(node):
+    """
+    :param node: An element's object, a list of them, or ``None``.
+    :rtype: list
+    :returns: The element objects, as a list, whether there were none, one,
+        or several.
+    """
+
+    if node is None:
+        return []
+    if isinstance(node, list):
+        return node
+    return [node]
+
+
+class JSONDocument(object):
+    """
+    Stand-in for the root Element of an XML response, wrapping the decoded
+    ``petfinder`` object. Supports the simple ``find``/``findall`` path
+    lookups that the client's wrapper methods use, returning element
+    objects (dicts) rather than Elements.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        """
+        :param dict data: The ``petfinder`` object from a decoded response.
+        """
+
+        self.data = data
+
+    def find(self, path):
+        """
+        :param str path: A ``/`` separated path of tags, like
+            ``"header/status/code"``.
+        :returns: The first matching element object, or ``None``.
+        """
+
+        node = self.data
+        for tag in path.split("/"):
+            if isinstance(node, list):
+                node = node[0]
+            node = node.get(tag)
+            if node is None:
+                return None
+        if isinstance(node, list):
+            return node[0]
+        return node
+
+    def findall(self, path):
+        """
+        :param str path: A ``/`` separated path of tags, like
+            ``"pets/pet"``. Only the last tag may repeat.
+        :rtype: list
+        :returns: All of the matching element objects.
+        """
+
+        parent, _, tag = path.rpartition("/")
+        node = self.find(parent) if parent else self.data
+        if node is None:
+            return []
+        return as_list(node.get(tag))
+
+
+def parse_document(content):
+    """
+    :param bytes content: A JSON response body.
+    :rtype: JSONDocument
+    """
+
+    return JSONDocument(loads(content)["petfinder"])
+
+
+def build_pet_record(node, text_fields):
+    """
+    Builds a pet record from a pet object. ``lastUpdate`` is left as a
+    string, same as the XML parser's first pass.
+
+    :param dict node: A pet object.
+    :param iterable text_fields: The fields whose text is copied straight
+        over to the record.
+    :rtype: dict
+    """
+
+    record = {
+        "breeds": [get_text(breed) for breed in as_list(
+            (node.get("breeds") or {}).get("breed"))],
+        "photos": [
+            {
+                "id": photo.get("@id"),
+                "size": photo.get("@size"),
+                "url": photo.get("$t"),
+            }
+            for photo in as_list(
+                ((node.get("media") or {}).get("photos") or {}).get("photo"))
+        ],
+        "options": [get_text(option) for option in as_list(
+            (node.get("options") or {}).get("option"))],
+        "contact": dict(
+            (tag, get_text(value))
+            for tag, value in (node.get("contact") or {}).items()
+        ),
+    }
+    for tag in text_fields:
+        value = node.get(tag)
+        if value is not None:
+            record[tag] = value.get("$t")
+    return record
+
+
+def build_shelter_record(node):
+    """
+    :param dict node: A shelter object.
+    :rtype: dict
+    """
+
+    return dict(
+        (tag, get_text(value)) for tag, value in node.items()
+        if not tag.startswith("@")
+    )
+
+
+def _element_to_object(element):
+    node = {}
+    for name, value in element.attrib.items():
+        # Namespaced attributes (xsi:...) don't matter to anybody.
+        if not name.startswith("{"):
+            node["@" + name] = value
+    for child in element.iterchildren(tag=etree.Element):
+        value = _element_to_object(child)
+        existing = node.get(child.tag)
+        if existing is None:
+            node[child.tag] = value
+        elif isinstance(existing, list):
+            existing.append(value)
+        else:
+            node[child.tag] = [existing, value]
+    if len(element) == 0 and element.text is not None:
+        node["$t"] = element.text
+    return node
+
+
+def xml_to_json(content):
+    """
+    Converts an XML response body to the equivalent JSON response body,
+    as the API would have sent it for ``format=json``. Handy for turning
+    recorded XML responses into JSON ones.
+
+    :param bytes content: An XML response body.
+    :rtype: bytes
+    """
+
+    root = etree.fromstring(content)
+    return json.dumps({
+        "@encoding": "iso-8859-1",
+        "@version": "1.0",
+        root.tag: _element_to_object(root),
+    }).encode("utf-8")
@@ -0,0 +1,330 @@
+"""
+Instrumentation for :py:class:`petfinder.PetFinderClient`. Pass a
+:py:class:`Metrics` instance to the client's ``metrics`` keyword, and it
+will keep track of:
+
+* Per-method latency histograms, split up by phase: ``network`` (sending
+  the request and reading the response body), ``parse`` (turning the body
+  into a document and checking its status), ``record`` (building records
+  from the document), and ``total`` (the whole API call, retries and all,
+  as the caller sees it).
+* Bytes received per method.
+* Pages per pagination chain, and records per page.
+* Errors per method, by exception class.
+
+Example::
+
+    from petfinder.metrics import Metrics, StatsDSink, render_prometheus
+
+    metrics = Metrics(sinks=[StatsDSink("localhost", 8125)])
+    api = petfinder.PetFinderClient(key, secret, metrics=metrics)
+    ...
+    print(render_prometheus(metrics))
+
+With ``streaming=True``, pages are parsed as they download, so time spent
+parsing and downloading the body of paginated calls is counted under
+``record``, and ``network`` only covers the response header.
+"""
+
+import bisect
+import socket
+import threading
+
+PHASES = ("network", "parse", "record", "total")
+
+# In seconds.
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# For pages per chain and records per page.
+DEFAULT_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Histogram(object):
+    """
+    A fixed-bucket histogram, in the Prometheus style: each bucket counts
+    the observations less than or equal to its upper bound.
+    """
+
+    def __init__(self, buckets):
+        """
+        :param iterable buckets: The upper bounds of the buckets. A final
+            ``+Inf`` bucket is implied.
+        """
+
+        self.buckets = tuple(sorted(buckets))
+        # One more than the number of bounds, for +Inf.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        :param float value: The value to add.
+        """
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :returns: A dict with ``buckets`` (a list of ``(upper bound,
+            cumulative count)`` tuples, ending with ``+Inf``), ``sum``, and
+            ``count`` keys.
+        """
+
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+
+class Metrics(object):
+    """
+    Collects measurements from one or more clients. Thread-safe.
+
+    Every measurement is also handed to each of the ``sinks``, for pushing
+    on to a metrics system as it happens. A sink is any object with
+    ``timing(name, seconds, tags)``, ``histogram(name, value, tags)``, and
+    ``increment(name, value, tags)`` methods, where ``tags`` is a dict.
+    """
+
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS,
+                 count_buckets=DEFAULT_COUNT_BUCKETS, sinks=None):
+        """
+        :keyword iterable latency_buckets: The bucket bounds (in seconds)
+            for the latency histograms.
+        :keyword iterable count_buckets: The bucket bounds for the pages per
+            chain and records per page histograms.
+        :keyword list sinks: Optionally, sinks to push measurements to.
+        """
+
+        self.latency_buckets = latency_buckets
+        self.count_buckets = count_buckets
+        self.sinks = list(sinks or [])
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Throws away everything collected so far.
+        """
+
+        with self._lock:
+            # (method, phase) -> Histogram
+            self.latency = {}
+            # method -> Histogram
+            self.pages_per_chain = {}
+            self.records_per_page = {}
+            # method -> int
+            self.bytes_received = {}
+            # (method, exception class name) -> int
+            self.errors = {}
+
+    def _observe(self, histograms, key, buckets, value):
+        with self._lock:
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def observe_latency(self, method, phase, seconds):
+        """
+        :param str method: The API method name.
+        :param str phase: One of :py:data:`PHASES`.
+        :param float seconds: How long the phase took.
+        """
+
+        self._observe(
+            self.latency, (method, phase), self.latency_buckets, seconds)
+        for sink in self.sinks:
+            sink.timing("latency", seconds, {"method": method, "phase": phase})
+
+    def observe_pages_per_chain(self, method, pages):
+        """
+        :param str method: The API method name.
+        :param int pages: The number of pages a paginated call went through.
+        """
+
+        self._observe(
+            self.pages_per_chain, method, self.count_buckets, pages)
+        for sink in self.sinks:
+            sink.histogram("pages_per_chain", pages, {"method": method})
+
+    def observe_records_per_page(self, method, records):
+        """
+        :param str method: The API method name.
+        :param int records: The number of records on a page.
+        """
+
+        self._observe(
+            self.records_per_page, method, self.count_buckets, records)
+        for sink in self.sinks:
+            sink.histogram("records_per_page", records, {"method": method})
+
+    def add_bytes(self, method, count):
+        """
+        :param str method: The API method name.
+        :param int count: The number of response bytes received.
+        """
+
+        with self._lock:
+            self.bytes_received[method] = (
+                self.bytes_received.get(method, 0) + count)
+        for sink in self.sinks:
+            sink.increment("bytes_received", count, {"method": method})
+
+    def add_error(self, method, exc):
+        """
+        :param str method: The API method name.
+        :param Exception exc: The error the call failed with.
+        """
+
+        key = (method, type(exc).__name__)
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+        for sink in self.sinks:
+            sink.increment("errors", 1, {"method": method, "error": key[1]})
+
+    def snapshot(self):
+        """
+        :rtype: dict
+        :returns: A copy of everything collected so far, with ``latency``,
+            ``pages_per_chain``, ``records_per_page``, ``bytes_received``,
+            and ``errors`` keys. Histograms are given as
+            :py:meth:`Histogram.to_dict` dicts.
+        """
+
+        with self._lock:
+            return {
+                "latency": dict(
+                    (key, histogram.to_dict())
+                    for key, histogram in self.latency.items()),
+                "pages_per_chain": dict(
+                    (key, histogram.to_dict())
+                    for key, histogram in self.pages_per_chain.items()),
+                "records_per_page": dict(
+                    (key, histogram.to_dict())
+                    for key, histogram in self.records_per_page.items()),
+                "bytes_received": dict(self.bytes_received),
+                "errors": dict(self.errors),
+            }
+
+
+def _format_labels(labels):
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def _render_histograms(lines, name, help_text, histograms, label_names):
+    lines.append("# HELP %s %s" % (name, help_text))
+    lines.append("# TYPE %s histogram" % name)
+    for key in sorted(histograms):
+        values = key if isinstance(key, tuple) else (key,)
+        labels = list(zip(label_names, values))
+        histogram = histograms[key]
+        for bound, count in histogram["buckets"]:
+            lines.append("%s_bucket%s %d" % (
+                name, _format_labels(labels + [("le", _format_bound(bound))]),
+                count))
+        lines.append("%s_sum%s %r" % (
+            name, _format_labels(labels), float(histogram["sum"])))
+        lines.append("%s_count%s %d" % (
+            name, _format_labels(labels), histogram["count"]))
+
+
+def render_prometheus(metrics, namespace="petfinder"):
+    """
+    Renders everything collected so far in the Prometheus text exposition
+    format, ready to be served up from a ``/metrics`` endpoint.
+
+    :param Metrics metrics: The metrics to render.
+    :keyword str namespace: Prefixed to every metric name.
+    :rtype: str
+    """
+
+    snapshot = metrics.snapshot()
+    lines = []
+    _render_histograms(
+        lines, "%s_call_duration_seconds" % namespace,
+        "Time spent in each phase of an API call.",
+        snapshot["latency"], ("method", "phase"))
+    _render_histograms(
+        lines, "%s_pages_per_chain" % namespace,
+        "Pages fetched per paginated call.",
+        snapshot["pages_per_chain"], ("method",))
+    _render_histograms(
+        lines, "%s_records_per_page" % namespace,
+        "Records per page of a paginated call.",
+        snapshot["records_per_page"], ("method",))
+
+    name = "%s_received_bytes_total" % namespace
+    lines.append("# HELP %s Response bytes received." % name)
+    lines.append("# TYPE %s counter" % name)
+    for method, count in sorted(snapshot["bytes_received"].items()):
+        lines.append("%s%s %d" % (
+            name, _format_labels([("method", method)]), count))
+
+    name = "%s_errors_total" % namespace
+    lines.append("# HELP %s Failed API calls, by exception class." % name)
+    lines.append("# TYPE %s counter" % name)
+    for (method, error), count in sorted(snapshot["errors"].items()):
+        lines.append("%s%s %d" % (
+            name, _format_labels([("method", method), ("error", error)]),
+            count))
+    return "\n".join(lines) + "\n"
+
+
+class StatsDSink(object):
+    """
+    Pushes measurements to a StatsD server over UDP, as they happen. Tags
+    are folded into the metric name (``petfinder.latency.pet_get.network``,
+    for example), since plain StatsD doesn't support them. Sends are
+    fire-and-forget; if the server isn't there, nothing breaks.
+    """
+
+    def __init__(self, host="localhost", port=8125, prefix="petfinder"):
+        """
+        :keyword str host: The StatsD server's host.
+        :keyword int port: The StatsD server's port.
+        :keyword str prefix: Prefixed to every metric name.
+        """
+
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _name(self, name, tags):
+        parts = [self.prefix, name]
+        for key in ("method", "phase", "error"):
+            if key in tags:
+                parts.append(tags[key].replace(".", "_"))
+        return ".".join(parts)
+
+    def _send(self, line):
+        try:
+            self._socket.sendto(line.encode("utf-8"), self.address)
+        except socket.error:
+            pass
+
+    def timing(self, name, seconds, tags):
+        self._send("%s:%.3f|ms" % (self._name(name, tags), seconds * 1000))
+
+    def histogram(self, name, value, tags):
+        self._send("%s:%d|h" % (self._name(name, tags), value))
+
+    def increment(self, name, value, tags):
+        self._send("%s:%d|c" % (self._name(name, tags), value))
+
+    def close(self):
+        self._socket.close()
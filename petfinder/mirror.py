@@ -0,0 +1,378 @@
+"""
+A local SQLite mirror of pet and shelter records. Fill it up with records
+from the client (or a :py:class:`petfinder.sync.ShelterSync`), and then
+search it with :py:meth:`MirrorStore.pet_find`, which takes the same
+keyword arguments as :py:meth:`petfinder.PetFinderClient.pet_find`, without
+going anywhere near the network.
+
+Example::
+
+    from petfinder.mirror import MirrorStore
+
+    mirror = MirrorStore("petfinder.db")
+    mirror.store_pets(api.shelter_getpets(id="GA137", output="full"))
+    for pet in mirror.pet_find(animal="dog", location="29678", breed="Beagle"):
+        print(pet["name"])
+"""
+
+import datetime
+import itertools
+import json
+import re
+import sqlite3
+import threading
+
+from petfinder.client import TIMESTAMP_FORMAT, BasePetFinderClient
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.records import as_dict
+from petfinder.sync import ADDED, REMOVED, UPDATED
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pets (
+    id TEXT PRIMARY KEY,
+    shelter_id TEXT COLLATE NOCASE,
+    animal TEXT COLLATE NOCASE,
+    size TEXT COLLATE NOCASE,
+    age TEXT COLLATE NOCASE,
+    sex TEXT COLLATE NOCASE,
+    status TEXT COLLATE NOCASE,
+    city TEXT COLLATE NOCASE,
+    state TEXT COLLATE NOCASE,
+    zip TEXT,
+    last_update TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pet_breeds (
+    pet_id TEXT NOT NULL REFERENCES pets (id) ON DELETE CASCADE,
+    breed TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS shelters (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    city TEXT COLLATE NOCASE,
+    state TEXT COLLATE NOCASE,
+    zip TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pets_animal ON pets (animal);
+CREATE INDEX IF NOT EXISTS pets_size ON pets (size);
+CREATE INDEX IF NOT EXISTS pets_age ON pets (age);
+CREATE INDEX IF NOT EXISTS pets_sex ON pets (sex);
+CREATE INDEX IF NOT EXISTS pets_status ON pets (status);
+CREATE INDEX IF NOT EXISTS pets_shelter_id ON pets (shelter_id);
+CREATE INDEX IF NOT EXISTS pets_zip ON pets (zip);
+CREATE INDEX IF NOT EXISTS pets_state_city ON pets (state, city);
+CREATE INDEX IF NOT EXISTS pet_breeds_breed ON pet_breeds (breed, pet_id);
+CREATE INDEX IF NOT EXISTS pet_breeds_pet_id ON pet_breeds (pet_id);
+CREATE INDEX IF NOT EXISTS shelters_zip ON shelters (zip);
+CREATE INDEX IF NOT EXISTS shelters_state_city ON shelters (state, city);
+"""
+
+# pet_find kwargs that map straight to a pets column.
+_PET_FILTER_COLUMNS = {
+    "animal": "animal",
+    "size": "size",
+    "sex": "sex",
+    "age": "age",
+    "status": "status",
+    "shelterid": "shelter_id",
+}
+
+_ZIP_RE = re.compile(r"^\d{5}(-\d{4})?$")
+
+
+def _encode_record(record):
+    """
+    :param dict record: A record dict.
+    :rtype: str
+    :returns: The record, as JSON.
+    """
+
+    record = dict(record)
+    if isinstance(record.get("lastUpdate"), datetime.datetime):
+        record["lastUpdate"] = record["lastUpdate"].strftime(TIMESTAMP_FORMAT)
+    return json.dumps(record)
+
+
+def _decode_pet_record(data):
+    """
+    :param str data: A pet record, as JSON.
+    :rtype: dict
+    :returns: The record dict, just as the client would have built it.
+    """
+
+    record = json.loads(data)
+    if record.get("lastUpdate"):
+        record["lastUpdate"] = BasePetFinderClient._parse_datetime_str(
+            record["lastUpdate"])
+    return record
+
+
+def _parse_location(location):
+    """
+    Splits a pet.find style location into the columns to match on.
+
+    :param str location: A ZIP code, ``"City, ST"``, or a state
+        abbreviation.
+    :rtype: dict
+    :returns: A dict of column names to values.
+    """
+
+    location = location.strip()
+    if _ZIP_RE.match(location):
+        return {"zip": location[:5]}
+    if "," in location:
+        city, state = [part.strip() for part in location.rsplit(",", 1)]
+        return {"city": city, "state": state}
+    if len(location) == 2:
+        return {"state": location}
+    return {"city": location}
+
+
+def _get_pet_rows(record):
+    """
+    :param dict record: A pet record dict.
+    :rtype: tuple
+    :returns: The record's ``pets`` row, and a list of its ``pet_breeds``
+        rows.
+    """
+
+    contact = record.get("contact") or {}
+    last_update = record.get("lastUpdate")
+    if isinstance(last_update, datetime.datetime):
+        last_update = last_update.strftime(TIMESTAMP_FORMAT)
+    pet_row = (
+        record["id"], record.get("shelterId"), record.get("animal"),
+        record.get("size"), record.get("age"), record.get("sex"),
+        record.get("status"), contact.get("city"), contact.get("state"),
+        contact.get("zip"), last_update, _encode_record(record),
+    )
+    breed_rows = [(record["id"], breed) for breed in record.get("breeds", ())
+                  if breed]
+    return pet_row, breed_rows
+
+
+def _get_shelter_row(record):
+    """
+    :param dict record: A shelter record dict.
+    :rtype: tuple
+    :returns: The record's ``shelters`` row.
+    """
+
+    return (
+        record["id"], record.get("name"), record.get("city"),
+        record.get("state"), record.get("zip"), _encode_record(record),
+    )
+
+
+class MirrorStore(object):
+    """
+    SQLite-backed store of pet and shelter records, with indexes on the
+    fields ``pet.find`` can filter on. Thread-safe.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: Path to the SQLite database file. It is created if
+            it doesn't exist. ``":memory:"`` works, too.
+        """
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+
+        self._conn.close()
+
+    def store_pets(self, records, batch_size=500):
+        """
+        Adds or replaces pet records.
+
+        :param iterable records: Pet records, in any of the forms the client
+            builds. This can be a generator straight from the client; records
+            are gathered up ``batch_size`` at a time before the database is
+            locked, so other threads aren't kept waiting on the network.
+        :keyword int batch_size: The number of records to store in each
+            transaction.
+        :rtype: int
+        :returns: The number of records stored.
+        """
+
+        count = 0
+        records = iter(records)
+        while True:
+            rows = [_get_pet_rows(as_dict(record))
+                    for record in itertools.islice(records, batch_size)]
+            if not rows:
+                return count
+            with self._lock:
+                with self._conn:
+                    for pet_row, breed_rows in rows:
+                        self._store_pet(pet_row, breed_rows)
+            count += len(rows)
+
+    def store_pet(self, record):
+        """
+        Adds or replaces a single pet record.
+
+        :param record: A pet record, in any of the forms the client builds.
+        """
+
+        self.store_pets([record])
+
+    def _store_pet(self, pet_row, breed_rows):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pets (id, shelter_id, animal, size, age, "
+            "sex, status, city, state, zip, last_update, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            pet_row
+        )
+        self._conn.execute(
+            "DELETE FROM pet_breeds WHERE pet_id = ?", (pet_row[0],))
+        self._conn.executemany(
+            "INSERT INTO pet_breeds (pet_id, breed) VALUES (?, ?)",
+            breed_rows
+        )
+
+    def delete_pets(self, pet_ids):
+        """
+        :param iterable pet_ids: The IDs of the pets to remove.
+        """
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM pets WHERE id = ?",
+                    [(pet_id,) for pet_id in pet_ids]
+                )
+
+    def store_shelters(self, records, batch_size=500):
+        """
+        Adds or replaces shelter records.
+
+        :param iterable records: Shelter records, in any of the forms the
+            client builds. As with :py:meth:`store_pets`, these are gathered
+            up ``batch_size`` at a time before the database is locked.
+        :keyword int batch_size: The number of records to store in each
+            transaction.
+        :rtype: int
+        :returns: The number of records stored.
+        """
+
+        count = 0
+        records = iter(records)
+        while True:
+            rows = [_get_shelter_row(as_dict(record))
+                    for record in itertools.islice(records, batch_size)]
+            if not rows:
+                return count
+            with self._lock:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO shelters "
+                        "(id, name, city, state, zip, record) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+            count += len(rows)
+
+    def apply_sync_events(self, events):
+        """
+        Applies a stream of :py:class:`petfinder.sync.SyncEvent` tuples to
+        the mirror, passing each event through once it has been applied.
+
+        :param iterable events: Events from a
+            :py:class:`petfinder.sync.ShelterSync` run.
+        :rtype: generator
+        :returns: A generator of the same events.
+        """
+
+        for event in events:
+            if event.type in (ADDED, UPDATED):
+                self.store_pet(event.record)
+            elif event.type == REMOVED:
+                self.delete_pets([event.pet_id])
+            yield event
+
+    def pet_get(self, id):
+        """
+        Offline pet.get.
+
+        :param str id: The pet's Petfinder ID.
+        :rtype: dict or None
+        :returns: The pet's record dict, or ``None`` if it isn't mirrored.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM pets WHERE id = ?", (str(id),)).fetchone()
+        return _decode_pet_record(row[0]) if row else None
+
+    def shelter_get(self, id):
+        """
+        Offline shelter.get.
+
+        :param str id: The shelter's ID.
+        :rtype: dict or None
+        :returns: The shelter's record dict, or ``None`` if it isn't
+            mirrored.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM shelters WHERE id = ?", (id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pet_find(self, **kwargs):
+        """
+        Offline pet.find. Accepts the same kwargs as
+        :py:meth:`petfinder.PetFinderClient.pet_find`: ``animal``, ``breed``,
+        ``size``, ``sex``, ``age``, ``location``, ``shelterid``, and
+        ``offset``. ``status`` may be passed too. ``location`` is matched
+        against each pet's contact ZIP code, ``"City, ST"``, or state; there
+        is no distance searching. Any other kwargs (``output``, ``count``,
+        ``format``) are ignored.
+
+        :rtype: generator
+        :returns: A generator of matching pet record dicts, in numeric ID
+            order.
+        :raises: :py:exc:`petfinder.exceptions.RecordDoesNotExistError` if
+            nothing matches, just as the API does.
+        """
+
+        clauses = []
+        params = []
+        for kwarg, column in _PET_FILTER_COLUMNS.items():
+            if kwargs.get(kwarg) is not None:
+                clauses.append("pets.%s = ?" % column)
+                params.append(kwargs[kwarg])
+        if kwargs.get("location"):
+            for column, value in _parse_location(kwargs["location"]).items():
+                clauses.append("pets.%s = ?" % column)
+                params.append(value)
+        if kwargs.get("breed"):
+            clauses.append(
+                "pets.id IN (SELECT pet_id FROM pet_breeds WHERE breed = ?)")
+            params.append(kwargs["breed"])
+
+        query = "SELECT record FROM pets"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        # IDs are stored as text, but should sort as numbers.
+        query += (" ORDER BY CAST(pets.id AS INTEGER), pets.id"
+                  " LIMIT -1 OFFSET ?")
+        params.append(int(kwargs.get("offset") or 0))
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        if not rows:
+            raise RecordDoesNotExistError("Record does not exist")
+        for row in rows:
+            yield _decode_pet_record(row[0])
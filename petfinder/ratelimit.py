@@ -0,0 +1,203 @@
+"""
+Client-side rate limiting, to keep you under your Petfinder API quota
+instead of finding out you've gone over it halfway through a long crawl.
+
+Pass a :py:class:`RateLimiter` to :py:class:`petfinder.PetFinderClient` via
+its ``rate_limiter`` keyword. A limiter may be shared by any number of
+clients and threads. To share a budget between processes on the same host,
+give each process's limiter a :py:class:`FileBackend` pointed at the same
+file.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from petfinder.exceptions import ClientRateLimitExceeded
+
+try:
+    import fcntl
+except ImportError:
+    # Windows.
+    fcntl = None
+
+SECONDS_PER_DAY = 60 * 60 * 24
+
+
+class MemoryBackend(object):
+    """
+    Keeps the limiter's state in memory. Shared across threads, but not
+    processes. This is the default.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    @contextmanager
+    def locked_state(self):
+        """
+        Holds the lock for the duration of the ``with`` block.
+
+        :rtype: dict
+        :returns: The limiter's mutable state dict.
+        """
+
+        with self._lock:
+            yield self._state
+
+
+class FileBackend(object):
+    """
+    Keeps the limiter's state in a small JSON file, guarded by an exclusive
+    ``flock``. Every process using a ``FileBackend`` on the same path shares
+    the same budget. Requires a POSIX platform.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: Path to the state file. It is created if it
+            doesn't exist.
+        """
+
+        if fcntl is None:
+            raise RuntimeError("FileBackend requires fcntl (POSIX only).")
+        self.path = path
+        # flock is per file descriptor, so we still need this to keep our
+        # own threads in line.
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def locked_state(self):
+        """
+        Holds the file lock for the duration of the ``with`` block, writing
+        any changes to the state back out when it exits.
+
+        :rtype: dict
+        :returns: The limiter's mutable state dict.
+        """
+
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                with os.fdopen(os.dup(fd), "r+") as state_file:
+                    contents = state_file.read()
+                    state = json.loads(contents) if contents else {}
+                    yield state
+                    state_file.seek(0)
+                    state_file.truncate()
+                    state_file.write(json.dumps(state))
+            finally:
+                # Closing the descriptor releases the lock.
+                os.close(fd)
+
+
+class RateLimiter(object):
+    """
+    A token bucket limiting the number of requests per second, plus an
+    optional daily budget. Daily budgets reset at midnight UTC.
+
+    When the per-second rate is exceeded, :py:meth:`acquire` either waits
+    for a token to free up (``block=True``, the default) or raises
+    :py:exc:`petfinder.exceptions.ClientRateLimitExceeded` right away. Once
+    the daily budget is used up, it always raises, rather than waiting until
+    tomorrow.
+    """
+
+    def __init__(self, per_second=None, per_day=None, burst=None, block=True,
+                 backend=None):
+        """
+        :keyword float per_second: The sustained number of requests allowed
+            per second. ``None`` for no limit.
+        :keyword int per_day: The number of requests allowed per day.
+            ``None`` for no limit.
+        :keyword int burst: The number of requests that can be made back to
+            back, after a period of inactivity. Defaults to ``per_second``
+            (or 1, if that is lower).
+        :keyword bool block: If ``True``, wait for the per-second rate to
+            allow a request. If ``False``, fail fast instead.
+        :keyword backend: Where to keep the limiter's state. Defaults to a
+            :py:class:`MemoryBackend`.
+        """
+
+        self.per_second = per_second
+        self.per_day = per_day
+        if burst is None and per_second is not None:
+            burst = max(per_second, 1)
+        self.burst = burst
+        self.block = block
+        self.backend = backend or MemoryBackend()
+
+    def _try_acquire(self, state, now):
+        """
+        Tries to take a request's worth of budget.
+
+        :param dict state: The limiter's state, from the backend.
+        :param float now: The current time.
+        :raises: :py:exc:`petfinder.exceptions.ClientRateLimitExceeded` if
+            the daily budget has been used up.
+        :rtype: float
+        :returns: ``0`` if the request may proceed, otherwise the number of
+            seconds until it may.
+        """
+
+        if self.per_day is not None:
+            day = int(now // SECONDS_PER_DAY)
+            if state.get("day") != day:
+                state["day"] = day
+                state["day_count"] = 0
+            if state["day_count"] >= self.per_day:
+                raise ClientRateLimitExceeded(
+                    "Daily budget of %d requests used up." % self.per_day)
+
+        if self.per_second is not None:
+            last = state.get("last", now)
+            tokens = min(
+                self.burst,
+                state.get("tokens", self.burst) + (now - last) * self.per_second
+            )
+            state["last"] = now
+            if tokens < 1:
+                state["tokens"] = tokens
+                return (1 - tokens) / self.per_second
+            state["tokens"] = tokens - 1
+
+        if self.per_day is not None:
+            state["day_count"] += 1
+        return 0
+
+    def acquire(self):
+        """
+        Call before every request. Returns once the request may proceed.
+
+        :raises: :py:exc:`petfinder.exceptions.ClientRateLimitExceeded` if
+            the daily budget has been used up, or if the per-second rate has
+            been exceeded and the limiter isn't blocking.
+        """
+
+        while True:
+            with self.backend.locked_state() as state:
+                wait = self._try_acquire(state, time.time())
+            if not wait:
+                return
+            if not self.block:
+                raise ClientRateLimitExceeded(
+                    "Rate of %s requests/second exceeded." % self.per_second)
+            time.sleep(wait)
+
+    def remaining_today(self):
+        """
+        :rtype: int or None
+        :returns: The number of requests left in today's budget, or ``None``
+            if there is no daily budget.
+        """
+
+        if self.per_day is None:
+            return None
+        with self.backend.locked_state() as state:
+            if state.get("day") != int(time.time() // SECONDS_PER_DAY):
+                return self.per_day
+            return max(self.per_day - state["day_count"], 0)
@@ -0,0 +1,336 @@
+"""
+Compact record types, used in place of dicts when a client is instantiated
+with ``record_mode="compact"``. These use ``__slots__``, so they are a good
+deal smaller than the equivalent dicts, which adds up when you're holding
+a lot of records in memory.
+
+Records can be read just like the dicts they replace (``pet["name"]``,
+``pet.get("mix")``, ``pet.items()``), or through attributes
+(``pet.name``). List values become tuples.
+
+There is also a :py:class:`LazyPet` record type, used with
+``record_mode="lazy"``, which only decodes fields as they are read.
+"""
+
+
+class Record(object):
+    """
+    Base class for the compact record types. Sub-classes list their fields
+    in both ``__slots__`` and ``_fields``. Fields that weren't present in the
+    API response are left unset, and behave like missing dict keys.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, **kwargs):
+        for key, val in kwargs.items():
+            setattr(self, key, val)
+
+    @classmethod
+    def from_dict(cls, record):
+        """
+        :param dict record: A record dict, as built by the client.
+        :returns: The equivalent compact record. Keys that aren't one of
+            this record type's fields are dropped.
+        """
+
+        obj = cls.__new__(cls)
+        for key in cls._fields:
+            if key in record:
+                setattr(obj, key, record[key])
+        return obj
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._fields and hasattr(self, key)
+
+    def keys(self):
+        return [key for key in self._fields if hasattr(self, key)]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Without a __dict__, the older pickle protocols can't cope with
+        # __slots__. Nested records pickle themselves the same way.
+        return self.__class__.from_dict, (dict(self.items()),)
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :returns: This record (and any nested records) as a plain dict, in
+            the same form the client builds when ``record_mode="dict"``.
+        """
+
+        record = {}
+        for key, val in self.items():
+            if isinstance(val, Record):
+                val = val.to_dict()
+            elif isinstance(val, tuple):
+                val = [
+                    item.to_dict() if isinstance(item, Record) else item
+                    for item in val
+                ]
+            record[key] = val
+        return record
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self.get("id"))
+
+
+class Photo(Record):
+    """
+    A pet photo.
+    """
+
+    __slots__ = _fields = ("id", "size", "url")
+
+    def __repr__(self):
+        return "<Photo %s %s>" % (self.get("id"), self.get("size"))
+
+
+class Contact(Record):
+    """
+    A pet's contact details.
+    """
+
+    __slots__ = _fields = (
+        "name", "address1", "address2", "city", "state", "zip", "phone",
+        "fax", "email",
+    )
+
+    def __repr__(self):
+        return "<Contact %s>" % self.get("name")
+
+
+class Pet(Record):
+    """
+    A pet record.
+    """
+
+    __slots__ = _fields = (
+        "id", "shelterId", "shelterPetId", "name", "animal", "breeds", "mix",
+        "age", "sex", "size", "options", "description", "lastUpdate",
+        "status", "photos", "contact",
+    )
+
+    @classmethod
+    def from_dict(cls, record):
+        pet = super(Pet, cls).from_dict(record)
+        pet.breeds = tuple(record.get("breeds", ()))
+        pet.options = tuple(record.get("options", ()))
+        pet.photos = tuple(
+            Photo.from_dict(photo) for photo in record.get("photos", ())
+        )
+        pet.contact = Contact.from_dict(record.get("contact", {}))
+        return pet
+
+
+class Shelter(Record):
+    """
+    A shelter record.
+    """
+
+    __slots__ = _fields = (
+        "id", "name", "address1", "address2", "city", "state", "zip",
+        "country", "latitude", "longitude", "phone", "fax", "email",
+    )
+
+
+def _find_text(tag):
+    """
+    :returns: A decoder that copies the text of a <pet> sub-tag straight
+        over, raising ``KeyError`` if the sub-tag isn't there.
+    """
+
+    def decode(root, client):
+        node = root.find(tag)
+        if node is None:
+            raise KeyError(tag)
+        return node.text
+    return decode
+
+
+def _decode_breeds(root, client):
+    return [breed.text for breed in root.findall("breeds/breed")]
+
+
+def _decode_photos(root, client):
+    return [
+        {"id": photo.get("id"), "size": photo.get("size"), "url": photo.text}
+        for photo in root.findall("media/photos/photo")
+    ]
+
+
+def _decode_options(root, client):
+    return [option.text for option in root.findall("options/option")]
+
+
+def _decode_contact(root, client):
+    contact = root.find("contact")
+    if contact is None:
+        return {}
+    return dict((field.tag, field.text) for field in contact)
+
+
+def _decode_last_update(root, client):
+    return client._parse_datetime_str(_find_text("lastUpdate")(root, client))
+
+
+# Maps each pet field to a decoder that plucks it out of a <pet> Element.
+LAZY_PET_DECODERS = {
+    "breeds": _decode_breeds,
+    "photos": _decode_photos,
+    "options": _decode_options,
+    "contact": _decode_contact,
+    "lastUpdate": _decode_last_update,
+}
+for _field in Pet._fields:
+    LAZY_PET_DECODERS.setdefault(_field, _find_text(_field))
+del _field
+
+# These are always present in pet records, even if empty.
+_ALWAYS_PRESENT_PET_FIELDS = frozenset(["breeds", "photos", "options", "contact"])
+
+
+class LazyPet(Record):
+    """
+    A pet record that holds on to its <pet> Element, and only decodes each
+    field the first time it is read. Used when a client is instantiated with
+    ``record_mode="lazy"``. Fields come back in the same form as they would
+    in a record dict.
+
+    Holding on to the Element also keeps the rest of the response document
+    in memory. If you plan on keeping the record around, call
+    :py:meth:`materialize` to decode everything and let go of the Element.
+    """
+
+    __slots__ = ("_root", "_client", "_values")
+    _fields = Pet._fields
+
+    def __init__(self, root, client):
+        """
+        :param lxml.etree._Element root: A <pet> tag Element.
+        :param client: The client that is building the record. Used for
+            parsing timestamps.
+        """
+
+        self._root = root
+        self._client = client
+        self._values = {}
+
+    @classmethod
+    def from_dict(cls, record):
+        pet = cls.__new__(cls)
+        pet._root = None
+        pet._client = None
+        pet._values = dict(record)
+        return pet
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            if self._root is None or key not in LAZY_PET_DECODERS:
+                raise
+        value = LAZY_PET_DECODERS[key](self._root, self._client)
+        self._values[key] = value
+        return value
+
+    def __getattr__(self, key):
+        # Only called for attributes that aren't slots.
+        if key in self._fields:
+            try:
+                return self[key]
+            except KeyError:
+                pass
+        raise AttributeError(key)
+
+    def __contains__(self, key):
+        if key in self._values:
+            return True
+        if self._root is None or key not in LAZY_PET_DECODERS:
+            return False
+        return (
+            key in _ALWAYS_PRESENT_PET_FIELDS or
+            self._root.find(key) is not None
+        )
+
+    def keys(self):
+        return [key for key in self._fields if key in self]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    @property
+    def is_materialized(self):
+        """
+        ``True`` if the record has let go of its Element.
+        """
+
+        return self._root is None
+
+    def materialize(self):
+        """
+        Decodes any fields that haven't been read yet, and lets go of the
+        underlying Element (and the document it belongs to).
+
+        :rtype: LazyPet
+        :returns: This record, for convenience.
+        """
+
+        if self._root is not None:
+            for key in self.keys():
+                self[key]
+            self._root = None
+            self._client = None
+        return self
+
+    def __reduce__(self):
+        # Elements can't be pickled, so send the decoded values instead.
+        return LazyPet.from_dict, (self.materialize()._values,)
+
+
+def as_dict(record):
+    """
+    :param record: A record, in any of the forms the client can build.
+    :rtype: dict
+    :returns: The record as a plain dict.
+    """
+
+    if isinstance(record, Record):
+        return record.to_dict()
+    return record
@@ -0,0 +1,89 @@
+"""
+Retry policies for transient failures. Pass a :py:class:`RetryPolicy` to
+:py:class:`petfinder.PetFinderClient` via its ``retry_policy`` keyword.
+
+Retries happen per request, so a failure partway through an auto-paginating
+call re-tries the page that failed, and pagination carries on from there.
+"""
+
+import random
+
+import requests
+
+from petfinder.exceptions import GenericInternalError
+
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
+
+# Transport-level errors that are generally worth another try.
+TRANSPORT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+if urllib3 is not None:
+    # Raised by petfinder.transport.Urllib3Transport.
+    TRANSPORT_ERRORS += (
+        urllib3.exceptions.NewConnectionError,
+        urllib3.exceptions.ProtocolError,
+        urllib3.exceptions.TimeoutError,
+    )
+
+
+class RetryPolicy(object):
+    """
+    Determines which errors are retried, how many times, and how long to
+    wait in between. Waits back off exponentially, with optional "full"
+    jitter (a random wait between zero and the backoff).
+    """
+
+    def __init__(self, max_attempts=3, retry_on=(GenericInternalError,),
+                 retry_transport_errors=True, backoff_base=0.5,
+                 backoff_max=30.0, jitter=True):
+        """
+        :keyword int max_attempts: The maximum number of times to try a
+            request, including the first.
+        :keyword tuple retry_on: The
+            :py:exc:`petfinder.exceptions.PetfinderAPIError` sub-classes
+            that should be retried.
+        :keyword bool retry_transport_errors: If ``True``, connection errors,
+            timeouts, and broken responses (see :py:data:`TRANSPORT_ERRORS`)
+            are retried too.
+        :keyword float backoff_base: The wait (in seconds) before the first
+            retry. Doubles for each one after.
+        :keyword float backoff_max: The maximum wait (in seconds) between
+            retries.
+        :keyword bool jitter: If ``True``, randomize the waits, so that many
+            clients failing at once don't all retry in lock-step.
+        """
+
+        self.max_attempts = max_attempts
+        self.retry_on = tuple(retry_on)
+        if retry_transport_errors:
+            self.retry_on += TRANSPORT_ERRORS
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+
+    def is_retryable(self, exc):
+        """
+        :param Exception exc: The error a request failed with.
+        :rtype: bool
+        """
+
+        return isinstance(exc, self.retry_on)
+
+    def get_delay(self, attempt):
+        """
+        :param int attempt: The number of the attempt that just failed,
+            starting at 1.
+        :rtype: float
+        :returns: How long to wait (in seconds) before the next attempt.
+        """
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
@@ -0,0 +1,71 @@
+"""
+Request coalescing. When several threads ask for the exact same thing at
+the same time, only one of them does the work, and the rest wait for (and
+share) its result.
+"""
+
+import threading
+
+
+class _Call(object):
+    """
+    An in-flight call, and what came of it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls that share a key. Used by
+    :py:class:`petfinder.PetFinderClient` when instantiated with
+    ``coalesce=True``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> _Call, for calls that are currently in flight.
+        self._calls = {}
+
+    def do(self, key, func, *args):
+        """
+        Calls ``func(*args)``, unless a call with the same key is already in
+        flight, in which case we wait for that call instead.
+
+        :param key: Identifies the call. Must be hashable.
+        :param callable func: The function to call.
+        :raises: Whatever ``func`` raised, in the calling thread and in
+            every thread that was waiting on it.
+        :rtype: tuple
+        :returns: A tuple of ``func``'s return value, and a bool that is
+            ``True`` if that value is shared with another caller.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args)
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            # Anyone who shows up after this starts a new call.
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
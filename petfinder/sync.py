@@ -0,0 +1,216 @@
+"""
+Incremental shelter inventory syncing. Rather than re-pulling every pet at
+a shelter on every run, :py:class:`ShelterSync` remembers which pets it has
+seen (and when they were last updated), and only fetches full records for
+pets that are new or have changed since the last run. What changed comes
+out as a stream of :py:class:`SyncEvent` tuples.
+
+Example::
+
+    from petfinder.sync import ShelterSync, ShelterSyncState
+
+    state = ShelterSyncState.load("sync-state.json")
+    sync = ShelterSync(api, state=state)
+    for event in sync.run(["GA137", "GA251"]):
+        print(event.type, event.shelter_id, event.pet_id)
+    state.save("sync-state.json")
+"""
+
+import json
+import os
+from collections import namedtuple
+
+from petfinder.client import TIMESTAMP_FORMAT, BasePetFinderClient
+from petfinder.exceptions import RecordDoesNotExistError
+
+ADDED = "added"
+UPDATED = "updated"
+REMOVED = "removed"
+
+#: A change to a shelter's inventory. ``type`` is one of ``"added"``,
+#: ``"updated"``, or ``"removed"``. ``record`` is the pet's full record,
+#: or ``None`` for removals.
+SyncEvent = namedtuple("SyncEvent", ["type", "shelter_id", "pet_id", "record"])
+
+
+class ShelterSyncState(object):
+    """
+    What a :py:class:`ShelterSync` knows about each shelter's inventory:
+    a dict of shelter IDs to dicts of pet IDs to ``lastUpdate`` datetimes
+    (or ``None``, if the pet was only seen in an ID listing). Can be saved to
+    and loaded from JSON between runs.
+    """
+
+    def __init__(self, shelters=None):
+        """
+        :keyword dict shelters: The known inventory, keyed by shelter ID.
+        """
+
+        self.shelters = shelters if shelters is not None else {}
+
+    def get_pets(self, shelter_id):
+        """
+        :param str shelter_id: The shelter to get the known pets for.
+        :rtype: dict
+        :returns: A dict of pet IDs to ``lastUpdate`` datetimes. Changes to
+            it are reflected in the state.
+        """
+
+        return self.shelters.setdefault(shelter_id, {})
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :returns: The state in a JSON-friendly form.
+        """
+
+        return dict(
+            (shelter_id, dict(
+                (pet_id, last_update.strftime(TIMESTAMP_FORMAT)
+                 if last_update is not None else None)
+                for pet_id, last_update in pets.items()
+            ))
+            for shelter_id, pets in self.shelters.items()
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param dict data: State, as returned by :py:meth:`to_dict`.
+        :rtype: ShelterSyncState
+        """
+
+        return cls(dict(
+            (shelter_id, dict(
+                (pet_id, BasePetFinderClient._parse_datetime_str(last_update)
+                 if last_update is not None else None)
+                for pet_id, last_update in pets.items()
+            ))
+            for shelter_id, pets in data.items()
+        ))
+
+    def save(self, path):
+        """
+        Writes the state out to a JSON file. The file is replaced atomically,
+        so a crash mid-write won't leave a truncated state behind.
+
+        :param str path: Where to write the state.
+        """
+
+        tmp_path = "%s.tmp" % path
+        with open(tmp_path, "w") as state_file:
+            json.dump(self.to_dict(), state_file)
+        os.rename(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param str path: A JSON file written by :py:meth:`save`.
+        :rtype: ShelterSyncState
+        :returns: The loaded state, or an empty state if the file doesn't
+            exist yet.
+        """
+
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as state_file:
+            return cls.from_dict(json.load(state_file))
+
+
+class ShelterSync(object):
+    """
+    Syncs shelter inventories against a :py:class:`ShelterSyncState`.
+
+    By default, each run lists a shelter's pets with ``output="id"``, which
+    is cheap, and only fetches full records for pets that weren't there last
+    time. That catches additions and removals, but not updates to pets we
+    already know about, since ID listings don't include ``lastUpdate``. Pass
+    ``detect_updates=True`` to list with ``output="basic"`` instead, which
+    does include it, and also get full records for pets that have changed.
+    """
+
+    def __init__(self, client, state=None, detect_updates=False,
+                 max_workers=8):
+        """
+        :param petfinder.PetFinderClient client: The client to sync with.
+        :keyword ShelterSyncState state: What we knew as of the last run.
+            Updated in place as events are emitted.
+        :keyword bool detect_updates: If ``True``, detect changes to known
+            pets too, at the cost of a heavier listing call.
+        :keyword int max_workers: The number of full records to fetch at
+            once.
+        """
+
+        self.client = client
+        self.state = state if state is not None else ShelterSyncState()
+        self.detect_updates = detect_updates
+        self.max_workers = max_workers
+
+    def _list_pets(self, shelter_id):
+        """
+        :param str shelter_id: The shelter to list the pets of.
+        :rtype: dict
+        :returns: A dict of the shelter's current pet IDs to their
+            ``lastUpdate`` datetimes (``None`` if not detecting updates).
+        """
+
+        output = "basic" if self.detect_updates else "id"
+        current = {}
+        try:
+            for pet in self.client.shelter_getpets(id=shelter_id, output=output):
+                if self.detect_updates:
+                    current[pet["id"]] = pet.get("lastUpdate")
+                else:
+                    current[pet] = None
+        except RecordDoesNotExistError:
+            # No pets at all.
+            pass
+        return current
+
+    def sync_shelter(self, shelter_id):
+        """
+        Syncs a single shelter.
+
+        :param str shelter_id: The shelter to sync.
+        :rtype: generator
+        :returns: A generator of :py:class:`SyncEvent` tuples.
+        """
+
+        known = self.state.get_pets(shelter_id)
+        current = self._list_pets(shelter_id)
+
+        for pet_id in [pet_id for pet_id in known if pet_id not in current]:
+            del known[pet_id]
+            yield SyncEvent(REMOVED, shelter_id, pet_id, None)
+
+        to_fetch = [
+            pet_id for pet_id, last_update in current.items()
+            if pet_id not in known or
+            (last_update is not None and last_update != known[pet_id])
+        ]
+
+        for pet_id, record in self.client.pet_get_many(
+            to_fetch, max_workers=self.max_workers, ordered=False
+        ):
+            if isinstance(record, RecordDoesNotExistError):
+                # Adopted out between listing and fetching.
+                if pet_id in known:
+                    del known[pet_id]
+                    yield SyncEvent(REMOVED, shelter_id, pet_id, None)
+                continue
+            event_type = UPDATED if pet_id in known else ADDED
+            known[pet_id] = record.get("lastUpdate")
+            yield SyncEvent(event_type, shelter_id, pet_id, record)
+
+    def run(self, shelter_ids):
+        """
+        Syncs each of the given shelters, one after the other.
+
+        :param iterable shelter_ids: The shelters to sync.
+        :rtype: generator
+        :returns: A generator of :py:class:`SyncEvent` tuples.
+        """
+
+        for shelter_id in shelter_ids:
+            for event in self.sync_shelter(shelter_id):
+                yield event
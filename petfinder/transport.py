@@ -0,0 +1,317 @@
+"""
+HTTP transports for :py:class:`petfinder.PetFinderClient`. A transport
+sends the GET request for an API call and hands back the response. The
+client uses :py:class:`RequestsTransport` by default; pass a different one
+to its ``transport`` keyword to swap backends.
+
+:py:class:`RecordingTransport` and :py:class:`ReplayTransport` capture
+responses to disk and serve them back, which takes the network out of the
+picture entirely when profiling parsing and pagination::
+
+    from petfinder.transport import RecordingTransport, ReplayTransport
+
+    api = petfinder.PetFinderClient(
+        key, secret, transport=RecordingTransport("recordings/"))
+    pets = list(api.pet_find(location="29678"))
+
+    # Later, no network needed.
+    api = petfinder.PetFinderClient(
+        key, secret, transport=ReplayTransport("recordings/"))
+
+A transport is any object with a ``get(url, params, stream=False)`` method
+that returns a response, and a ``close()`` method. A response needs a
+``content`` attribute (the body, as bytes), a ``headers`` mapping, and, if
+``stream`` was set, a file-like ``raw`` attribute to read the body from
+incrementally, along with a ``close()`` method. :py:class:`requests.Response`
+fits the bill, as does :py:class:`TransportResponse`.
+"""
+
+import hashlib
+import io
+import os
+import threading
+
+import requests
+
+from petfinder.cache import make_cache_key
+from petfinder.exceptions import RecordingNotFoundError
+
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
+
+# What recordings are saved as, one for each response format.
+RECORDING_EXTENSIONS = (".xml", ".json")
+
+
+class TransportResponse(object):
+    """
+    A minimal response, for transports that don't have one of their own to
+    hand back.
+    """
+
+    def __init__(self, content, headers=None):
+        """
+        :param bytes content: The response body.
+        :keyword dict headers: The response headers.
+        """
+
+        self.content = content
+        self.headers = headers if headers is not None else {
+            "Content-Length": str(len(content)),
+        }
+        self._raw = None
+
+    @property
+    def raw(self):
+        """
+        The body, as a file-like object.
+        """
+
+        if self._raw is None:
+            self._raw = io.BytesIO(self.content)
+        return self._raw
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(object):
+    """
+    Sends requests through a :py:class:`requests.Session`. This is the
+    default.
+    """
+
+    def __init__(self, session=None, thread_safe=True, keep_alive=True):
+        """
+        :keyword requests.Session session: The session to send requests
+            through. If omitted, a new one is created.
+        :keyword bool thread_safe: If ``True`` (the default), each thread
+            sends its requests through its own copy of ``session``, sharing
+            its adapters (and connection pools). If ``False``, every thread
+            uses ``session`` itself.
+        :keyword bool keep_alive: If ``False``, ask the API to close the
+            connection after every request instead of re-using it. This is
+            set on each request, so ``session`` is left as it was.
+        """
+
+        self.session = session if session is not None else requests.Session()
+        self.thread_safe = thread_safe
+        self.headers = None if keep_alive else {"Connection": "close"}
+        # Per-thread sessions, when thread_safe is set.
+        self._local = threading.local()
+
+    def get_session(self):
+        """
+        :rtype: requests.Session
+        :returns: The session to send a request through. In thread-safe
+            mode, this is a per-thread copy of ``self.session``.
+        """
+
+        if not self.thread_safe:
+            return self.session
+
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            # Sessions keep cookies and such, which aren't safe to share
+            # between threads. The adapters, and the connection pools in
+            # them, are. Copy over the rest of the configuration.
+            session.adapters = self.session.adapters
+            for attr in ("auth", "proxies", "params", "verify", "cert",
+                         "stream", "trust_env", "max_redirects"):
+                setattr(session, attr, getattr(self.session, attr))
+            session.headers = self.session.headers.copy()
+            self._local.session = session
+        return session
+
+    def get(self, url, params, stream=False):
+        """
+        :param str url: The URL to request.
+        :param dict params: The query string parameters.
+        :keyword bool stream: If ``True``, don't read the response body.
+        :rtype: requests.Response
+        """
+
+        return self.get_session().get(
+            url, params=params, stream=stream, headers=self.headers)
+
+    def close(self):
+        self.session.close()
+
+
+class _Urllib3Response(object):
+    """
+    Wraps a :py:class:`urllib3.response.HTTPResponse` to look like a
+    :py:class:`requests.Response`, as far as the client is concerned.
+    """
+
+    def __init__(self, response):
+        self.raw = response
+        self.headers = response.headers
+
+    @property
+    def content(self):
+        return self.raw.data
+
+    def close(self):
+        # Whatever is left of the body would be taken for the start of the
+        # next response on this connection. Closing it is cheaper than
+        # reading the rest of a body nobody wants, and the pool opens a
+        # fresh one in its place. Same as requests does.
+        if not self.raw.closed:
+            self.raw.close()
+        self.raw.release_conn()
+
+
+class Urllib3Transport(object):
+    """
+    Sends requests through a :py:class:`urllib3.PoolManager` directly,
+    skipping the overhead that requests adds on top of it. Thread-safe.
+    """
+
+    def __init__(self, pool_manager=None, num_pools=10, maxsize=10,
+                 keep_alive=True, timeout=None):
+        """
+        :keyword urllib3.PoolManager pool_manager: Optionally, a
+            pre-configured pool manager. If omitted, one is built from
+            ``num_pools`` and ``maxsize``.
+        :keyword int num_pools: The number of per-host connection pools to
+            keep around.
+        :keyword int maxsize: The maximum number of connections to keep
+            open to any single host.
+        :keyword bool keep_alive: If ``False``, ask the API to close the
+            connection after every request instead of re-using it.
+        :keyword float timeout: Optionally, the number of seconds to wait
+            for the API before giving up.
+        """
+
+        if urllib3 is None:
+            raise ImportError("Urllib3Transport requires urllib3.")
+        if pool_manager is None:
+            # Retries are the client's business. With them turned off,
+            # connection errors are raised as-is.
+            pool_manager = urllib3.PoolManager(
+                num_pools=num_pools, maxsize=maxsize, retries=False)
+        self.pool_manager = pool_manager
+        self.headers = {} if keep_alive else {"Connection": "close"}
+        self.timeout = timeout
+
+    def get(self, url, params, stream=False):
+        """
+        :param str url: The URL to request.
+        :param dict params: The query string parameters.
+        :keyword bool stream: If ``True``, don't read the response body.
+        """
+
+        response = self.pool_manager.request(
+            "GET", url, fields=params, headers=self.headers,
+            timeout=self.timeout, preload_content=not stream,
+        )
+        return _Urllib3Response(response)
+
+    def close(self):
+        self.pool_manager.clear()
+
+
+def _get_recording_name(url, params):
+    """
+    :param str url: The URL of an API call.
+    :param dict params: The query string parameters.
+    :rtype: str
+    :returns: The file name to record the response under. Credentials
+        aren't part of it, so recordings can be replayed with any key. The
+        extension follows the response format.
+    """
+
+    method = url.rstrip("/").rsplit("/", 1)[-1]
+    key = make_cache_key(method, params)
+    return "%s-%s.%s" % (
+        method, hashlib.sha1(key.encode("utf-8")).hexdigest(),
+        params.get("format") or "xml")
+
+
+class RecordingTransport(object):
+    """
+    Passes requests through to another transport, saving each response body
+    to a directory for :py:class:`ReplayTransport` to serve back later.
+    Error responses are recorded too, since they are part of how pagination
+    ends.
+    """
+
+    def __init__(self, path, transport=None):
+        """
+        :param str path: The directory to save responses in. It is created
+            if it doesn't exist.
+        :keyword transport: The transport to send requests through. Defaults
+            to a :py:class:`RequestsTransport`.
+        """
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.path = path
+        self.transport = (
+            transport if transport is not None else RequestsTransport())
+
+    def get(self, url, params, stream=False):
+        """
+        :param str url: The URL to request.
+        :param dict params: The query string parameters.
+        :keyword bool stream: Ignored. The whole body has to be read to be
+            recorded.
+        :rtype: TransportResponse
+        """
+
+        response = self.transport.get(url, params)
+        content = response.content
+        file_path = os.path.join(self.path, _get_recording_name(url, params))
+        # Written to the side and renamed, so a replay never sees half a
+        # response.
+        tmp_path = "%s.%d.tmp" % (file_path, threading.current_thread().ident)
+        with open(tmp_path, "wb") as recording:
+            recording.write(content)
+        os.rename(tmp_path, file_path)
+        return TransportResponse(content)
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(object):
+    """
+    Serves responses saved by a :py:class:`RecordingTransport`, without
+    going anywhere near the network. Every recording is loaded into memory
+    up front, so replays run as fast as the client can parse.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: The directory the responses were recorded to.
+        """
+
+        self.path = path
+        self.responses = {}
+        for name in os.listdir(path):
+            if name.endswith(RECORDING_EXTENSIONS):
+                with open(os.path.join(path, name), "rb") as recording:
+                    self.responses[name] = recording.read()
+
+    def get(self, url, params, stream=False):
+        """
+        :param str url: The URL to request.
+        :param dict params: The query string parameters.
+        :keyword bool stream: Streamed responses are read from memory, too.
+        :raises: :py:exc:`petfinder.exceptions.RecordingNotFoundError` if
+            this call was never recorded.
+        :rtype: TransportResponse
+        """
+
+        content = self.responses.get(_get_recording_name(url, params))
+        if content is None:
+            raise RecordingNotFoundError(
+                "No recorded response for %s with %r" % (url, params))
+        return TransportResponse(content)
+
+    def close(self):
+        pass
@@ -14,6 +14,7 @@ required = [
     'requests',
     'pytz',
     'lxml',
+    'futures; python_version < "3.0"',
 ]
 
 scripts = [
@@ -27,7 +28,7 @@ setup(
     author='Greg Taylor',
     author_email='gtaylor@gc-taylor.com',
     url='https://github.com/gtaylor/petfinder-api',
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     scripts=scripts,
     package_data={'': ['LICENSE']},
     include_package_data=True,
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import unittest
+
+from benchmarks.fakeserver import render_document, render_pet
+from petfinder.aio import AsyncPetFinderClient, BlockingTransportAdapter
+from petfinder.exceptions import InvalidRequestError, RecordDoesNotExistError
+from petfinder.transport import TransportResponse
+from tests.fakes import FakeTransport, get_client
+
+
+class StuckTransport(FakeTransport):
+    """
+    pet.find always answers with the same page, and the same lastOffset.
+    """
+
+    def respond(self, method, params):
+        return TransportResponse(render_document(
+            "<lastOffset>10</lastOffset><pets>%s</pets>" % "".join(
+                "<pet>%s</pet>" % render_pet(pet_id)
+                for pet_id in range(10))))
+
+
+class ErrorTransport(FakeTransport):
+    """
+    Answers every call with an error document.
+    """
+
+    def __init__(self, code, **kwargs):
+        super(ErrorTransport, self).__init__(**kwargs)
+        self.code = code
+
+    def respond(self, method, params):
+        return TransportResponse(render_document("", self.code, "Error"))
+
+
+def _get_client(transport, **kwargs):
+    return AsyncPetFinderClient(
+        api_key="key", api_secret="secret",
+        transport=BlockingTransportAdapter(transport, in_executor=False),
+        **kwargs)
+
+
+async def _collect(records):
+    return [record async for record in records]
+
+
+#noinspection PyClassicStyleClass
+class AsyncClientTests(unittest.TestCase):
+    """
+    Tests for the asyncio client. These don't touch the API.
+    """
+
+    def test_pagination(self):
+        """
+        The async client should page through the same records, from the
+        same requests, as the blocking one.
+        """
+
+        transport = FakeTransport(total_pets=95)
+        expected = list(get_client(transport).pet_find(location="29607", count=10, output="full"))
+        expected_offsets = transport.get_offsets("pet.find")
+        self.assertEqual(len(expected), 95)
+
+        transport = FakeTransport(total_pets=95)
+        api = _get_client(transport)
+        records = asyncio.run(_collect(
+            api.pet_find(location="29607", count=10, output="full")))
+        self.assertEqual(records, expected)
+        self.assertEqual(transport.get_offsets("pet.find"), expected_offsets)
+
+        pet_ids = asyncio.run(_collect(
+            api.shelter_getpets(id="SC001", count=10)))
+        self.assertEqual(pet_ids, [str(pet_id) for pet_id in range(95)])
+
+    def test_stuck_offset(self):
+        """
+        If the API stops advancing the offset, pagination should stop rather
+        than asking for the same page forever.
+        """
+
+        transport = StuckTransport()
+        api = _get_client(transport)
+        records = asyncio.run(_collect(api.pet_find(location="29607")))
+        self.assertEqual(len(records), 20)
+        self.assertEqual(transport.get_offsets("pet.find"), [None, "10"])
+
+    def test_pet_get(self):
+        """
+        Single records should match the blocking client's.
+        """
+
+        transport = FakeTransport()
+        expected = get_client(transport).pet_get(id=1)
+        api = _get_client(transport)
+        self.assertEqual(asyncio.run(api.pet_get(id=1)), expected)
+
+    def test_executor(self):
+        """
+        By default, blocking transports should be called from the running
+        loop's executor, off the loop's own thread.
+        """
+
+        transport = FakeTransport(total_pets=25)
+        threads = []
+        get = transport.get
+
+        def record_thread(url, params, stream=False):
+            threads.append(threading.current_thread())
+            return get(url, params, stream)
+
+        transport.get = record_thread
+        api = AsyncPetFinderClient(
+            api_key="key", api_secret="secret",
+            transport=BlockingTransportAdapter(transport))
+        records = asyncio.run(_collect(
+            api.pet_find(location="29607", count=10)))
+        self.assertEqual(len(records), 25)
+        self.assertEqual(len(threads), 4)
+        self.assertFalse(threading.current_thread() in threads)
+
+    def test_errors(self):
+        """
+        Errors should be raised for single records and empty result sets.
+        """
+
+        api = _get_client(ErrorTransport("201"))
+        self.assertRaises(
+            RecordDoesNotExistError, asyncio.run,
+            _collect(api.pet_find(location="29607")))
+
+        api = _get_client(ErrorTransport("200"))
+        self.assertRaises(
+            InvalidRequestError, asyncio.run, api.pet_get(id=1))
@@ -0,0 +1,109 @@
+import unittest
+
+from benchmarks.fakeserver import BREEDS, render_document
+from petfinder.breeds import BreedIndex, normalize_breed
+from tests.fakes import FakeTransport, get_client
+
+
+class ShelterChangesTransport(FakeTransport):
+    """
+    The fake API's breeds and shelters, less any breeds dropped from
+    ``breeds`` or shelters added to ``closed``.
+    """
+
+    def __init__(self, **kwargs):
+        super(ShelterChangesTransport, self).__init__(**kwargs)
+        self.breeds = list(BREEDS)
+        self.closed = set()
+
+    def render(self, method, params):
+        if method == "breed.list":
+            return render_document(
+                '<breeds animal="dog">%s</breeds>' % "".join(
+                    "<breed>%s</breed>" % breed for breed in self.breeds))
+        content = super(ShelterChangesTransport, self).render(method, params)
+        for shelter_id in self.closed:
+            content = content.replace(
+                ("<id>%s</id>" % shelter_id).encode("utf-8"), b"")
+        return content
+
+    def get_breeds_fetched(self):
+        return sorted(params["breed"] for method, params in self.calls
+                      if method == "shelter.listByBreed")
+
+
+#noinspection PyClassicStyleClass
+class BreedIndexTests(unittest.TestCase):
+    """
+    Tests for the breed index. These don't touch the API.
+    """
+
+    def setUp(self):
+        # Each breed is at every shelter but every fifth.
+        self.transport = ShelterChangesTransport(total_shelters=10)
+        self.index = BreedIndex(get_client(self.transport), max_workers=2)
+
+    def test_normalize(self):
+        """
+        Case and extra whitespace shouldn't matter.
+        """
+
+        self.assertEqual(normalize_breed("  Basset \tHOUND "), "basset hound")
+
+    def test_build(self):
+        """
+        Shelters should be found for any spelling of an indexed breed.
+        """
+
+        changes = self.index.build(
+            "dog", breeds=["BEAGLE", "Poodle", " labrador   retriever"])
+        self.assertEqual(
+            sorted(changes), ["Beagle", "Labrador Retriever"])
+        beagle_shelters = frozenset(
+            "SC%03d" % i for i in (1, 2, 3, 4, 6, 7, 8, 9))
+        self.assertEqual(changes["Beagle"], (beagle_shelters, frozenset()))
+        self.assertEqual(
+            self.index.get_shelters("dog", "  beagle"), beagle_shelters)
+        # Not indexed.
+        self.assertEqual(self.index.get_shelters("dog", "boxer"), frozenset())
+        # Not a breed at all.
+        self.assertEqual(self.index.get_shelters("dog", "poodle"), frozenset())
+        self.assertEqual(
+            self.index.find_shelters("dog", ["beagle", "Labrador Retriever"]),
+            frozenset("SC%03d" % i for i in range(10)))
+        self.assertEqual(self.index.lookup_breed("dog", "BOXER"), "Boxer")
+        self.assertEqual(self.index.get_breeds("dog"), sorted(BREEDS))
+
+    def test_refresh(self):
+        """
+        Refreshes should only fetch what's missing, or too old.
+        """
+
+        self.index.build("dog", breeds=["Beagle"])
+        self.assertEqual(
+            sorted(self.index.refresh("dog")),
+            sorted(breed for breed in BREEDS if breed != "Beagle"))
+        self.assertEqual(self.transport.get_breeds_fetched(), sorted(BREEDS))
+        del self.transport.calls[:]
+        self.assertEqual(self.index.refresh("dog"), {})
+        self.assertEqual(self.transport.get_breeds_fetched(), [])
+        self.assertEqual(self.index.refresh("dog", max_age=-1), {})
+        self.assertEqual(self.transport.get_breeds_fetched(), sorted(BREEDS))
+
+    def test_changes(self):
+        """
+        Refreshes should report shelters that dropped a breed, and breeds
+        that have gone away altogether.
+        """
+
+        index = BreedIndex(get_client(self.transport), breeds_ttl=-1)
+        index.build("dog")
+        boxer_shelters = index.get_shelters("dog", "Boxer")
+        self.transport.closed.add("SC001")
+        self.transport.breeds.remove("Boxer")
+        changes = index.refresh("dog", max_age=-1)
+        self.assertEqual(changes["Boxer"], (frozenset(), boxer_shelters))
+        self.assertEqual(
+            changes["Beagle"], (frozenset(), frozenset(["SC001"])))
+        self.assertEqual(index.get_shelters("dog", "Boxer"), frozenset())
+        self.assertFalse("SC001" in index.get_shelters("dog", "Beagle"))
@@ -0,0 +1,183 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from petfinder.cache import MemoryCache, SQLiteCache
+from petfinder.exceptions import RecordDoesNotExistError
+from tests.fakes import FakeTransport, get_client
+
+
+#noinspection PyClassicStyleClass
+class SQLiteCacheTests(unittest.TestCase):
+    """
+    Tests for the SQLite cache.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _get_cache(self, **kwargs):
+        cache = SQLiteCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def _fill(self, cache, keys):
+        for key in keys:
+            cache.set(key, key.encode("utf-8"), 60)
+            # Keep the access times apart.
+            time.sleep(0.002)
+
+    def test_eviction(self):
+        """
+        The least recently used entries should be evicted once full.
+        """
+
+        cache = self._get_cache(max_entries=3)
+        self._fill(cache, ["a", "b", "c"])
+        self.assertEqual(cache.get("a"), b"a")
+        time.sleep(0.002)
+        self._fill(cache, ["d", "e"])
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.evictions, 2)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("c"), None)
+        for key in ("a", "d", "e"):
+            self.assertEqual(cache.get(key), key.encode("utf-8"))
+
+    def test_replace(self):
+        """
+        Replacing an entry shouldn't evict anything.
+        """
+
+        cache = self._get_cache(max_entries=2)
+        self._fill(cache, ["a", "b"])
+        cache.set("a", b"new", 60)
+        self.assertEqual(cache.evictions, 0)
+        self.assertEqual(cache.get("a"), b"new")
+        self.assertEqual(cache.get("b"), b"b")
+
+    def test_expiry(self):
+        """
+        Expired entries should be dropped, and stop counting.
+        """
+
+        cache = self._get_cache(max_entries=2)
+        cache.set("a", b"a", -1)
+        self.assertEqual(cache.get("a"), None)
+        self._fill(cache, ["b", "c"])
+        self.assertEqual(cache.evictions, 0)
+        self.assertEqual(len(cache), 2)
+
+    def test_no_counting(self):
+        """
+        Writes shouldn't count the table's rows.
+        """
+
+        cache = self._get_cache(max_entries=10)
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        for num in range(50):
+            cache.set(str(num), b"value", 60)
+        self.assertEqual(
+            [sql for sql in statements if "COUNT" in sql.upper()], [])
+        self.assertEqual(cache.evictions, 40)
+        self.assertEqual(len(cache), 10)
+
+    def test_reopen(self):
+        """
+        A new instance should pick up where the last one left off.
+        """
+
+        cache = self._get_cache(max_entries=3)
+        self._fill(cache, ["a", "b", "c"])
+        cache.close()
+        cache = self._get_cache(max_entries=3)
+        self._fill(cache, ["d"])
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.get("a"), None)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+#noinspection PyClassicStyleClass
+class MemoryCacheTests(unittest.TestCase):
+    """
+    Tests for the in-memory cache.
+    """
+
+    def test_eviction(self):
+        """
+        The least recently used entries should be evicted once full.
+        """
+
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", b"a", 60)
+        cache.set("b", b"b", 60)
+        cache.get("a")
+        cache.set("c", b"c", 60)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), b"a")
+        self.assertEqual(cache.stats(), {
+            "hits": 2, "misses": 1, "evictions": 1, "size": 2})
+
+
+#noinspection PyClassicStyleClass
+class ClientCacheTests(unittest.TestCase):
+    """
+    Tests for caching the client's responses. These don't touch the API.
+    """
+
+    def setUp(self):
+        self.cache = MemoryCache()
+        self.transport = FakeTransport(total_pets=25)
+
+    def test_pet_get_cached(self):
+        """
+        A repeated pet_get() should be served from the cache, whatever type
+        the ID was given as.
+        """
+
+        for response_format in ("xml", "json"):
+            api = get_client(self.transport, cache=self.cache,
+                             response_format=response_format)
+            record = api.pet_get(id=5)
+            self.assertEqual(api.pet_get(id="5"), record)
+        # XML and JSON responses are kept apart.
+        self.assertEqual(self.transport.get_offsets("pet.get"), [None] * 2)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_uncached_methods(self):
+        """
+        Paginated calls, and methods with no TTL, should go straight to the
+        API.
+        """
+
+        api = get_client(self.transport, cache=self.cache,
+                         cache_ttls={"pet.get": 0})
+        for attempt in range(2):
+            api.pet_get(id=5)
+            list(api.pet_find(location="29607", count=10))
+        # A pet, and four pages, each time.
+        self.assertEqual(len(self.transport.calls), 10)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.hits + self.cache.misses, 0)
+
+    def test_errors_not_cached(self):
+        """
+        Error responses should never end up in the cache.
+        """
+
+        api = get_client(self.transport, cache=self.cache)
+        for attempt in range(2):
+            self.assertRaises(RecordDoesNotExistError, api.pet_get, id=500)
+        self.assertEqual(len(self.transport.calls), 2)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.misses, 2)
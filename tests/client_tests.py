@@ -0,0 +1,259 @@
+import datetime
+import re
+import threading
+import unittest
+
+import pytz
+import requests
+
+import petfinder
+from petfinder.client import PetFinderClient
+from petfinder.transport import RequestsTransport
+from tests.fakes import FakeAdapter, FakeTransport, get_client
+
+
+#noinspection PyClassicStyleClass
+class ThreadSafetyTests(unittest.TestCase):
+    """
+    Tests for sharing a client, and its arguments, between threads. These
+    don't touch the API.
+    """
+
+    def test_kwargs_untouched(self):
+        """
+        Neither the caller's kwargs, nor the data handed to each call, should
+        be changed by the client.
+        """
+
+        api = get_client(FakeTransport(total_pets=25), prefetch=2)
+        seen = []
+        api.add_pre_call_hook(
+            lambda method, data: seen.append((data, dict(data))))
+        kwargs = {"location": "29607", "count": 10, "output": "full"}
+        self.assertEqual(len(list(api.pet_find(**kwargs))), 25)
+        self.assertEqual(
+            kwargs, {"location": "29607", "count": 10, "output": "full"})
+        list(api.pet_find_sharded(["29607", "29601"], count=10))
+        list(api.pet_get_many(range(5), max_workers=2, output="full"))
+        self.assertTrue(len(seen) > 10)
+        for data, snapshot in seen:
+            self.assertEqual(data, snapshot)
+            self.assertFalse("key" in data)
+        # Every page got its own offset.
+        self.assertEqual(
+            [data.get("offset") for data, _ in seen[:4]],
+            [None, "10", "20", "25"])
+
+        data = {"id": 1, "output": None}
+        api._build_params(data)
+        self.assertEqual(data, {"id": 1, "output": None})
+
+    def _get_sessions(self, transport, num_threads=4):
+        """
+        :rtype: list
+        :returns: The session each thread got, twice over.
+        """
+
+        sessions = [None] * num_threads
+
+        def get_sessions(index):
+            sessions[index] = (transport.get_session(),
+                               transport.get_session())
+
+        threads = [threading.Thread(target=get_sessions, args=(index,))
+                   for index in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sessions
+
+    def test_per_thread_sessions(self):
+        """
+        In thread-safe mode, each thread should get a session of its own,
+        all over the one adapter.
+        """
+
+        session = requests.Session()
+        session.headers["X-Test"] = "yes"
+        adapter = FakeAdapter()
+        session.mount("http://", adapter)
+        sessions = self._get_sessions(
+            RequestsTransport(session, thread_safe=True))
+        for first, second in sessions:
+            self.assertTrue(first is second)
+            self.assertFalse(first is session)
+            self.assertTrue(first.get_adapter("http://api") is adapter)
+            self.assertEqual(first.headers["X-Test"], "yes")
+        self.assertEqual(len(set(id(first) for first, _ in sessions)), 4)
+
+        sessions = self._get_sessions(
+            RequestsTransport(session, thread_safe=False))
+        for first, second in sessions:
+            self.assertTrue(first is session and second is session)
+
+    def test_worker_threads(self):
+        """
+        The client's own worker threads shouldn't share a session either,
+        but should share the connection pool.
+        """
+
+        adapter = FakeAdapter()
+        api = petfinder.PetFinderClient(
+            api_key="key", api_secret="secret", adapter=adapter)
+        used = []
+        get_session = api.transport.get_session
+
+        def record_session():
+            session = get_session()
+            used.append((threading.current_thread(), session))
+            return session
+
+        api.transport.get_session = record_session
+        results = list(api.pet_get_many(range(20), max_workers=4))
+        self.assertEqual([record["id"] for _, record in results],
+                         [str(pet_id) for pet_id in range(20)])
+        self.assertEqual(len(adapter.requests), 20)
+        sessions_by_thread = {}
+        for thread, session in used:
+            sessions_by_thread.setdefault(thread, set()).add(id(session))
+        self.assertTrue(len(sessions_by_thread) > 1)
+        all_sessions = set()
+        for sessions in sessions_by_thread.values():
+            self.assertEqual(len(sessions), 1)
+            all_sessions |= sessions
+        self.assertEqual(len(all_sessions), len(sessions_by_thread))
+        self.assertFalse(id(api.session) in all_sessions)
+
+
+#noinspection PyClassicStyleClass
+class SessionTests(unittest.TestCase):
+    """
+    Tests for setting up the default transport's session. These don't touch
+    the API.
+    """
+
+    def test_pool_size(self):
+        """
+        The client's own session should get a pool of the size asked for,
+        for both schemes.
+        """
+
+        api = petfinder.PetFinderClient(
+            api_key="key", api_secret="secret", pool_connections=3,
+            pool_maxsize=7)
+        adapter = api.session.get_adapter("http://api.petfinder.com/")
+        self.assertTrue(
+            api.session.get_adapter("https://api.petfinder.com/") is adapter)
+        self.assertEqual(adapter._pool_connections, 3)
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertEqual(adapter.poolmanager.connection_pool_kw["maxsize"], 7)
+
+    def test_own_session(self):
+        """
+        A session handed to the client should keep its own adapters, unless
+        it is handed one to mount too.
+        """
+
+        session = requests.Session()
+        adapters = dict(session.adapters)
+        api = petfinder.PetFinderClient(
+            api_key="key", api_secret="secret", session=session)
+        self.assertTrue(api.session is session)
+        self.assertEqual(session.adapters, adapters)
+
+        adapter = FakeAdapter()
+        api = petfinder.PetFinderClient(
+            api_key="key", api_secret="secret", session=session,
+            adapter=adapter)
+        self.assertTrue(session.get_adapter("http://api") is adapter)
+        self.assertTrue(session.get_adapter("https://api") is adapter)
+        self.assertEqual(api.pet_get(id=1)["id"], "1")
+
+    def test_keep_alive(self):
+        """
+        keep_alive=False should ask for the connection to be closed on
+        every request, without touching the caller's session.
+        """
+
+        for keep_alive in (True, False):
+            session = requests.Session()
+            headers = dict(session.headers)
+            adapter = FakeAdapter()
+            api = petfinder.PetFinderClient(
+                api_key="key", api_secret="secret", session=session,
+                adapter=adapter, keep_alive=keep_alive)
+            api.pet_get(id=1)
+            list(api.pet_get_many([2, 3], max_workers=2))
+            self.assertEqual(dict(session.headers), headers)
+            self.assertEqual(len(adapter.requests), 3)
+            for thread, request in adapter.requests:
+                self.assertEqual(
+                    request.headers["Connection"] == "close", not keep_alive)
+
+
+class MissingFieldsTransport(FakeTransport):
+    """
+    The fake server's documents, with the shelterPetId and lastUpdate tags
+    taken out.
+    """
+
+    def render(self, method, params):
+        return re.sub(
+            b"<(shelterPetId|lastUpdate)>[^<]*</(shelterPetId|lastUpdate)>",
+            b"", super(MissingFieldsTransport, self).render(method, params))
+
+
+#noinspection PyClassicStyleClass
+class ParsingTests(unittest.TestCase):
+    """
+    Tests for turning response documents into records. These don't touch
+    the API.
+    """
+
+    def test_parse_datetime_str(self):
+        """
+        The API's usual fixed-width timestamps, and anything else strptime
+        can make sense of, should both come back as UTC datetimes.
+        """
+
+        expected = datetime.datetime(2013, 4, 1, 7, 46, 40, tzinfo=pytz.utc)
+        # The fast path.
+        self.assertEqual(
+            PetFinderClient._parse_datetime_str("2013-04-01T07:46:40Z"),
+            expected)
+        # The strptime fallback.
+        self.assertEqual(
+            PetFinderClient._parse_datetime_str("2013-4-1T7:46:40Z"),
+            expected)
+        self.assertEqual(
+            PetFinderClient._parse_datetime_str(
+                "2013-4-1T7:46:40Z").tzinfo, pytz.utc)
+        for bad in ("2013-13-01T07:46:40Z", "2013-04-01 07:46:40",
+                    "yesterday"):
+            self.assertRaises(
+                ValueError, PetFinderClient._parse_datetime_str, bad)
+
+    def test_missing_fields(self):
+        """
+        Records missing some of their fields should be built from what is
+        there, with the missing fields logged.
+        """
+
+        for response_format in ("xml", "json"):
+            api = get_client(
+                MissingFieldsTransport(), response_format=response_format)
+            with self.assertLogs("petfinder.client", "DEBUG") as logs:
+                record = api.pet_get(id=1)
+            self.assertEqual(
+                logs.output,
+                ["DEBUG:petfinder.client:Pet 1 is missing fields: "
+                 "lastUpdate, shelterPetId"])
+
+            expected = get_client(response_format=response_format).pet_get(
+                id=1)
+            self.assertEqual(
+                expected.pop("lastUpdate"),
+                datetime.datetime(2013, 4, 2, 17, 46, 40, tzinfo=pytz.utc))
+            del expected["shelterPetId"]
+            self.assertEqual(record, expected)
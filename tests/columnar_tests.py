@@ -0,0 +1,196 @@
+import array
+import calendar
+import unittest
+
+from benchmarks.fakeserver import render_document, render_pet
+from petfinder import columnar
+from petfinder.columnar import ROW_COLUMNS
+from tests.fakes import FakeTransport, get_client
+
+
+class GappyTransport(FakeTransport):
+    """
+    A single page of pets, the second of which has no ID, last update,
+    breeds, or photos.
+    """
+
+    def render(self, method, params):
+        pets = []
+        for pet_id in range(3):
+            pet = render_pet(pet_id)
+            if pet_id == 1:
+                for tag in ("id", "lastUpdate", "breeds"):
+                    start = pet.index("<%s>" % tag)
+                    end = pet.index("</%s>" % tag) + len(tag) + 3
+                    pet = pet[:start] + pet[end:]
+                start = pet.index("<media>")
+                pet = pet[:start] + pet[pet.index("</media>") + 8:]
+            pets.append("<pet>%s</pet>" % pet)
+        return render_document(
+            "<lastOffset>3</lastOffset><pets>%s</pets>" % "".join(pets))
+
+
+def _to_seconds(value):
+    """
+    :returns: A lastUpdate column entry, as float seconds since the epoch.
+    """
+
+    if columnar.numpy is not None:
+        return value.astype("datetime64[s]").astype(float)
+    return value
+
+
+def _is_missing(value):
+    """
+    :rtype: bool
+    :returns: ``True`` if a lastUpdate column entry is a placeholder.
+    """
+
+    if columnar.numpy is not None:
+        return bool(columnar.numpy.isnat(value))
+    # nan is the only value that isn't equal to itself.
+    return value != value
+
+
+#noinspection PyClassicStyleClass
+class PetBatchTests(unittest.TestCase):
+    """
+    Tests for columnar batches. These don't touch the API.
+    """
+
+    def _check_batches(self, batches, records, page_sizes):
+        """
+        Makes sure the batches hold the same values as the records, one
+        batch per page.
+        """
+
+        self.assertEqual([len(batch["id"]) for batch in batches], page_sizes)
+        position = 0
+        for batch in batches:
+            size = len(batch["id"])
+            for column in ROW_COLUMNS:
+                self.assertEqual(len(batch[column]), size, column)
+            for name in ("breeds", "options", "photos"):
+                offsets = list(batch["%s_offsets" % name])
+                self.assertEqual(len(offsets), size + 1)
+                self.assertEqual(offsets[0], 0)
+                self.assertEqual(offsets, sorted(offsets))
+            self.assertEqual(
+                batch["breeds_offsets"][-1], len(batch["breeds"]))
+            self.assertEqual(
+                batch["photos_offsets"][-1], len(batch["photo_url"]))
+
+            for row in range(size):
+                record = records[position]
+                position += 1
+                self.assertEqual(batch["id"][row], int(record["id"]))
+                self.assertEqual(batch["name"][row], record["name"])
+                self.assertEqual(
+                    batch["contact_city"][row], record["contact"]["city"])
+                self.assertEqual(
+                    _to_seconds(batch["lastUpdate"][row]),
+                    calendar.timegm(record["lastUpdate"].utctimetuple()))
+                start, end = batch["breeds_offsets"][row:row + 2]
+                self.assertEqual(batch["breeds"][start:end], record["breeds"])
+                start, end = batch["options_offsets"][row:row + 2]
+                self.assertEqual(
+                    batch["options"][start:end], record["options"])
+                start, end = batch["photos_offsets"][row:row + 2]
+                self.assertEqual(
+                    [{"id": photo_id, "size": size, "url": url}
+                     for photo_id, size, url in zip(
+                         batch["photo_id"][start:end],
+                         batch["photo_size"][start:end],
+                         batch["photo_url"][start:end])],
+                    record["photos"])
+        self.assertEqual(position, len(records))
+
+    def test_pages(self):
+        """
+        Each page should become a batch, with every pet's breeds, options,
+        and photos where the offsets say they are.
+        """
+
+        for richness in ("rich", "minimal"):
+            for response_format in ("xml", "json"):
+                api = get_client(
+                    FakeTransport(total_pets=25, richness=richness),
+                    response_format=response_format)
+                kwargs = {"location": "29607", "count": 10, "output": "full"}
+                self._check_batches(
+                    list(api.pet_find_batches(**kwargs)),
+                    list(api.pet_find(**kwargs)), [10, 10, 5])
+
+        api = get_client(FakeTransport(total_pets=25, richness="rich"),
+                         streaming=True)
+        self._check_batches(
+            list(api.shelter_getpets_batches(
+                id="SC001", count=10, output="full")),
+            list(api.shelter_getpets(id="SC001", count=10, output="full")),
+            [10, 10, 5])
+
+    def test_id_batches(self):
+        """
+        output=id should only give an id column.
+        """
+
+        api = get_client(FakeTransport(total_pets=25))
+        batches = list(api.shelter_getpets_batches(id="SC001", count=10))
+        self.assertEqual([list(batch) for batch in batches], [["id"]] * 3)
+        self.assertEqual(
+            [pet_id for batch in batches for pet_id in batch["id"]],
+            list(range(25)))
+
+    @unittest.skipIf(columnar.numpy is None, "NumPy isn't installed.")
+    def test_numpy_dtypes(self):
+        """
+        IDs and offsets should be 64-bit integers, and timestamps
+        datetime64[s].
+        """
+
+        api = get_client(FakeTransport(total_pets=5))
+        batch = next(api.pet_find_batches(location="29607", output="full"))
+        for name in ("id", "breeds_offsets", "options_offsets",
+                     "photos_offsets"):
+            self.assertEqual(batch[name].dtype, columnar.numpy.int64)
+        self.assertEqual(
+            batch["lastUpdate"].dtype, columnar.numpy.dtype("datetime64[s]"))
+        self.assertEqual(
+            str(batch["lastUpdate"][0]), "2013-04-01T17:46:40")
+
+    def test_array_fallback(self):
+        """
+        Without NumPy, the same columns should come back as arrays.
+        """
+
+        numpy = columnar.numpy
+        columnar.numpy = None
+        try:
+            api = get_client(FakeTransport(total_pets=25))
+            kwargs = {"location": "29607", "count": 10, "output": "full"}
+            batches = list(api.pet_find_batches(**kwargs))
+            self._check_batches(
+                batches, list(api.pet_find(**kwargs)), [10, 10, 5])
+            batch = batches[0]
+            for name in ("id", "breeds_offsets", "photos_offsets"):
+                self.assertTrue(isinstance(batch[name], array.array))
+                self.assertEqual(batch[name].typecode, "l")
+            self.assertEqual(batch["lastUpdate"].typecode, "d")
+        finally:
+            columnar.numpy = numpy
+
+    def test_missing_fields(self):
+        """
+        Missing IDs and timestamps should get placeholders, and missing
+        lists should take up no room.
+        """
+
+        for response_format in ("xml", "json"):
+            api = get_client(GappyTransport(), response_format=response_format)
+            batch = next(api.pet_find_batches(location="29607"))
+            self.assertEqual(list(batch["id"]), [0, -1, 2])
+            self.assertTrue(_is_missing(batch["lastUpdate"][1]))
+            self.assertFalse(_is_missing(batch["lastUpdate"][0]))
+            self.assertEqual(list(batch["breeds_offsets"]), [0, 1, 1, 2])
+            self.assertEqual(list(batch["photos_offsets"]), [0, 15, 15, 30])
+            self.assertEqual(batch["name"][1], "Pet 1")
@@ -0,0 +1,274 @@
+import threading
+import time
+import unittest
+try:
+    import queue
+except ImportError:
+    # Python 2.
+    import Queue as queue
+
+from benchmarks.fakeserver import render_document, render_pet
+from petfinder.concurrency import (
+    map_concurrently, merge_iterables, put_until_stopped)
+from petfinder.exceptions import InvalidRequestError, RecordDoesNotExistError
+from petfinder.transport import TransportResponse
+from tests.fakes import FakeTransport, get_client
+
+
+class ShardedTransport(FakeTransport):
+    """
+    pet.find answers with a different (but overlapping) set of pets for
+    each location, all on one page. Pets in ``anonymous`` come back
+    without an ID.
+    """
+
+    def __init__(self, locations, anonymous=(), **kwargs):
+        """
+        :param dict locations: Locations, mapped to lists of pet IDs.
+        """
+
+        super(ShardedTransport, self).__init__(**kwargs)
+        self.locations = locations
+        self.anonymous = anonymous
+
+    def _render_pet(self, pet_id):
+        pet = render_pet(pet_id)
+        if pet_id in self.anonymous:
+            pet = pet.replace("<id>%d</id>" % pet_id, "")
+        return "<pet>%s</pet>" % pet
+
+    def respond(self, method, params):
+        pet_ids = self.locations.get(params["location"], [])
+        if not pet_ids:
+            return TransportResponse(
+                render_document("", "201", "Record does not exist"))
+        if params.get("offset"):
+            pet_ids = []
+        return TransportResponse(render_document(
+            "<lastOffset>%d</lastOffset><pets>%s</pets>" % (
+                len(self.locations[params["location"]]),
+                "".join(self._render_pet(pet_id) for pet_id in pet_ids))))
+
+
+class SlowTransport(FakeTransport):
+    """
+    Answers pet.get for lower IDs more slowly, so lookups finish in the
+    reverse of the order they were started in. ID 13 is an invalid request.
+    """
+
+    def respond(self, method, params):
+        pet_id = int(params["id"])
+        time.sleep(max(0, 10 - pet_id) * 0.02)
+        if pet_id == 13:
+            return TransportResponse(
+                render_document("", "200", "Invalid request"))
+        return super(SlowTransport, self).respond(method, params)
+
+
+#noinspection PyClassicStyleClass
+class MergeIterablesTests(unittest.TestCase):
+    """
+    Tests for merge_iterables and friends.
+    """
+
+    def test_merge(self):
+        """
+        Everything from every iterable should come through, tagged with
+        where it came from.
+        """
+
+        factories = [lambda: iter(range(100)), lambda: iter([]),
+                     lambda: iter(range(100, 150))]
+        items = list(merge_iterables(factories, max_workers=2, queue_size=5))
+        self.assertEqual(
+            sorted(items),
+            [(0, i) for i in range(100)] + [(2, i) for i in range(100, 150)])
+        # Each iterable's items stay in order.
+        self.assertEqual([item for index, item in items if index == 0],
+                         list(range(100)))
+
+    def test_error(self):
+        """
+        The first error should reach the consumer.
+        """
+
+        def broken():
+            yield 1
+            raise ValueError("Broken.")
+
+        self.assertRaises(
+            ValueError, list,
+            merge_iterables([broken, lambda: iter(range(10))]))
+
+    def test_lazy_factories(self):
+        """
+        Factories should only be pulled as workers free up, and errors
+        pulling them should reach the consumer.
+        """
+
+        pulled = []
+
+        def factories():
+            for num in range(1000):
+                pulled.append(num)
+                yield lambda: iter(range(10))
+
+        merged = merge_iterables(factories(), max_workers=2, queue_size=1)
+        next(merged)
+        time.sleep(0.1)
+        self.assertTrue(len(pulled) < 10)
+        merged.close()
+
+        def broken_factories():
+            yield lambda: iter(range(10))
+            raise ValueError("Broken.")
+
+        self.assertRaises(
+            ValueError, list, merge_iterables(broken_factories()))
+
+    def test_abandoned(self):
+        """
+        Workers should quit once the consumer walks away, rather than
+        waiting on a full queue forever.
+        """
+
+        finished = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield 1
+            finally:
+                finished.set()
+
+        merged = merge_iterables([endless], queue_size=2)
+        self.assertEqual(next(merged), (0, 1))
+        merged.close()
+        self.assertTrue(finished.wait(2))
+
+    def test_put_until_stopped(self):
+        """
+        Puts should wait for room, unless told to stop.
+        """
+
+        item_queue = queue.Queue(maxsize=1)
+        stop = threading.Event()
+        self.assertTrue(put_until_stopped(item_queue, 1, stop))
+        timer = threading.Timer(0.1, item_queue.get)
+        timer.start()
+        self.assertTrue(put_until_stopped(item_queue, 2, stop))
+        self.assertEqual(item_queue.get(), 2)
+
+        item_queue.put(3)
+        threading.Timer(0.1, stop.set).start()
+        start = time.time()
+        self.assertFalse(put_until_stopped(
+            item_queue, 4, stop, poll_interval=0.01))
+        self.assertTrue(time.time() - start < 1)
+
+    def test_map_concurrently(self):
+        """
+        Results should come back in order, or as they finish.
+        """
+
+        def square(value):
+            time.sleep(0.01 * (value % 3))
+            return value * value
+
+        results = [(item, future.result())
+                   for item, future in map_concurrently(square, range(20))]
+        self.assertEqual(results, [(i, i * i) for i in range(20)])
+        results = [(item, future.result()) for item, future in
+                   map_concurrently(square, range(20), ordered=False)]
+        self.assertEqual(sorted(results), [(i, i * i) for i in range(20)])
+
+
+#noinspection PyClassicStyleClass
+class ShardedFindTests(unittest.TestCase):
+    """
+    Tests for pet_find_sharded. These don't touch the API.
+    """
+
+    def test_dedup(self):
+        """
+        Pets turning up in more than one shard should only come out once.
+        Empty shards should be skipped.
+        """
+
+        transport = ShardedTransport({
+            "29607": list(range(0, 20)),
+            "29601": list(range(10, 30)),
+            "29609": list(range(25, 35)),
+        })
+        api = get_client(transport)
+        records = list(api.pet_find_sharded(
+            ["29607", "29601", "29609", "00000"], animal="dog"))
+        self.assertEqual(sorted(int(record["id"]) for record in records),
+                         list(range(35)))
+        for method, params in transport.calls:
+            self.assertEqual(params["animal"], "dog")
+
+    def test_missing_id(self):
+        """
+        Pets without an ID can't be de-duplicated, but shouldn't break
+        anything either.
+        """
+
+        transport = ShardedTransport(
+            {"29607": [1, 2], "29601": [2, 3]}, anonymous=[2])
+        for record_mode in ("dict", "compact"):
+            api = get_client(transport, record_mode=record_mode)
+            records = list(api.pet_find_sharded(["29607", "29601"]))
+            self.assertEqual(
+                sorted(record.get("id") or "" for record in records),
+                ["", "", "1", "3"])
+
+
+#noinspection PyClassicStyleClass
+class GetManyTests(unittest.TestCase):
+    """
+    Tests for pet_get_many and shelter_get_many. These don't touch the API.
+    """
+
+    def test_ordering(self):
+        """
+        Results should come back in the order the IDs were given in, unless
+        asked otherwise.
+        """
+
+        api = get_client(SlowTransport())
+        pet_ids = list(range(10))
+        results = list(api.pet_get_many(pet_ids, max_workers=10))
+        self.assertEqual([pet_id for pet_id, _ in results], pet_ids)
+        for pet_id, record in results:
+            self.assertEqual(record, api.pet_get(id=pet_id))
+
+        results = list(api.pet_get_many(pet_ids, max_workers=10,
+                                        ordered=False))
+        self.assertEqual(sorted(pet_id for pet_id, _ in results), pet_ids)
+        # The quickest lookups finish first.
+        self.assertEqual(results[0][0], 9)
+
+        results = list(get_client().shelter_get_many(
+            ["SC003", "SC001", "SC002"], max_workers=2))
+        self.assertEqual(
+            [(shelter_id, record["id"]) for shelter_id, record in results],
+            [("SC003", "SC003"), ("SC001", "SC001"), ("SC002", "SC002")])
+
+    def test_errors(self):
+        """
+        Missing records should come back in place of their records, rather
+        than being raised. Any other error should be raised.
+        """
+
+        api = get_client(SlowTransport())
+        results = list(api.pet_get_many([5, 2000, 6], max_workers=3,
+                                        output="full"))
+        self.assertEqual([pet_id for pet_id, _ in results], [5, 2000, 6])
+        self.assertEqual(results[0][1]["id"], "5")
+        self.assertTrue(isinstance(results[1][1], RecordDoesNotExistError))
+        self.assertEqual(results[2][1]["id"], "6")
+
+        results = api.pet_get_many([5, 13, 6], max_workers=3)
+        self.assertEqual(next(results)[0], 5)
+        self.assertRaises(InvalidRequestError, next, results)
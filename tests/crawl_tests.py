@@ -0,0 +1,100 @@
+import unittest
+
+import petfinder
+from benchmarks.fakeserver import render_document, start_server
+from petfinder.crawl import crawl_region, crawl_shelters
+from petfinder.exceptions import ClientRateLimitExceeded, InvalidRequestError
+from petfinder.ratelimit import MemoryBackend, RateLimiter
+from petfinder.transport import TransportResponse
+from tests.fakes import get_client
+
+
+class InvalidRequestTransport(object):
+    """
+    Answers every call with an "Invalid request" error.
+    """
+
+    def get(self, url, params, stream=False):
+        return TransportResponse(render_document("", "200", "Invalid request"))
+
+    def close(self):
+        pass
+
+
+#noinspection PyClassicStyleClass
+class CrawlTests(unittest.TestCase):
+    """
+    Tests for the multi-process crawlers. These don't touch the API.
+    """
+
+    def setUp(self):
+        self.api = get_client(InvalidRequestTransport())
+
+    def test_shelter_ids_error(self):
+        """
+        Errors from the shelter IDs should reach the consumer.
+        """
+
+        def shelter_ids():
+            raise ValueError("No shelters.")
+            yield
+
+        self.assertRaises(
+            ValueError, list,
+            crawl_shelters(self.api, shelter_ids(), processes=1))
+
+    def test_shelter_find_error(self):
+        """
+        The parent's shelter_find errors should reach the consumer.
+        """
+
+        self.assertRaises(
+            InvalidRequestError, list,
+            crawl_region(self.api, processes=1, location="SC"))
+
+
+#noinspection PyClassicStyleClass
+class CrawlRateLimitTests(unittest.TestCase):
+    """
+    The workers should draw on the parent's rate budget. These run against
+    the fake API server.
+    """
+
+    def setUp(self):
+        # Ten pets, so each shelter takes two calls: one for the pets, and
+        # one to find there are no more.
+        self.url, self.server = start_server(total_pets=10)
+        self.limiter = RateLimiter(per_day=5)
+        self.api = petfinder.PetFinderClient(
+            api_key="key", api_secret="secret", endpoint=self.url,
+            rate_limiter=self.limiter)
+        # Spend some of today's budget in the parent.
+        self.limiter.acquire()
+        self.limiter.acquire()
+
+    def tearDown(self):
+        self.server.terminate()
+        self.server.join()
+
+    def test_shared_budget(self):
+        """
+        Calls made by the workers should come out of the parent's budget.
+        """
+
+        records = list(crawl_shelters(
+            self.api, ["SC001"], processes=1, output="id"))
+        self.assertEqual(len(records), 10)
+        self.assertTrue(isinstance(self.limiter.backend, MemoryBackend))
+        self.assertEqual(self.limiter.remaining_today(), 1)
+
+    def test_budget_used_up(self):
+        """
+        The workers shouldn't get a fresh budget of their own.
+        """
+
+        self.assertRaises(
+            ClientRateLimitExceeded, list,
+            crawl_shelters(self.api, ["SC001", "SC002"], processes=2,
+                           output="id"))
+        self.assertTrue(isinstance(self.limiter.backend, MemoryBackend))
+        self.assertEqual(self.limiter.remaining_today(), 0)
@@ -0,0 +1,210 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.export import (
+    FLAT_PET_FIELDS, CSVWriter, JSONLWriter, ParquetWriter, export_region,
+    export_shelters, flatten_pet_record)
+from tests.fakes import FakeTransport, get_client
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ListWriter(object):
+    """
+    Keeps whatever it is handed.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    @property
+    def records(self):
+        return [record for batch in self.batches for record in batch]
+
+    def write_batch(self, records):
+        self.batches.append(list(records))
+
+
+class StubClient(object):
+    """
+    Each shelter has ``num_pets`` pets, except for those in ``empty``.
+    Notes down how much the writer had been handed by the time each
+    shelter's pets were all fetched.
+    """
+
+    def __init__(self, writer, num_pets, empty=()):
+        self.writer = writer
+        self.num_pets = num_pets
+        self.empty = empty
+        self.written = {}
+
+    def shelter_getpets(self, id, output):
+        if id in self.empty:
+            raise RecordDoesNotExistError("Record does not exist")
+        for num in range(self.num_pets):
+            yield {"id": "%s-%d" % (id, num)}
+        self.written[id] = len(self.writer.records)
+
+
+#noinspection PyClassicStyleClass
+class WriterTests(unittest.TestCase):
+    """
+    Tests for the export writers.
+    """
+
+    def setUp(self):
+        api = get_client()
+        self.records = [api.pet_get(id=pet_id) for pet_id in (1, 2, 3)]
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_flatten(self):
+        """
+        Flattened records should have every column, and nothing nested.
+        """
+
+        flat = flatten_pet_record(self.records[0])
+        self.assertEqual(sorted(flat), sorted(FLAT_PET_FIELDS))
+        self.assertEqual(flat["lastUpdate"], "2013-04-02T17:46:40Z")
+        self.assertEqual(flat["contact_city"], "Greenville")
+        self.assertEqual(flat["breeds"], ["Labrador Retriever"])
+        self.assertEqual(len(flat["photos"]), 15)
+        # Compact records flatten the same.
+        api = get_client(record_mode="compact")
+        self.assertEqual(flatten_pet_record(api.pet_get(id=1)), flat)
+
+    def test_jsonl(self):
+        """
+        One record per line, with timestamps as strings.
+        """
+
+        out = io.StringIO()
+        writer = JSONLWriter(out)
+        writer.write_batch(self.records[:2])
+        writer.write_batch(self.records[2:])
+        writer.close()
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["id"] for line in lines], ["1", "2", "3"])
+        self.assertEqual(lines[0]["lastUpdate"], "2013-04-02T17:46:40Z")
+        self.assertEqual(lines[0]["contact"], self.records[0]["contact"])
+
+    def test_csv(self):
+        """
+        A header, then one flattened row per record, with lists joined.
+        """
+
+        out = io.StringIO(newline="")
+        writer = CSVWriter(out)
+        writer.write_batch(self.records)
+        writer.close()
+        rows = list(csv.DictReader(io.StringIO(out.getvalue(), newline="")))
+        self.assertEqual([row["id"] for row in rows], ["1", "2", "3"])
+        self.assertEqual(rows[0]["options"], "hasShots|altered")
+        self.assertEqual(rows[0]["contact_zip"], "29607")
+        self.assertEqual(rows[0]["contact_fax"], "")
+
+        out = io.StringIO(newline="")
+        CSVWriter(out, fields=["id", "name"]).write_batch(self.records[:1])
+        self.assertEqual(out.getvalue().splitlines(), ["id,name", "1,Pet 1"])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow isn't installed.")
+    def test_parquet(self):
+        """
+        Each batch should become a row group, with lists kept as lists.
+        """
+
+        path = os.path.join(self.tmp_dir, "pets.parquet")
+        writer = ParquetWriter(path)
+        writer.write_batch(self.records[:2])
+        writer.write_batch(self.records[2:])
+        writer.close()
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        rows = parquet_file.read().to_pylist()
+        self.assertEqual([row["id"] for row in rows], ["1", "2", "3"])
+        self.assertEqual(rows[0]["options"], ["hasShots", "altered"])
+        self.assertEqual(rows[0]["lastUpdate"], "2013-04-02T17:46:40Z")
+
+
+#noinspection PyClassicStyleClass
+class ExportTests(unittest.TestCase):
+    """
+    Tests for export_shelters and export_region. These don't touch the API.
+    """
+
+    def test_export_shelters(self):
+        """
+        Every shelter's pets should be written, in batches.
+        """
+
+        writer = ListWriter()
+        client = StubClient(writer, 25, empty=["SC003"])
+        stats = export_shelters(
+            client, iter(["SC001", "SC002", "SC003"]), writer, batch_size=10)
+        self.assertEqual(stats, {"shelters": 3, "records": 50})
+        self.assertEqual([len(batch) for batch in writer.batches],
+                         [10, 10, 10, 10, 10])
+        self.assertEqual(
+            sorted(record["id"] for record in writer.records),
+            sorted(["SC001-%d" % num for num in range(25)] +
+                   ["SC002-%d" % num for num in range(25)]))
+
+    def test_streaming(self):
+        """
+        Records should reach the writer while the shelter is still being
+        fetched, rather than once it is done.
+        """
+
+        writer = ListWriter()
+        client = StubClient(writer, 100)
+        export_shelters(client, ["SC001"], writer, batch_size=5,
+                        queue_size=5)
+        # At most a queue and a batch behind.
+        self.assertTrue(client.written["SC001"] >= 100 - 5 - 5 - 1)
+
+    def test_export_region(self):
+        """
+        Every shelter shelter_find turns up should be exported.
+        """
+
+        writer = ListWriter()
+        stats = export_region(
+            get_client(FakeTransport(total_pets=30, total_shelters=4)),
+            writer,
+            location="SC", output="basic")
+        self.assertEqual(stats, {"shelters": 4, "records": 120})
+        self.assertEqual(len(writer.records), 120)
+
+    def test_id_output(self):
+        """
+        Exporting bare IDs should be refused up front, before anything is
+        fetched, and flattening one should say what went wrong.
+        """
+
+        for output in ("id", None, "nonsense"):
+            transport = FakeTransport(total_pets=30, total_shelters=4)
+            writer = ListWriter()
+            self.assertRaises(
+                ValueError, export_region, get_client(transport), writer,
+                location="SC", output=output)
+            self.assertRaises(
+                ValueError, export_shelters, get_client(transport),
+                ["SC001"], writer, output=output)
+            self.assertEqual(transport.calls, [])
+            self.assertEqual(writer.batches, [])
+
+        pet_id = next(get_client().shelter_getpets(id="SC001", output="id"))
+        self.assertRaises(TypeError, flatten_pet_record, pet_id)
+        self.assertRaises(
+            TypeError, CSVWriter(io.StringIO()).write_batch, [pet_id])
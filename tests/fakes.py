@@ -0,0 +1,132 @@
+"""
+In-process stand-ins for the Petfinder API, for the tests that don't touch
+it.
+"""
+
+import threading
+try:
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    # Python 2.
+    from urlparse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import petfinder
+from benchmarks.fakeserver import render_response
+from petfinder.jsonformat import xml_to_json
+from petfinder.transport import TransportResponse
+
+
+class FakeTransport(object):
+    """
+    Answers calls with the fake server's documents, without the server.
+    Every call is recorded in ``calls``, as a ``(method, params)`` tuple.
+    Sub-classes can override :py:meth:`render` to serve other documents,
+    or :py:meth:`respond` to get up to mischief.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Takes the same keyword arguments as
+        :py:func:`benchmarks.fakeserver.render_response`.
+        """
+
+        self.kwargs = kwargs
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params, stream=False):
+        method = url.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls.append((method, dict(params)))
+        return self.respond(method, params)
+
+    def render(self, method, params):
+        """
+        :param str method: The API method name.
+        :param dict params: The query string parameters.
+        :rtype: bytes
+        :returns: The XML response document. JSON is converted from it.
+        """
+
+        return render_response(method, params, **self.kwargs)
+
+    def respond(self, method, params):
+        """
+        :param str method: The API method name.
+        :param dict params: The query string parameters.
+        :rtype: petfinder.transport.TransportResponse
+        """
+
+        content = self.render(method, params)
+        if params.get("format") == "json":
+            content = xml_to_json(content)
+        return TransportResponse(content)
+
+    def get_offsets(self, method):
+        """
+        :param str method: The API method name.
+        :rtype: list
+        :returns: The offset sent with each call to the method, in order.
+        """
+
+        with self._lock:
+            return [params.get("offset") for name, params in self.calls
+                    if name == method]
+
+    def close(self):
+        pass
+
+
+class FakeAdapter(HTTPAdapter):
+    """
+    A requests transport adapter that answers with the fake server's
+    documents, without the server or a socket. Every request is recorded in
+    ``requests``, as a ``(thread, request)`` tuple.
+    """
+
+    def __init__(self, render_kwargs=None, **kwargs):
+        """
+        :keyword dict render_kwargs: Keyword arguments for
+            :py:func:`benchmarks.fakeserver.render_response`. Any others are
+            passed on to the adapter.
+        """
+
+        super(FakeAdapter, self).__init__(**kwargs)
+        self.render_kwargs = render_kwargs or {}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests.append((threading.current_thread(), request))
+        url = urlparse(request.url)
+        params = dict(
+            (key, values[0]) for key, values in parse_qs(url.query).items())
+        content = render_response(
+            url.path.strip("/"), params, **self.render_kwargs)
+        if params.get("format") == "json":
+            content = xml_to_json(content)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def get_client(transport=None, **kwargs):
+    """
+    :keyword transport: The transport to send requests through. Defaults to
+        a :py:class:`FakeTransport`.
+    :rtype: petfinder.PetFinderClient
+    :returns: A client that never touches the API. Any other kwargs are
+        passed on to the client.
+    """
+
+    if transport is None:
+        transport = FakeTransport()
+    return petfinder.PetFinderClient(
+        api_key="key", api_secret="secret", transport=transport, **kwargs)
@@ -0,0 +1,71 @@
+import copy
+import unittest
+
+from petfinder.interning import ValueTable
+from tests.fakes import get_client
+
+
+#noinspection PyClassicStyleClass
+class ValueTableTests(unittest.TestCase):
+    """
+    Interned records should be no different, except in sharing values.
+    These don't touch the API.
+    """
+
+    def test_pet_get(self):
+        """
+        Records should match, and share their categorical values.
+        """
+
+        table = ValueTable()
+        for response_format in ("xml", "json"):
+            api = get_client(response_format=response_format)
+            interning_api = get_client(
+                response_format=response_format, value_table=table)
+            for pet_id in (1, 2):
+                record = interning_api.pet_get(id=pet_id)
+                self.assertEqual(api.pet_get(id=pet_id), record)
+                self.assertTrue(record["animal"] is table.intern("Dog"))
+                self.assertTrue(
+                    record["breeds"][0] is table.intern(record["breeds"][0]))
+                self.assertTrue(
+                    record["contact"]["state"] is table.intern("SC"))
+                self.assertTrue(
+                    record["photos"][0]["size"] is table.intern("x"))
+
+    def test_shelter_get(self):
+        """
+        Shelter records should match, and share their location values.
+        """
+
+        table = ValueTable()
+        record = get_client(value_table=table).shelter_get(id="SC001")
+        self.assertEqual(get_client().shelter_get(id="SC001"), record)
+        self.assertTrue(record["city"] is table.intern("Greenville"))
+
+    def test_copy(self):
+        """
+        The record handed in should be left alone, nested dicts and all.
+        """
+
+        record = get_client().pet_get(id=1)
+        original = copy.deepcopy(record)
+        photos = record["photos"]
+        interned = ValueTable().intern_pet_record(record)
+        self.assertEqual(interned, original)
+        self.assertEqual(record, original)
+        self.assertTrue(record["photos"] is photos)
+        for photo, interned_photo in zip(photos, interned["photos"]):
+            self.assertFalse(photo is interned_photo)
+        self.assertFalse(record["contact"] is interned["contact"])
+
+    def test_codes(self):
+        """
+        Codes should be handed out in order, and decode back to the value.
+        """
+
+        table = ValueTable()
+        self.assertEqual(table.encode("Dog"), 0)
+        self.assertEqual(table.encode("Cat"), 1)
+        self.assertEqual(table.encode("Dog"), 0)
+        self.assertEqual(table.decode(1), "Cat")
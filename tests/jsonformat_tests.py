@@ -0,0 +1,270 @@
+import json
+import unittest
+
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.jsonformat import xml_to_json
+from petfinder.transport import TransportResponse
+from tests.fakes import FakeTransport, get_client
+
+
+# Canned XML responses for the JSON parity tests, keyed by API method.
+PARITY_FIXTURES = {
+    "pet.get": (
+        '<?xml version="1.0" encoding="UTF-8"?><petfinder><header>'
+        '<version>0.1</version><status><code>100</code><message/></status>'
+        '</header><pet><id>23220812</id><shelterId>SC112</shelterId>'
+        '<shelterPetId/><name>Buddy</name><animal>Dog</animal><breeds>'
+        '<breed>Beagle</breed></breeds><mix>no</mix><age>Young</age>'
+        '<sex>M</sex><size>M</size><options><option>hasShots</option>'
+        '<option>altered</option></options><description>A good dog.'
+        '</description><lastUpdate>2012-09-12T15:45:17Z</lastUpdate>'
+        '<status>A</status><media><photos>'
+        '<photo id="1" size="x">http://example.com/1-x.jpg</photo>'
+        '<photo id="1" size="t">http://example.com/1-t.jpg</photo>'
+        '</photos></media><contact><address1>1 Main St</address1>'
+        '<address2/><city>Greenville</city><state>SC</state>'
+        '<zip>29607</zip><phone/><fax/><email>a@example.com</email>'
+        '</contact></pet></petfinder>'
+    ),
+    "shelter.getPets": (
+        '<?xml version="1.0" encoding="UTF-8"?><petfinder><header>'
+        '<version>0.1</version><status><code>100</code><message/></status>'
+        '</header><lastOffset>1</lastOffset><pets><pet><id>1</id>'
+        '<name>Solo</name><breeds/><options/><media/>'
+        '<lastUpdate>2012-09-12T15:45:17Z</lastUpdate></pet></pets>'
+        '</petfinder>'
+    ),
+    "shelter.get": (
+        '<?xml version="1.0" encoding="UTF-8"?><petfinder><header>'
+        '<version>0.1</version><status><code>100</code><message/></status>'
+        '</header><shelter><id>SC112</id><name>Some Shelter</name>'
+        '<city>Greenville</city><fax/></shelter></petfinder>'
+    ),
+    "breed.list": (
+        '<?xml version="1.0" encoding="UTF-8"?><petfinder><header>'
+        '<version>0.1</version><status><code>100</code><message/></status>'
+        '</header><breeds animal="dog"><breed>Beagle</breed>'
+        '<breed>Boxer</breed></breeds></petfinder>'
+    ),
+    "shelter.listByBreed": (
+        '<?xml version="1.0" encoding="UTF-8"?><petfinder><header>'
+        '<version>0.1</version><status><code>100</code><message/></status>'
+        '</header><shelterIds><id>SC112</id><id>GA137</id></shelterIds>'
+        '</petfinder>'
+    ),
+    "pet.getRandom": (
+        '<?xml version="1.0" encoding="UTF-8"?><petfinder><header>'
+        '<version>0.1</version><status><code>201</code>'
+        '<message>Record does not exist</message></status></header>'
+        '</petfinder>'
+    ),
+}
+
+
+class FixtureTransport(FakeTransport):
+    """
+    Serves PARITY_FIXTURES, converted to JSON if the client asks for it.
+    """
+
+    def render(self, method, params):
+        return PARITY_FIXTURES[method].encode("utf-8")
+
+
+# The same documents as some of PARITY_FIXTURES, written out the way the
+# API's format=json sends them, rather than converted with xml_to_json: keys
+# in no particular order, the xsi attributes kept, a header timestamp, and
+# single children as objects rather than lists.
+_API_JSON_ROOT = (
+    '{"@encoding":"iso-8859-1","@version":"1.0","petfinder":{'
+    '"@xmlns:xsi":"http://www.w3.org/2001/XMLSchema-instance",%s,'
+    '"header":{"timestamp":{"$t":"2013-04-21T21:54:03Z"},'
+    '"status":{"message":%s,"code":{"$t":"%s"}},"version":{"$t":"0.1"}},'
+    '"@xsi:noNamespaceSchemaLocation":'
+    '"http://api.petfinder.com/schemas/0.9/petfinder.xsd"}}'
+)
+API_JSON_FIXTURES = {
+    "pet.get": _API_JSON_ROOT % (
+        '"pet":{"options":{"option":[{"$t":"hasShots"},{"$t":"altered"}]},'
+        '"status":{"$t":"A"},"contact":{"phone":{},"state":{"$t":"SC"},'
+        '"address2":{},"email":{"$t":"a@example.com"},'
+        '"city":{"$t":"Greenville"},"zip":{"$t":"29607"},"fax":{},'
+        '"address1":{"$t":"1 Main St"}},"age":{"$t":"Young"},'
+        '"size":{"$t":"M"},"media":{"photos":{"photo":['
+        '{"@size":"x","$t":"http://example.com/1-x.jpg","@id":"1"},'
+        '{"@size":"t","$t":"http://example.com/1-t.jpg","@id":"1"}]}},'
+        '"id":{"$t":"23220812"},"shelterPetId":{},'
+        '"breeds":{"breed":{"$t":"Beagle"}},"name":{"$t":"Buddy"},'
+        '"sex":{"$t":"M"},"description":{"$t":"A good dog."},'
+        '"mix":{"$t":"no"},"shelterId":{"$t":"SC112"},'
+        '"lastUpdate":{"$t":"2012-09-12T15:45:17Z"},"animal":{"$t":"Dog"}}',
+        '{}', '100'),
+    "shelter.getPets": _API_JSON_ROOT % (
+        '"pets":{"pet":{"options":{},"media":{},"id":{"$t":"1"},'
+        '"breeds":{},"name":{"$t":"Solo"},'
+        '"lastUpdate":{"$t":"2012-09-12T15:45:17Z"}}},'
+        '"lastOffset":{"$t":"1"}',
+        '{}', '100'),
+    "shelter.get": _API_JSON_ROOT % (
+        '"shelter":{"fax":{},"city":{"$t":"Greenville"},'
+        '"name":{"$t":"Some Shelter"},"id":{"$t":"SC112"}}',
+        '{}', '100'),
+    "breed.list": _API_JSON_ROOT % (
+        '"breeds":{"breed":[{"$t":"Beagle"},{"$t":"Boxer"}],'
+        '"@animal":"dog"}',
+        '{}', '100'),
+    "shelter.listByBreed": _API_JSON_ROOT % (
+        '"shelterIds":{"id":[{"$t":"SC112"},{"$t":"GA137"}]}',
+        '{}', '100'),
+    "pet.getRandom": _API_JSON_ROOT % (
+        '"lastOffset":{}',
+        '{"$t":"Record does not exist"}', '201'),
+}
+
+
+class APIJSONFixtureTransport(FixtureTransport):
+    """
+    Serves API_JSON_FIXTURES to JSON clients, and PARITY_FIXTURES to XML
+    ones.
+    """
+
+    def respond(self, method, params):
+        if params.get("format") == "json":
+            return TransportResponse(
+                API_JSON_FIXTURES[method].encode("utf-8"))
+        return super(APIJSONFixtureTransport, self).respond(method, params)
+
+
+#noinspection PyClassicStyleClass
+class JSONParityTests(unittest.TestCase):
+    """
+    JSON responses should give exactly the same records as XML ones. These
+    don't touch the API.
+    """
+
+    transport_class = FixtureTransport
+
+    def _get_clients(self, record_mode="dict"):
+        return [
+            get_client(self.transport_class(), record_mode=record_mode,
+                       response_format=response_format)
+            for response_format in ("xml", "json")
+        ]
+
+    def test_pet_get(self):
+        """
+        Pet records, lists of one and all, should match.
+        """
+
+        for record_mode in ("dict", "compact"):
+            xml_api, json_api = self._get_clients(record_mode)
+            self.assertEqual(
+                xml_api.pet_get(id=23220812), json_api.pet_get(id=23220812))
+
+    def test_shelter_getpets(self):
+        """
+        Sparse pet records from a paginated call should match.
+        """
+
+        xml_api, json_api = self._get_clients()
+        self.assertEqual(
+            list(xml_api.shelter_getpets(id="SC112", output="full")),
+            list(json_api.shelter_getpets(id="SC112", output="full")))
+
+    def test_shelter_get_and_breed_list(self):
+        """
+        Shelter records and breed lists should match.
+        """
+
+        xml_api, json_api = self._get_clients()
+        self.assertEqual(
+            xml_api.shelter_get(id="SC112"), json_api.shelter_get(id="SC112"))
+        self.assertEqual(
+            xml_api.breed_list(animal="dog"),
+            json_api.breed_list(animal="dog"))
+
+    def test_shelter_getpets_batches(self):
+        """
+        Batches should hold the same values as the records.
+        """
+
+        for api in self._get_clients():
+            record = next(api.shelter_getpets(id="SC112", output="full"))
+            batch = next(api.shelter_getpets_batches(
+                id="SC112", output="full"))
+            self.assertEqual(list(batch["id"]), [int(record["id"])])
+            self.assertEqual(batch["name"], [record["name"]])
+            self.assertEqual(list(batch["breeds_offsets"]), [0, 0])
+            self.assertEqual(batch["contact_city"], [None])
+
+    def test_errors(self):
+        """
+        Error statuses should raise the same exceptions.
+        """
+
+        for api in self._get_clients():
+            self.assertRaises(RecordDoesNotExistError, api.pet_getrandom)
+
+
+#noinspection PyClassicStyleClass
+class APIJSONParityTests(JSONParityTests):
+    """
+    Same as JSONParityTests, but against JSON in the shape the API sends,
+    rather than what xml_to_json makes of the XML.
+    """
+
+    transport_class = APIJSONFixtureTransport
+
+    def test_shelter_listbybreed(self):
+        """
+        Lists of IDs should match.
+        """
+
+        xml_api, json_api = self._get_clients()
+        self.assertEqual(
+            list(xml_api.shelter_listbybreed(animal="dog", breed="Beagle")),
+            list(json_api.shelter_listbybreed(animal="dog", breed="Beagle")))
+
+    def test_fixtures(self):
+        """
+        The fixtures shouldn't just be what xml_to_json makes of the XML,
+        or these tests would prove nothing.
+        """
+
+        for method, fixture in API_JSON_FIXTURES.items():
+            converted = xml_to_json(PARITY_FIXTURES[method].encode("utf-8"))
+            self.assertNotEqual(
+                json.loads(fixture), json.loads(converted), method)
+
+
+#noinspection PyClassicStyleClass
+class GeneratedJSONParityTests(unittest.TestCase):
+    """
+    Same as JSONParityTests, but against the fake API's generated documents,
+    which run to several pages of full records.
+    """
+
+    def test_paginated(self):
+        """
+        Every page of every paginated call should match.
+        """
+
+        for record_mode in ("dict", "compact"):
+            xml_api, json_api = [
+                get_client(FakeTransport(total_pets=45, total_shelters=12,
+                                         richness="rich"),
+                           record_mode=record_mode,
+                           response_format=response_format)
+                for response_format in ("xml", "json")
+            ]
+            for api_method, kwargs in (
+                ("pet_find", {"location": "29607", "output": "full"}),
+                ("shelter_getpets", {"id": "SC001", "output": "full"}),
+                ("shelter_getpets", {"id": "SC001", "output": "id"}),
+                ("shelter_find", {"location": "29607"}),
+            ):
+                records = list(getattr(xml_api, api_method)(
+                    count=10, **kwargs))
+                self.assertTrue(len(records) > 10)
+                self.assertEqual(
+                    list(getattr(json_api, api_method)(count=10, **kwargs)),
+                    records)
@@ -0,0 +1,98 @@
+import unittest
+
+from benchmarks.fakeserver import render_document
+from petfinder.exceptions import InvalidRequestError, RecordDoesNotExistError
+from petfinder.metrics import Metrics
+from petfinder.transport import TransportResponse
+from tests.fakes import FakeTransport, get_client
+
+
+class EndOfChainTransport(FakeTransport):
+    """
+    Like the API, answers with "Record does not exist" once a paginated
+    call runs past its last record, rather than an empty page.
+    """
+
+    def respond(self, method, params):
+        total = self.kwargs.get("total_pets", 1000)
+        if int(params.get("offset") or 0) >= total:
+            return TransportResponse(
+                render_document("", "201", "Record does not exist"))
+        return super(EndOfChainTransport, self).respond(method, params)
+
+
+#noinspection PyClassicStyleClass
+class MetricsTests(unittest.TestCase):
+    """
+    Tests for call instrumentation. These don't touch the API.
+    """
+
+    def setUp(self):
+        self.metrics = Metrics()
+        self.calls = []
+
+    def _get_client(self, transport):
+        api = get_client(transport, metrics=self.metrics)
+        api.add_post_call_hook(
+            lambda method, data, elapsed, error: self.calls.append(
+                (method, error)))
+        return api
+
+    def test_pet_get_metrics(self):
+        """
+        A pet_get() should show up in each phase's histogram.
+        """
+
+        self._get_client(FakeTransport()).pet_get(id=1)
+        snapshot = self.metrics.snapshot()
+        for phase in ("network", "parse", "record", "total"):
+            self.assertEqual(
+                snapshot["latency"][("pet.get", phase)]["count"], 1)
+        self.assertTrue(snapshot["bytes_received"]["pet.get"] > 0)
+        self.assertEqual(self.calls, [("pet.get", None)])
+
+    def test_errors_counted(self):
+        """
+        Failed calls should be counted by exception class.
+        """
+
+        api = self._get_client(FakeTransport())
+        # The fake API doesn't know pet.getRandom.
+        self.assertRaises(InvalidRequestError, api.pet_getrandom)
+        self.assertEqual(
+            self.metrics.snapshot()["errors"],
+            {("pet.getRandom", "InvalidRequestError"): 1})
+        self.assertTrue(isinstance(self.calls[0][1], InvalidRequestError))
+
+    def test_end_of_chain(self):
+        """
+        Running off the end of a paginated call isn't an error, for the
+        metrics or the hooks.
+        """
+
+        api = self._get_client(EndOfChainTransport(total_pets=25))
+        for streaming in (False, True):
+            api.streaming = streaming
+            del self.calls[:]
+            self.metrics.reset()
+            pet_ids = list(api.shelter_getpets(id="SC001", count=10))
+            self.assertEqual(len(pet_ids), 25)
+            snapshot = self.metrics.snapshot()
+            self.assertEqual(snapshot["errors"], {})
+            self.assertEqual(
+                self.calls, [("shelter.getPets", None)] * 4)
+            self.assertEqual(
+                snapshot["pages_per_chain"]["shelter.getPets"]["count"], 1)
+
+    def test_empty_chain(self):
+        """
+        A paginated call with nothing in it still is an error.
+        """
+
+        api = self._get_client(EndOfChainTransport(total_pets=0))
+        self.assertRaises(
+            RecordDoesNotExistError, list, api.shelter_getpets(id="SC001"))
+        self.assertEqual(
+            self.metrics.snapshot()["errors"],
+            {("shelter.getPets", "RecordDoesNotExistError"): 1})
+        self.assertTrue(isinstance(self.calls[0][1], RecordDoesNotExistError))
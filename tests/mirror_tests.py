@@ -0,0 +1,181 @@
+import datetime
+import unittest
+
+import pytz
+
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.mirror import MirrorStore
+from petfinder.sync import ADDED, REMOVED, UPDATED, SyncEvent
+from tests.fakes import FakeTransport, get_client
+
+
+def _pet(pet_id, breeds=("Beagle",), city="Greenville", state="SC",
+         zip="29607", **fields):
+    """
+    :rtype: dict
+    :returns: A pet record dict, like the client builds.
+    """
+
+    record = {
+        "id": str(pet_id), "shelterId": "SC001", "shelterPetId": None,
+        "name": "Pet %d" % pet_id, "animal": "Dog", "mix": "no",
+        "age": "Adult", "sex": "M", "size": "M", "description": None,
+        "status": "A", "breeds": list(breeds), "options": [], "photos": [],
+        "lastUpdate": datetime.datetime(2013, 4, 2, tzinfo=pytz.utc),
+        "contact": {"city": city, "state": state, "zip": zip},
+    }
+    record.update(fields)
+    return record
+
+
+#noinspection PyClassicStyleClass
+class MirrorStoreTests(unittest.TestCase):
+    """
+    Tests for the SQLite mirror.
+    """
+
+    def setUp(self):
+        self.mirror = MirrorStore(":memory:")
+        self.mirror.store_pets([
+            _pet(9),
+            _pet(10, animal="Cat", breeds=["Siamese"], sex="F"),
+            _pet(11, breeds=["Beagle", "Boxer"], size="L",
+                 city="Columbia", zip="29201"),
+            _pet(100, age="Baby", city="Savannah", state="GA", zip="31401"),
+            _pet(2, status="X", city="Greenville", state="NC", zip="27834"),
+        ])
+
+    def tearDown(self):
+        self.mirror.close()
+
+    def _find(self, **kwargs):
+        return [record["id"] for record in self.mirror.pet_find(**kwargs)]
+
+    def test_order(self):
+        """
+        Pets should come back in numeric ID order.
+        """
+
+        self.assertEqual(self._find(), ["2", "9", "10", "11", "100"])
+
+    def test_filters(self):
+        """
+        Each filter should narrow things down, case-insensitively.
+        """
+
+        self.assertEqual(self._find(animal="cat"), ["10"])
+        self.assertEqual(self._find(animal="Dog", sex="M"),
+                         ["2", "9", "11", "100"])
+        self.assertEqual(self._find(size="L"), ["11"])
+        self.assertEqual(self._find(age="baby"), ["100"])
+        self.assertEqual(self._find(status="X"), ["2"])
+        self.assertEqual(self._find(shelterid="sc001", sex="F"), ["10"])
+        self.assertRaises(RecordDoesNotExistError, self._find, animal="bird")
+
+    def test_breed(self):
+        """
+        Pets with more than one breed should match on any of them.
+        """
+
+        self.assertEqual(self._find(breed="beagle"), ["2", "9", "11", "100"])
+        self.assertEqual(self._find(breed="Boxer"), ["11"])
+        self.assertRaises(
+            RecordDoesNotExistError, self._find, breed="Boxer", size="M")
+
+    def test_location(self):
+        """
+        Locations can be a ZIP code, "City, ST", a state, or a city.
+        """
+
+        self.assertEqual(self._find(location="29201"), ["11"])
+        self.assertEqual(self._find(location="29201-1234"), ["11"])
+        self.assertEqual(
+            self._find(location="greenville, SC"), ["9", "10"])
+        self.assertEqual(self._find(location="GA"), ["100"])
+        self.assertEqual(self._find(location="Greenville"), ["2", "9", "10"])
+
+    def test_offset(self):
+        """
+        Offsets should skip that many matches.
+        """
+
+        self.assertEqual(self._find(offset=3), ["11", "100"])
+        self.assertEqual(self._find(offset="1", animal="dog"),
+                         ["9", "11", "100"])
+        self.assertRaises(RecordDoesNotExistError, self._find, offset=5)
+
+    def test_pet_get(self):
+        """
+        Records should come back just as they went in.
+        """
+
+        self.assertEqual(self.mirror.pet_get(10), _pet(
+            10, animal="Cat", breeds=["Siamese"], sex="F"))
+        self.assertEqual(self.mirror.pet_get("12"), None)
+
+    def test_apply_sync_events(self):
+        """
+        Added and updated pets should be stored, and removed ones deleted.
+        """
+
+        events = [
+            SyncEvent(ADDED, "SC001", "12", _pet(12, breeds=["Boxer"])),
+            SyncEvent(UPDATED, "SC001", "9", _pet(9, breeds=["Boxer"])),
+            SyncEvent(REMOVED, "SC001", "11", None),
+        ]
+        self.assertEqual(list(self.mirror.apply_sync_events(events)), events)
+        self.assertEqual(self._find(breed="boxer"), ["9", "12"])
+        self.assertEqual(self.mirror.pet_get(11), None)
+        self.assertEqual(self.mirror.pet_get(9)["breeds"], ["Boxer"])
+
+    def test_no_matches(self):
+        """
+        Finding nothing should raise, just like the client does.
+        """
+
+        self.assertRaises(
+            RecordDoesNotExistError, self._find, location="90210")
+        self.assertRaises(
+            RecordDoesNotExistError, self._find, breed="Siamese", sex="M")
+
+    def test_store_from_generator(self):
+        """
+        Records should be gathered up before the database is locked, and
+        stored a batch at a time.
+        """
+
+        stored = []
+
+        def records():
+            for pet_id in range(20, 25):
+                self.assertFalse(self.mirror._lock.locked())
+                stored.append(self.mirror.pet_get(pet_id - 2) is not None)
+                yield _pet(pet_id)
+
+        self.assertEqual(self.mirror.store_pets(records(), batch_size=2), 5)
+        # Each batch is in the mirror before the next one is gathered up.
+        self.assertEqual(stored, [False, False, True, True, True])
+        self.assertEqual(self._find(offset=4),
+                         ["20", "21", "22", "23", "24", "100"])
+        self.assertEqual(self.mirror.store_pets([]), 0)
+
+    def test_store_from_client(self):
+        """
+        Records can be stored straight from the client, in any form.
+        """
+
+        for record_mode in ("dict", "compact", "lazy"):
+            mirror = MirrorStore(":memory:")
+            self.addCleanup(mirror.close)
+            api = get_client(FakeTransport(total_pets=30),
+                             record_mode=record_mode)
+            self.assertEqual(mirror.store_pets(
+                api.pet_find(location="29607", count=10), batch_size=7), 30)
+            self.assertEqual(
+                list(mirror.pet_find(location="29607", count=10)),
+                list(get_client(FakeTransport(total_pets=30)).pet_find(
+                    location="29607", count=10)))
+            self.assertEqual(mirror.store_shelters(
+                api.shelter_find(location="29607"), batch_size=7), 100)
+            self.assertEqual(mirror.shelter_get("SC042"),
+                             api.shelter_get(id="SC042"))
@@ -0,0 +1,237 @@
+import threading
+import time
+import unittest
+
+from lxml import etree
+
+from benchmarks.fakeserver import render_document
+from petfinder.exceptions import (
+    GenericInternalError, InvalidRequestError, RecordDoesNotExistError)
+from petfinder.records import as_dict
+from petfinder.retry import RetryPolicy
+from petfinder.transport import TransportResponse
+from tests.fakes import FakeTransport, get_client
+
+
+class FailingTransport(FakeTransport):
+    """
+    Fails every call for the page at ``fail_offset``.
+    """
+
+    def __init__(self, fail_offset, **kwargs):
+        super(FailingTransport, self).__init__(**kwargs)
+        self.fail_offset = fail_offset
+
+    def respond(self, method, params):
+        if params.get("offset") == self.fail_offset:
+            raise GenericInternalError("Something broke.")
+        return super(FailingTransport, self).respond(method, params)
+
+
+class ClosingResponse(TransportResponse):
+    """
+    Notes down whether it has been closed.
+    """
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StreamingTransport(FakeTransport):
+    """
+    Hands back responses that keep track of being closed. Calls for the
+    page at ``error_offset`` (``None`` for the first page) get an error
+    document with ``error_code`` instead, the first ``error_count`` times.
+    """
+
+    def __init__(self, error_offset=False, error_code="200", error_count=None,
+                 **kwargs):
+        super(StreamingTransport, self).__init__(**kwargs)
+        self.error_offset = error_offset
+        self.error_code = error_code
+        self.error_count = error_count
+        self.responses = []
+
+    def respond(self, method, params):
+        if params.get("offset") == self.error_offset and (
+                self.error_count is None or self.error_count > 0):
+            if self.error_count is not None:
+                self.error_count -= 1
+            if self.error_code is None:
+                # Not even a header.
+                content = b"<petfinder><pets/></petfinder>"
+            else:
+                content = render_document("", self.error_code, "Error")
+        else:
+            content = super(StreamingTransport, self).respond(
+                method, params).content
+        response = ClosingResponse(content)
+        self.responses.append(response)
+        return response
+
+
+def _wait_for_threads(count, timeout=2):
+    """
+    :rtype: bool
+    :returns: ``True`` once there are no more than ``count`` threads
+        running, ``False`` if that takes longer than ``timeout`` seconds.
+    """
+
+    deadline = time.time() + timeout
+    while threading.active_count() > count:
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+#noinspection PyClassicStyleClass
+class PrefetchTests(unittest.TestCase):
+    """
+    Tests for reading pages ahead. These don't touch the API.
+    """
+
+    def test_same_records(self):
+        """
+        Prefetching should give exactly the same records, from the same
+        requests, as fetching one page at a time.
+        """
+
+        transport = FakeTransport(total_pets=95)
+        expected = list(get_client(transport).pet_find(
+            location="29607", count=10))
+        expected_offsets = transport.get_offsets("pet.find")
+        self.assertEqual(len(expected), 95)
+        for depth in (1, 3):
+            transport = FakeTransport(total_pets=95)
+            api = get_client(transport, prefetch=depth)
+            self.assertEqual(
+                list(api.pet_find(location="29607", count=10)), expected)
+            self.assertEqual(
+                transport.get_offsets("pet.find"), expected_offsets)
+
+    def test_abandoned(self):
+        """
+        Walking away from the records should stop the fetcher thread, with
+        no more than a few pages fetched ahead.
+        """
+
+        threads = threading.active_count()
+        transport = FakeTransport(total_pets=10000)
+        api = get_client(transport, prefetch=2)
+        records = api.pet_find(location="29607", count=10)
+        next(records)
+        records.close()
+        self.assertTrue(_wait_for_threads(threads))
+        fetched = len(transport.calls)
+        # The current page, two buffered, and one waiting for room.
+        self.assertTrue(fetched <= 4)
+        time.sleep(0.2)
+        self.assertEqual(len(transport.calls), fetched)
+
+    def test_error(self):
+        """
+        Errors fetching a later page should reach the consumer, after the
+        pages before it.
+        """
+
+        transport = FailingTransport("20", total_pets=95)
+        api = get_client(transport, prefetch=2)
+        records = []
+        with self.assertRaises(GenericInternalError):
+            for record in api.pet_find(location="29607", count=10):
+                records.append(record)
+        self.assertEqual(len(records), 20)
+
+
+#noinspection PyClassicStyleClass
+class StreamingTests(unittest.TestCase):
+    """
+    Tests for parsing pages as they are downloaded. These don't touch the
+    API.
+    """
+
+    def test_same_records(self):
+        """
+        Streaming should give exactly the same records as parsing whole
+        pages.
+        """
+
+        for record_mode in ("dict", "compact", "lazy"):
+            expected = list(get_client(
+                FakeTransport(total_pets=95), record_mode=record_mode,
+            ).pet_find(location="29607", count=10, output="full"))
+            self.assertEqual(len(expected), 95)
+            transport = StreamingTransport(total_pets=95)
+            api = get_client(
+                transport, streaming=True, record_mode=record_mode)
+            records = list(api.pet_find(
+                location="29607", count=10, output="full"))
+            self.assertEqual([as_dict(record) for record in records],
+                             [as_dict(record) for record in expected])
+            for response in transport.responses:
+                self.assertTrue(response.closed)
+
+        api = get_client(StreamingTransport(total_pets=95), streaming=True)
+        self.assertEqual(
+            list(api.shelter_getpets(id="SC001", count=10)),
+            [str(pet_id) for pet_id in range(95)])
+
+    def test_abandoned(self):
+        """
+        Walking away from the records should close the response.
+        """
+
+        transport = StreamingTransport(total_pets=95)
+        api = get_client(transport, streaming=True)
+        records = api.pet_find(location="29607", count=10)
+        next(records)
+        self.assertFalse(transport.responses[0].closed)
+        records.close()
+        self.assertEqual(len(transport.responses), 1)
+        self.assertTrue(transport.responses[0].closed)
+
+    def test_header_errors(self):
+        """
+        Errors in the header should be raised, on the first page or any
+        after it, and the response closed.
+        """
+
+        transport = StreamingTransport(
+            error_offset=None, error_code="201", total_pets=95)
+        api = get_client(transport, streaming=True)
+        self.assertRaises(
+            RecordDoesNotExistError, list, api.pet_find(location="29607"))
+        self.assertTrue(transport.responses[0].closed)
+
+        transport = StreamingTransport(error_offset="20", total_pets=95)
+        api = get_client(transport, streaming=True)
+        records = []
+        with self.assertRaises(InvalidRequestError):
+            for record in api.pet_find(location="29607", count=10):
+                records.append(record)
+        self.assertEqual(len(records), 20)
+        for response in transport.responses:
+            self.assertTrue(response.closed)
+
+        transport = StreamingTransport(error_offset="20", error_code=None,
+                                       total_pets=95)
+        api = get_client(transport, streaming=True)
+        self.assertRaises(
+            etree.XMLSyntaxError, list,
+            api.pet_find(location="29607", count=10))
+
+    def test_header_retries(self):
+        """
+        Errors in the header can still be retried.
+        """
+
+        transport = StreamingTransport(
+            error_offset="20", error_code="999", error_count=1, total_pets=95)
+        api = get_client(transport, streaming=True,
+                          retry_policy=RetryPolicy(backoff_base=0))
+        self.assertEqual(
+            len(list(api.pet_find(location="29607", count=10))), 95)
+        self.assertEqual(transport.get_offsets("pet.find").count("20"), 2)
@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from petfinder.exceptions import ClientRateLimitExceeded
+from petfinder.ratelimit import FileBackend, RateLimiter, SECONDS_PER_DAY
+
+
+#noinspection PyClassicStyleClass
+class RateLimiterTests(unittest.TestCase):
+    """
+    Tests for the client-side rate limiter.
+    """
+
+    def _acquire_at(self, limiter, now):
+        with limiter.backend.locked_state() as state:
+            return limiter._try_acquire(state, now)
+
+    def test_refill(self):
+        """
+        Tokens should refill at per_second, up to burst.
+        """
+
+        limiter = RateLimiter(per_second=2, burst=2)
+        self.assertEqual(self._acquire_at(limiter, 100), 0)
+        self.assertEqual(self._acquire_at(limiter, 100), 0)
+        # Empty, and half a second from the next token.
+        self.assertAlmostEqual(self._acquire_at(limiter, 100), 0.5)
+        self.assertAlmostEqual(self._acquire_at(limiter, 100.25), 0.25)
+        self.assertEqual(self._acquire_at(limiter, 100.5), 0)
+        # A long break only refills up to burst.
+        self.assertEqual(self._acquire_at(limiter, 200), 0)
+        self.assertEqual(self._acquire_at(limiter, 200), 0)
+        self.assertTrue(self._acquire_at(limiter, 200) > 0)
+
+    def test_blocking(self):
+        """
+        A blocking limiter should wait for the next token.
+        """
+
+        limiter = RateLimiter(per_second=20, burst=1)
+        start = time.time()
+        for _ in range(4):
+            limiter.acquire()
+        # The first is free, the rest are 1/20th of a second apart.
+        self.assertTrue(time.time() - start >= 0.14)
+
+    def test_non_blocking(self):
+        """
+        A non-blocking limiter should raise instead of waiting.
+        """
+
+        limiter = RateLimiter(per_second=1, burst=1, block=False)
+        limiter.acquire()
+        self.assertRaises(ClientRateLimitExceeded, limiter.acquire)
+
+    def test_daily_budget(self):
+        """
+        The daily budget should run out, and come back at midnight UTC.
+        """
+
+        limiter = RateLimiter(per_day=2)
+        midnight = SECONDS_PER_DAY * 20000
+        self.assertEqual(self._acquire_at(limiter, midnight - 2), 0)
+        self.assertEqual(self._acquire_at(limiter, midnight - 1), 0)
+        self.assertRaises(
+            ClientRateLimitExceeded, self._acquire_at, limiter, midnight - 1)
+        self.assertEqual(self._acquire_at(limiter, midnight), 0)
+        self.assertEqual(self._acquire_at(limiter, midnight + 1), 0)
+        self.assertRaises(
+            ClientRateLimitExceeded, self._acquire_at, limiter, midnight + 1)
+
+    def test_remaining_today(self):
+        """
+        remaining_today() should count down as requests are made.
+        """
+
+        self.assertEqual(RateLimiter().remaining_today(), None)
+        limiter = RateLimiter(per_day=3)
+        self.assertEqual(limiter.remaining_today(), 3)
+        limiter.acquire()
+        self.assertEqual(limiter.remaining_today(), 2)
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(limiter.remaining_today(), 0)
+        self.assertRaises(ClientRateLimitExceeded, limiter.acquire)
+
+
+#noinspection PyClassicStyleClass
+class FileBackendTests(unittest.TestCase):
+    """
+    Limiters with file backends on the same path should share a budget.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "ratelimit.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_shared_budget(self):
+        """
+        Requests through either limiter should count against both.
+        """
+
+        first = RateLimiter(per_day=3, backend=FileBackend(self.path))
+        second = RateLimiter(per_day=3, backend=FileBackend(self.path))
+        first.acquire()
+        second.acquire()
+        self.assertEqual(first.remaining_today(), 1)
+        first.acquire()
+        self.assertRaises(ClientRateLimitExceeded, second.acquire)
+        self.assertEqual(second.remaining_today(), 0)
+
+    def test_shared_tokens(self):
+        """
+        The token bucket should be shared too.
+        """
+
+        first = RateLimiter(
+            per_second=1, burst=1, block=False, backend=FileBackend(self.path))
+        second = RateLimiter(
+            per_second=1, burst=1, block=False, backend=FileBackend(self.path))
+        first.acquire()
+        self.assertRaises(ClientRateLimitExceeded, second.acquire)
@@ -0,0 +1,152 @@
+import datetime
+import pickle
+import re
+import unittest
+
+from petfinder.records import Contact, LazyPet, Pet, Photo, as_dict
+from tests.fakes import FakeTransport, get_client
+
+
+class NoShelterPetIdTransport(FakeTransport):
+    """
+    The fake server's documents, with the shelterPetId tags taken out.
+    """
+
+    def render(self, method, params):
+        return re.sub(
+            b"<shelterPetId>[^<]*</shelterPetId>", b"",
+            super(NoShelterPetIdTransport, self).render(method, params))
+
+
+#noinspection PyClassicStyleClass
+class CompactRecordTests(unittest.TestCase):
+    """
+    Tests for compact records. These don't touch the API.
+    """
+
+    def test_pet_get(self):
+        """
+        Compact records should read like the dicts they replace, as well as
+        through attributes.
+        """
+
+        for response_format in ("xml", "json"):
+            api = get_client(
+                record_mode="compact", response_format=response_format)
+            record = api.pet_get(id=1)
+            self.assertTrue(isinstance(record, Pet))
+            self.assertTrue("id" in record)
+            self.assertFalse("foo" in record)
+            self.assertEqual(record["name"], record.name)
+            self.assertEqual(record.get("foo", "bar"), "bar")
+            self.assertTrue(isinstance(record["breeds"], tuple))
+            self.assertTrue(
+                isinstance(record["lastUpdate"], datetime.datetime))
+            self.assertTrue(isinstance(record.contact, Contact))
+            self.assertTrue(isinstance(record.photos[0], Photo))
+            self.assertEqual(record.contact.city, "Greenville")
+            self.assertRaises(KeyError, lambda: record["foo"])
+
+            expected = get_client(response_format=response_format).pet_get(
+                id=1)
+            self.assertEqual(record, expected)
+            self.assertEqual(record.to_dict(), expected)
+            self.assertEqual(sorted(record.keys()), sorted(expected))
+
+    def test_missing_fields(self):
+        """
+        Fields missing from the response should behave like missing keys.
+        """
+
+        record = get_client(
+            NoShelterPetIdTransport(), record_mode="compact").pet_get(id=1)
+        self.assertFalse("shelterPetId" in record)
+        self.assertEqual(record.get("shelterPetId"), None)
+        self.assertRaises(KeyError, lambda: record["shelterPetId"])
+        self.assertRaises(AttributeError, lambda: record.shelterPetId)
+        self.assertFalse("shelterPetId" in record.to_dict())
+
+    def test_pickle(self):
+        """
+        Compact records should survive a pickle round-trip.
+        """
+
+        record = get_client(record_mode="compact").pet_get(id=1)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(record, protocol))
+            self.assertEqual(copy, record)
+            self.assertTrue(isinstance(copy.contact, Contact))
+            self.assertTrue(isinstance(copy.photos, tuple))
+
+
+#noinspection PyClassicStyleClass
+class LazyPetTests(unittest.TestCase):
+    """
+    Tests for lazy records. These don't touch the API.
+    """
+
+    def setUp(self):
+        self.api = get_client(record_mode="lazy")
+        self.expected = get_client().pet_get(id=1)
+
+    def test_contains(self):
+        """
+        Membership should be answered without decoding anything, both before
+        and after the record is materialized.
+        """
+
+        record = self.api.pet_get(id=1)
+        self.assertTrue(isinstance(record, LazyPet))
+        for key in ("name", "shelterPetId", "breeds", "photos", "contact"):
+            self.assertTrue(key in record, key)
+        self.assertFalse("foo" in record)
+        self.assertEqual(record._values, {})
+
+        record.materialize()
+        for key in ("name", "shelterPetId", "breeds", "photos", "contact"):
+            self.assertTrue(key in record, key)
+        self.assertFalse("foo" in record)
+
+        api = get_client(NoShelterPetIdTransport(), record_mode="lazy")
+        record = api.pet_get(id=1)
+        self.assertFalse("shelterPetId" in record)
+        self.assertTrue("name" in record)
+        self.assertRaises(KeyError, lambda: record["shelterPetId"])
+        self.assertEqual(record.materialize().get("shelterPetId"), None)
+        self.assertFalse("shelterPetId" in record)
+        self.assertEqual(len(record), len(self.expected) - 1)
+
+    def test_materialize(self):
+        """
+        Materializing should decode every field, and let go of the Element.
+        """
+
+        record = self.api.pet_get(id=1)
+        self.assertFalse(record.is_materialized)
+        self.assertEqual(record["name"], "Pet 1")
+        self.assertEqual(list(record._values), ["name"])
+
+        self.assertTrue(record.materialize() is record)
+        self.assertTrue(record.is_materialized)
+        self.assertTrue(record._root is None and record._client is None)
+        self.assertEqual(sorted(record._values), sorted(self.expected))
+        self.assertEqual(as_dict(record), self.expected)
+        self.assertEqual(record.lastUpdate, self.expected["lastUpdate"])
+        # A second call is a no-op.
+        self.assertEqual(record.materialize().to_dict(), self.expected)
+
+    def test_pickle(self):
+        """
+        Pickled records should come back materialized, with the same values.
+        """
+
+        record = self.api.pet_get(id=1)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(record, protocol))
+            self.assertTrue(isinstance(copy, LazyPet))
+            self.assertTrue(copy.is_materialized)
+            self.assertEqual(copy.to_dict(), self.expected)
+            self.assertTrue("name" in copy)
+            self.assertFalse("foo" in copy)
+        self.assertTrue(record.is_materialized)
+        self.assertEqual(record.to_dict(), self.expected)
@@ -0,0 +1,161 @@
+import threading
+import time
+import unittest
+
+import requests
+
+from petfinder.exceptions import (
+    GenericInternalError, InvalidRequestError, RecordDoesNotExistError)
+from petfinder.retry import RetryPolicy
+from tests.fakes import FakeTransport, get_client
+
+
+class FlakyTransport(FakeTransport):
+    """
+    The connection drops the first time each page after the first is
+    asked for.
+    """
+
+    def __init__(self, **kwargs):
+        super(FlakyTransport, self).__init__(**kwargs)
+        self.failed_offsets = set()
+
+    def respond(self, method, params):
+        offset = params.get("offset")
+        if offset is not None and offset not in self.failed_offsets:
+            self.failed_offsets.add(offset)
+            raise requests.exceptions.ConnectionError("Connection reset.")
+        return super(FlakyTransport, self).respond(method, params)
+
+
+class BrokenTransport(FakeTransport):
+    """
+    Every call fails with the given error.
+    """
+
+    def __init__(self, error, **kwargs):
+        super(BrokenTransport, self).__init__(**kwargs)
+        self.error = error
+
+    def respond(self, method, params):
+        raise self.error
+
+
+class SlowFirstTransport(FakeTransport):
+    """
+    The first call takes its time, and answers with a different pet than
+    the rest.
+    """
+
+    def __init__(self, delay, **kwargs):
+        super(SlowFirstTransport, self).__init__(**kwargs)
+        self.delay = delay
+        self._first = threading.Lock()
+
+    def respond(self, method, params):
+        if self._first.acquire(False):
+            time.sleep(self.delay)
+            params = dict(params, id="2")
+        return super(SlowFirstTransport, self).respond(method, params)
+
+
+#noinspection PyClassicStyleClass
+class RetryTests(unittest.TestCase):
+    """
+    Tests for retries and hedged requests. These don't touch the API.
+    """
+
+    policy = RetryPolicy(max_attempts=3, backoff_base=0)
+
+    def test_resume_pagination(self):
+        """
+        A failed page should be retried at the same offset, and pagination
+        should carry on from there.
+        """
+
+        transport = FlakyTransport(total_pets=35)
+        api = get_client(transport, retry_policy=self.policy)
+        records = list(api.pet_find(location="29607", count=10))
+        self.assertEqual(
+            [int(record["id"]) for record in records], list(range(35)))
+        self.assertEqual(
+            transport.get_offsets("pet.find"),
+            [None, "10", "10", "20", "20", "30", "30", "35", "35"])
+
+    def test_max_attempts(self):
+        """
+        Retryable errors should be given up on after max_attempts.
+        """
+
+        transport = BrokenTransport(
+            requests.exceptions.ConnectionError("Connection refused."))
+        api = get_client(transport, retry_policy=self.policy)
+        self.assertRaises(
+            requests.exceptions.ConnectionError, api.pet_get, id=1)
+        self.assertEqual(len(transport.calls), 3)
+
+        transport = BrokenTransport(
+            GenericInternalError("Something broke."))
+        api = get_client(transport, retry_policy=self.policy)
+        self.assertRaises(GenericInternalError, api.pet_get, id=1)
+        self.assertEqual(len(transport.calls), 3)
+
+    def test_not_retryable(self):
+        """
+        Errors the policy doesn't cover should be raised right away.
+        """
+
+        transport = FakeTransport()
+        api = get_client(transport, retry_policy=self.policy)
+        # Not a real method, so the fake API says it's an invalid request.
+        self.assertRaises(
+            InvalidRequestError, api._do_api_call, "pet.bogus", {})
+        self.assertEqual(len(transport.calls), 1)
+
+        transport = FakeTransport(total_pets=10)
+        api = get_client(transport, retry_policy=self.policy)
+        self.assertRaises(RecordDoesNotExistError, api.pet_get, id=10)
+        self.assertEqual(len(transport.calls), 1)
+
+        policy = RetryPolicy(retry_transport_errors=False)
+        self.assertFalse(policy.is_retryable(
+            requests.exceptions.ConnectionError()))
+        self.assertTrue(policy.is_retryable(GenericInternalError()))
+
+    def test_get_delay(self):
+        """
+        Waits should double each time, up to backoff_max.
+        """
+
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=3, jitter=False)
+        self.assertEqual(
+            [policy.get_delay(attempt) for attempt in range(1, 6)],
+            [0.5, 1, 2, 3, 3])
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=3)
+        for attempt in range(1, 6):
+            self.assertTrue(0 <= policy.get_delay(attempt) <= 3)
+
+    def test_hedge(self):
+        """
+        A slow first request should lose out to the hedged one.
+        """
+
+        transport = SlowFirstTransport(1)
+        api = get_client(transport, hedge_after=0.05)
+        start = time.time()
+        record = api.pet_get(id=1)
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual(record["id"], "1")
+        self.assertEqual(len(transport.calls), 2)
+        api.close()
+
+    def test_no_hedge(self):
+        """
+        Fast requests shouldn't be hedged.
+        """
+
+        transport = FakeTransport()
+        api = get_client(transport, hedge_after=1)
+        self.assertEqual(api.pet_get(id=1)["id"], "1")
+        self.assertEqual(len(transport.calls), 1)
+        api.close()
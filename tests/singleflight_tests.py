@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+
+from petfinder.exceptions import RecordDoesNotExistError
+from petfinder.singleflight import SingleFlight
+from tests.fakes import FakeTransport, get_client
+
+
+class GatedTransport(FakeTransport):
+    """
+    Holds every call until the gate is opened.
+    """
+
+    def __init__(self, **kwargs):
+        super(GatedTransport, self).__init__(**kwargs)
+        self.gate = threading.Event()
+
+    def respond(self, method, params):
+        self.gate.wait()
+        return super(GatedTransport, self).respond(method, params)
+
+
+#noinspection PyClassicStyleClass
+class CoalesceTests(unittest.TestCase):
+    """
+    Identical calls made at the same time should share a request. These
+    don't touch the API.
+    """
+
+    num_threads = 8
+
+    def _call_concurrently(self, pet_id):
+        """
+        Calls pet_get(id=pet_id) from a bunch of threads at once.
+
+        :rtype: tuple
+        :returns: A tuple of the transport, and a list of what each thread
+            got back (or raised).
+        """
+
+        transport = GatedTransport(total_pets=10)
+        api = get_client(transport, coalesce=True)
+        results = [None] * self.num_threads
+
+        def call(num):
+            try:
+                results[num] = api.pet_get(id=pet_id)
+            except Exception as exc:
+                results[num] = exc
+
+        threads = [threading.Thread(target=call, args=(num,))
+                   for num in range(self.num_threads)]
+        for thread in threads:
+            thread.start()
+        # Give everyone time to pile up behind the first call.
+        time.sleep(0.2)
+        transport.gate.set()
+        for thread in threads:
+            thread.join()
+        return transport, results
+
+    def test_one_request(self):
+        """
+        Every caller should get the record, from a single request.
+        """
+
+        transport, results = self._call_concurrently(1)
+        self.assertEqual(len(transport.calls), 1)
+        for record in results:
+            self.assertEqual(record, results[0])
+            self.assertEqual(record["id"], "1")
+        # Each caller gets their own copy.
+        self.assertEqual(len(set(id(record) for record in results)),
+                         self.num_threads)
+
+    def test_shared_error(self):
+        """
+        The first caller's error should reach everybody waiting on it.
+        """
+
+        transport, results = self._call_concurrently(10)
+        self.assertEqual(len(transport.calls), 1)
+        for error in results:
+            self.assertTrue(isinstance(error, RecordDoesNotExistError))
+
+    def test_sequential_calls(self):
+        """
+        Calls that don't overlap shouldn't share anything.
+        """
+
+        flight = SingleFlight()
+        self.assertEqual(flight.do("key", lambda: 1), (1, False))
+        self.assertEqual(flight.do("key", lambda: 2), (2, False))
@@ -0,0 +1,180 @@
+import datetime
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import pytz
+
+from benchmarks.fakeserver import render_document, render_pet
+from petfinder.sync import (
+    ADDED, REMOVED, UPDATED, ShelterSync, ShelterSyncState)
+from petfinder.transport import TransportResponse
+from tests.fakes import FakeTransport, get_client
+
+
+class InventoryTransport(FakeTransport):
+    """
+    A single shelter, whose pets can be changed between calls.
+    """
+
+    def __init__(self, **kwargs):
+        super(InventoryTransport, self).__init__(**kwargs)
+        # Pet ID -> lastUpdate.
+        self.pets = {}
+
+    def _render_pet(self, pet_id):
+        return "<pet>%s</pet>" % re.sub(
+            "<lastUpdate>[^<]*</lastUpdate>",
+            "<lastUpdate>%s</lastUpdate>" % self.pets[pet_id],
+            render_pet(int(pet_id)))
+
+    def respond(self, method, params):
+        if method == "pet.get":
+            if params["id"] not in self.pets:
+                content = render_document("", "201", "Record does not exist")
+            else:
+                content = render_document(self._render_pet(params["id"]))
+        elif not self.pets:
+            content = render_document("", "201", "Record does not exist")
+        else:
+            # Everything on the first page, nothing on the next.
+            pet_ids = [] if params.get("offset") else sorted(self.pets)
+            body = "<lastOffset>%d</lastOffset>" % len(self.pets)
+            if params.get("output") == "id":
+                body += "<petIds>%s</petIds>" % "".join(
+                    "<id>%s</id>" % pet_id for pet_id in pet_ids)
+            else:
+                body += "<pets>%s</pets>" % "".join(
+                    self._render_pet(pet_id) for pet_id in pet_ids)
+            content = render_document(body)
+        return TransportResponse(content)
+
+
+#noinspection PyClassicStyleClass
+class ShelterSyncTests(unittest.TestCase):
+    """
+    Tests for incremental shelter syncing. These don't touch the API.
+    """
+
+    def setUp(self):
+        self.transport = InventoryTransport()
+        self.transport.pets = {
+            "1": "2013-04-01T00:00:00Z",
+            "2": "2013-04-01T00:00:00Z",
+            "3": "2013-04-01T00:00:00Z",
+        }
+        self.api = get_client(self.transport)
+
+    def _sync(self, sync):
+        """
+        :rtype: list
+        :returns: Sorted (type, pet ID) tuples for every event.
+        """
+
+        events = list(sync.run(["SC001"]))
+        for event in events:
+            self.assertEqual(event.shelter_id, "SC001")
+            if event.type == REMOVED:
+                self.assertEqual(event.record, None)
+            else:
+                self.assertEqual(event.record["id"], event.pet_id)
+        return sorted((event.type, event.pet_id) for event in events)
+
+    def _change_inventory(self):
+        # One adopted, one new, and one updated.
+        del self.transport.pets["2"]
+        self.transport.pets["4"] = "2013-04-02T00:00:00Z"
+        self.transport.pets["1"] = "2013-04-02T00:00:00Z"
+        del self.transport.calls[:]
+
+    def _get_fetched(self):
+        return sorted(params["id"] for method, params in self.transport.calls
+                      if method == "pet.get")
+
+    def test_diff(self):
+        """
+        Added and removed pets should be picked up from the ID listing.
+        """
+
+        sync = ShelterSync(self.api)
+        self.assertEqual(
+            self._sync(sync), [(ADDED, "1"), (ADDED, "2"), (ADDED, "3")])
+        self._change_inventory()
+        self.assertEqual(self._sync(sync), [(ADDED, "4"), (REMOVED, "2")])
+        # Only the new pet needed a full record.
+        self.assertEqual(self._get_fetched(), ["4"])
+        self.assertEqual(
+            sorted(sync.state.get_pets("SC001")), ["1", "3", "4"])
+        # Nothing changed since.
+        self.assertEqual(self._sync(sync), [])
+
+    def test_detect_updates(self):
+        """
+        Updated pets should be re-fetched, and nothing else.
+        """
+
+        sync = ShelterSync(self.api, detect_updates=True)
+        self._sync(sync)
+        self._change_inventory()
+        self.assertEqual(
+            self._sync(sync),
+            [(ADDED, "4"), (REMOVED, "2"), (UPDATED, "1")])
+        self.assertEqual(self._get_fetched(), ["1", "4"])
+        self.assertEqual(
+            sync.state.get_pets("SC001")["1"],
+            datetime.datetime(2013, 4, 2, tzinfo=pytz.utc))
+        self.assertEqual(self._sync(sync), [])
+
+    def test_empty_shelter(self):
+        """
+        A shelter that runs out of pets should have them all removed.
+        """
+
+        sync = ShelterSync(self.api)
+        self._sync(sync)
+        self.transport.pets = {}
+        self.assertEqual(
+            self._sync(sync),
+            [(REMOVED, "1"), (REMOVED, "2"), (REMOVED, "3")])
+
+
+#noinspection PyClassicStyleClass
+class ShelterSyncStateTests(unittest.TestCase):
+    """
+    Tests for saving and loading sync state.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "sync-state.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        """
+        The state should come back just as it was saved, time zones and all.
+        """
+
+        state = ShelterSyncState({
+            "SC001": {
+                "1": datetime.datetime(
+                    2013, 4, 2, 17, 46, 40, tzinfo=pytz.utc),
+                "2": None,
+            },
+            "SC002": {},
+        })
+        state.save(self.path)
+        loaded = ShelterSyncState.load(self.path)
+        self.assertEqual(loaded.shelters, state.shelters)
+        self.assertEqual(loaded.get_pets("SC001")["1"].tzinfo, pytz.utc)
+        self.assertFalse(os.path.exists("%s.tmp" % self.path))
+
+    def test_missing_file(self):
+        """
+        Loading a state that was never saved should give an empty one.
+        """
+
+        self.assertEqual(ShelterSyncState.load(self.path).shelters, {})
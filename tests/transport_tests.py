@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import petfinder
+from benchmarks.fakeserver import start_server
+from petfinder.exceptions import (
+    RecordDoesNotExistError, RecordingNotFoundError)
+from petfinder.transport import (
+    RecordingTransport, ReplayTransport, Urllib3Transport, urllib3)
+from tests.fakes import FakeTransport, get_client
+
+
+#noinspection PyClassicStyleClass
+class RecordReplayTests(unittest.TestCase):
+    """
+    Tests for recording responses, and playing them back. These don't touch
+    the API.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "recordings")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_calls(self, api):
+        """
+        :rtype: tuple
+        :returns: The results of a paginated call, a single record, and a
+            call that fails.
+        """
+
+        pets = list(api.pet_find(location="29607", count=10))
+        pet = api.pet_get(id=3)
+        self.assertRaises(RecordDoesNotExistError, api.pet_get, id=500)
+        return pets, pet
+
+    def test_round_trip(self):
+        """
+        Replays should give back exactly what was recorded, errors and all,
+        whatever the API key.
+        """
+
+        for response_format in ("xml", "json"):
+            transport = RecordingTransport(
+                self.path, transport=FakeTransport(total_pets=25))
+            recorded = self._make_calls(
+                get_client(transport, response_format=response_format))
+
+            replay = ReplayTransport(self.path)
+            api = petfinder.PetFinderClient(
+                api_key="another key", api_secret="secret", transport=replay,
+                response_format=response_format)
+            self.assertEqual(self._make_calls(api), recorded)
+
+            self.assertRaises(
+                RecordingNotFoundError, api.pet_get, id=4)
+            self.assertRaises(
+                RecordingNotFoundError, list,
+                api.pet_find(location="29607", count=5))
+
+        names = os.listdir(self.path)
+        # Four pages (the last one empty), a pet, and an error, for each
+        # format.
+        self.assertEqual(len(names), 12)
+        self.assertEqual(
+            len([name for name in names if name.endswith(".json")]), 6)
+        self.assertFalse([name for name in names if name.endswith(".tmp")])
+
+    def test_streaming_replay(self):
+        """
+        Replays can be streamed, too.
+        """
+
+        recorded = list(get_client(RecordingTransport(
+            self.path, transport=FakeTransport(total_pets=25)),
+        ).pet_find(location="29607", count=10))
+        api = get_client(ReplayTransport(self.path), streaming=True)
+        self.assertEqual(
+            list(api.pet_find(location="29607", count=10)), recorded)
+
+
+#noinspection PyClassicStyleClass
+@unittest.skipIf(urllib3 is None, "urllib3 isn't installed.")
+class Urllib3TransportTests(unittest.TestCase):
+    """
+    Tests for the urllib3 transport. These run against the fake API server.
+    """
+
+    def setUp(self):
+        self.url, self.server = start_server(total_pets=200)
+        # One connection, so every request goes over the same one.
+        self.transport = Urllib3Transport(maxsize=1)
+        self.api = petfinder.PetFinderClient(
+            api_key="key", api_secret="secret", endpoint=self.url,
+            transport=self.transport)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.terminate()
+        self.server.join()
+
+    def test_get(self):
+        """
+        Records should match what any other transport gets.
+        """
+
+        self.assertEqual(
+            list(self.api.pet_find(location="29607", count=50)),
+            list(get_client(FakeTransport(total_pets=200)).pet_find(
+                location="29607", count=50)))
+
+    def test_abandoned_stream(self):
+        """
+        Walking away from a streamed response part way through shouldn't
+        leave the rest of it on the connection for the next request.
+        """
+
+        self.api.streaming = True
+        for attempt in range(3):
+            records = self.api.pet_find(location="29607", count=200)
+            self.assertEqual(next(records)["id"], "0")
+            records.close()
+        self.api.streaming = False
+        self.assertEqual(self.api.pet_get(id=5)["id"], "5")
+
+        response = self.transport.get(
+            self.url + "pet.find", {"location": "29607", "count": "200"},
+            stream=True)
+        response.raw.read(100)
+        response.close()
+        self.assertTrue(response.raw.closed)
+        self.assertEqual(self.api.pet_get(id=6)["id"], "6")